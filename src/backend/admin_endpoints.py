@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Operational endpoints for NewDay Platform
+
+Runtime counters and request profiles for operators and monitoring.
+Protected by ADMIN_API_KEY (or N8N_API_KEY when no admin key is set) passed
+as the X-API-Key header.
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import PlainTextResponse
+from typing import Dict, List
+import os
+
+from admission import admission_stats
+from profiling import profile_store
+from query_log import slow_query_log
+from structured_logging import logging_stats
+from webinar_shards import get_shards
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+def verify_admin_api_key(x_api_key: str = Header(None)) -> bool:
+    """Verify the admin API key (ADMIN_API_KEY, falling back to N8N_API_KEY)"""
+    expected_key = os.getenv("ADMIN_API_KEY") or os.getenv("N8N_API_KEY")
+    if not expected_key:
+        # If no key is configured, allow access (development mode)
+        return True
+    
+    if not x_api_key or x_api_key != expected_key:
+        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+    
+    return True
+
+def _prometheus_lines(metric_prefix: str, label: str, rows: List[Dict], fields: Dict[str, str]) -> List[str]:
+    lines = []
+    for field, metric_type in fields.items():
+        name = f"{metric_prefix}_{field}"
+        lines.append(f"# TYPE {name} {metric_type}")
+        for row in rows:
+            value = row.get(field)
+            if value is not None:
+                lines.append(f'{name}{{{label}="{row[label]}"}} {value}')
+    return lines
+
+@router.get("/admission", summary="Admission control counters per endpoint group")
+def get_admission_stats(api_key_verified: bool = Depends(verify_admin_api_key)):
+    """
+    Get active and queued requests, admitted and shed counts and service time per group
+    """
+    return {"groups": admission_stats()}
+
+@router.get("/metrics", summary="Runtime metrics in Prometheus text format", response_class=PlainTextResponse)
+def get_metrics(api_key_verified: bool = Depends(verify_admin_api_key)):
+    """
+    Export runtime counters in the Prometheus text exposition format
+    """
+    lines = _prometheus_lines("newday_admission", "group", admission_stats(), {
+        "active": "gauge",
+        "queued": "gauge",
+        "max_concurrency": "gauge",
+        "max_queue": "gauge",
+        "admitted": "counter",
+        "shed": "counter",
+        "timed_out": "counter",
+        "avg_service_ms": "gauge",
+    })
+    log_stats = logging_stats()
+    lines += [
+        "# TYPE newday_log_queued gauge",
+        f"newday_log_queued {log_stats['queued']}",
+        "# TYPE newday_log_dropped counter",
+        f"newday_log_dropped {log_stats['dropped']}",
+    ]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@router.get("/profiles", summary="Retained request profiles")
+def list_profiles(api_key_verified: bool = Depends(verify_admin_api_key)):
+    """
+    List on-demand profiles and the slowest automatically profiled requests
+    """
+    return {"profiles": profile_store.list()}
+
+@router.get("/profiles/{profile_id}", summary="Folded stacks of a request profile", response_class=PlainTextResponse)
+def get_profile(profile_id: int, api_key_verified: bool = Depends(verify_admin_api_key)):
+    """
+    Get a profile as folded stacks, ready for flamegraph.pl or speedscope
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.folded())
+
+@router.get("/slow-queries", summary="Slow SQL statements with their query plans")
+def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    api_key_verified: bool = Depends(verify_admin_api_key)
+):
+    """
+    Get the latest slow statements and the statements with the most slow time
+    """
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "top": slow_query_log.top(limit),
+        "recent": slow_query_log.recent(limit)
+    }
+
+@router.delete("/slow-queries", summary="Clear the slow query log")
+def clear_slow_queries(api_key_verified: bool = Depends(verify_admin_api_key)):
+    """
+    Drop recorded slow statements, e.g. after adding an index
+    """
+    slow_query_log.clear()
+    return {"status": "success"}
+
+@router.get("/webinars/shards", summary="Webinars stored in their own database file")
+def list_webinar_shards(api_key_verified: bool = Depends(verify_admin_api_key)):
+    """
+    List sharded webinars; empty when WEBINAR_SHARD_DIR is not set
+    """
+    shards = get_shards()
+    return {"enabled": shards.enabled, "webinar_ids": shards.webinar_ids()}
+
+@router.post("/webinars/{webinar_id}/shard", summary="Move a webinar into its own database file")
+def create_webinar_shard(webinar_id: int, api_key_verified: bool = Depends(verify_admin_api_key)):
+    """
+    Move a webinar's days and questions into a new per-webinar SQLite file
+    
+    Must be done before enrollment opens; webinars that already have
+    participants stay in the shared file.
+    """
+    try:
+        return {"status": "success", **get_shards().create_shard(webinar_id)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating webinar shard: {str(e)}")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Admission control for NewDay Platform endpoint groups
+
+When n8n replays a backlog it can open far more concurrent requests than the
+database can serve; with SQLite they all end up waiting on the write lock
+until every one of them times out. ``AdmissionMiddleware`` puts a bounded
+limiter in front of each endpoint group:
+
+- up to ``max_concurrency`` requests of the group run at once;
+- up to ``max_queue`` more wait (at most ``queue_timeout`` seconds) for a slot;
+- anything beyond that is rejected immediately with ``429 Too Many Requests``
+  and a ``Retry-After`` estimate, so n8n backs off and retries instead of
+  piling up.
+
+Counters (active, queued, admitted, shed, timed out, average service time)
+are exported through /api/admin/admission and /api/admin/metrics.
+
+Environment variables, per group (prefix N8N_INGEST_ or N8N_EXPORT_):
+    MAX_CONCURRENCY: Requests served at once (ingest 4, export 2)
+    MAX_QUEUE: Requests allowed to wait for a slot (ingest 16, export 4)
+    QUEUE_TIMEOUT: Seconds a queued request waits before 429 (default 5)
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+
+class AdmissionLimiter:
+    """Concurrency limit with a short bounded FIFO queue (event-loop only)"""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_queue = max(max_queue, 0)
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: deque = deque()
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+        self._service_time_ema = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the average service time"""
+        service_time = self._service_time_ema or 1.0
+        backlog = self.active + self.queued + 1
+        return max(1, math.ceil(service_time * backlog / self.max_concurrency))
+
+    async def acquire(self) -> bool:
+        """
+        Take a slot, waiting in the queue if needed
+
+        Returns:
+            bool: False if the request must be shed (queue full or wait timed out)
+        """
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.CancelledError:
+            # Client went away while queued; pass on a slot handed to it meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0, record=False)
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait expired; keep it
+                self.admitted += 1
+                return True
+            waiter.cancel()
+            self._waiters.remove(waiter)
+            self.timed_out += 1
+            self.shed += 1
+            return False
+        self.admitted += 1
+        return True
+
+    def release(self, service_time: float, record: bool = True):
+        """Free a slot, handing it directly to the oldest waiter"""
+        if record:
+            if self._service_time_ema is None:
+                self._service_time_ema = service_time
+            else:
+                self._service_time_ema = 0.8 * self._service_time_ema + 0.2 * service_time
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)  # active count carries over to the waiter
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "group": self.name,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+            "avg_service_ms": round(self._service_time_ema * 1000, 2) if self._service_time_ema is not None else None
+        }
+
+
+def _limiter_from_env(name: str, prefix: str, concurrency: int, queue: int) -> AdmissionLimiter:
+    return AdmissionLimiter(
+        name,
+        max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", str(concurrency))),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", str(queue))),
+        queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", "5")),
+    )
+
+
+# Endpoint groups: n8n writes, and the large reads and exports
+LIMITERS: Dict[str, AdmissionLimiter] = {
+    "n8n_ingest": _limiter_from_env("n8n_ingest", "N8N_INGEST", 4, 16),
+    "n8n_export": _limiter_from_env("n8n_export", "N8N_EXPORT", 2, 4),
+}
+
+# (method, path prefix, group); the first match wins
+ROUTES: List[Tuple[str, str, str]] = [
+    ("POST", "/api/n8n/webhook", "n8n_ingest"),
+    ("POST", "/api/n8n/update-progress", "n8n_ingest"),
+    ("POST", "/api/n8n/update-content", "n8n_ingest"),
+    ("POST", "/api/n8n/enroll", "n8n_ingest"),
+    ("POST", "/api/n8n/advance-day", "n8n_ingest"),
+    ("POST", "/api/n8n/reminders/ack", "n8n_ingest"),
+    ("POST", "/api/n8n/responses/import", "n8n_ingest"),
+    ("GET", "/api/n8n/reminders", "n8n_export"),
+    ("GET", "/api/n8n/responses/export", "n8n_export"),
+    ("GET", "/api/webinars", "n8n_export"),
+]
+
+
+def match_group(method: str, path: str, routes: Iterable[Tuple[str, str, str]] = None) -> Optional[str]:
+    for route_method, prefix, group in routes or ROUTES:
+        if method == route_method and (path == prefix or path.startswith(prefix + "/")):
+            return group
+    return None
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying the group limiters to matching requests"""
+
+    def __init__(self, app, limiters: Dict[str, AdmissionLimiter] = None, routes=None):
+        self.app = app
+        self.limiters = limiters if limiters is not None else LIMITERS
+        self.routes = routes or ROUTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        group = match_group(scope["method"], scope["path"], self.routes)
+        limiter = self.limiters.get(group) if group else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            response = JSONResponse(
+                {"detail": f"Too many concurrent {group} requests, retry later"},
+                status_code=429,
+                headers={"Retry-After": str(limiter.retry_after())},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.monotonic() - started)
+
+
+def admission_stats() -> List[Dict]:
+    """Current counters of every group"""
+    return [limiter.stats() for limiter in LIMITERS.values()]
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Daily day-advance job for NewDay Platform
+
+Advances eligible participants of every webinar by one day using the
+set-based update in N8nIntegration. Meant to be run once a day from cron:
+
+    python advance_days.py [--all]
+
+By default only participants who answered their current day's questions
+are advanced; pass --all to advance everyone who has not completed.
+"""
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from n8n_integration import N8nIntegration, Webinar
+
+def advance_all_webinars(require_responses: bool = True):
+    """Advance participants of all webinars, one statement per webinar"""
+    n8n = N8nIntegration()
+    session = n8n.Session()
+    try:
+        webinar_ids = [row.id for row in session.query(Webinar.id).all()]
+    finally:
+        session.close()
+    
+    for webinar_id in webinar_ids:
+        n8n.advance_webinar_participants(webinar_id, require_responses=require_responses)
+
+if __name__ == "__main__":
+    advance_all_webinars(require_responses="--all" not in sys.argv[1:])
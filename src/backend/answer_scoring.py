@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Visual-test scoring and per-day answer statistics
+
+A visual-test answer is stored like any other response, with
+``question_id = VISUAL_TEST_QUESTION_ID`` (-1) and the chosen option in
+``response_text``: either the option text (compared case-insensitively) or
+its 1-based number as shown on the bot's buttons. The test of a day is the
+day's first ``visual_tests`` row, or else ``WebinarDay.visual_test_data``;
+its ``correct_answer`` is optional (reflective tests have none).
+
+``day_statistics`` pulls a day's responses as NumPy arrays with two
+queries and computes everything in vectorized form:
+
+- respondents and distinct participants per question;
+- each participant's latest visual-test answer matched to an option index
+  with one ``searchsorted`` over the sorted options;
+- option distribution (``bincount``) and number of correct answers.
+
+Rows are written to ``day_answer_stats`` (one per day, replaced on every
+run) for the evening summary.
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+
+from models import Participant, Response, VisualTest, WebinarDay
+
+VISUAL_TEST_QUESTION_ID = -1
+
+# Longer answers cannot match an option; clipping bounds the array width
+MAX_ANSWER_LENGTH = 200
+
+# Longer digit strings are not option numbers (and would overflow int64)
+MAX_OPTION_NUMBER_DIGITS = 3
+
+STATS_COLUMNS = [
+    "webinar_id", "participants", "respondents", "question_respondents", "visual_answers",
+    "visual_invalid", "visual_correct", "option_counts", "computed_at"
+]
+
+
+def visual_test_key(session, day: WebinarDay) -> Tuple[List[str], Optional[str]]:
+    """(options, correct answer) of the day's visual test; no options if it has none"""
+    test = session.query(VisualTest.options, VisualTest.correct_answer).filter(
+        VisualTest.day_id == day.id
+    ).order_by(VisualTest.id).first()
+    if test is not None:
+        options, correct_answer = test.options, test.correct_answer
+    else:
+        data = json.loads(day.visual_test_data) if day.visual_test_data else {}
+        options, correct_answer = data.get("options"), data.get("correct_answer")
+    if isinstance(options, str):
+        options = json.loads(options)
+    return [str(option) for option in options or []], correct_answer
+
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    return np.char.lower(np.char.strip(values))
+
+
+def match_options(answers: np.ndarray, options: List[str]) -> np.ndarray:
+    """
+    Option index of every answer, -1 where it matches no option
+
+    Args:
+        answers: Array of answer strings
+        options: Option texts of the test
+
+    Returns:
+        np.ndarray: int64 array of the same length as answers
+    """
+    if not options or answers.size == 0:
+        return np.full(answers.shape, -1, dtype=np.int64)
+    answers = _normalize(answers.astype(str))
+    keys = _normalize(np.array(options, dtype=str))
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    positions = np.minimum(np.searchsorted(sorted_keys, answers), len(options) - 1)
+    index = np.where(sorted_keys[positions] == answers, order[positions], -1)
+
+    numbered = (
+        np.char.isdecimal(answers)
+        & (np.char.str_len(answers) <= MAX_OPTION_NUMBER_DIGITS)
+        & (index < 0)
+    )
+    if numbered.any():
+        numbers = np.zeros(answers.shape, dtype=np.int64)
+        numbers[numbered] = answers[numbered].astype(np.int64)
+        in_range = numbered & (numbers >= 1) & (numbers <= len(options))
+        index = np.where(in_range, numbers - 1, index)
+    return index.astype(np.int64)
+
+
+def _columns(rows: List[Tuple], dtypes: Tuple) -> List[np.ndarray]:
+    """Result rows as one array per column (much faster than np.array over Row objects)"""
+    if not rows:
+        return [np.zeros(0, dtype=dtype) for dtype in dtypes]
+    return [np.array(column, dtype=dtype) for column, dtype in zip(zip(*rows), dtypes)]
+
+
+def _latest_per_participant(participant_ids: np.ndarray) -> np.ndarray:
+    """Mask of the last row of every participant in rows sorted by participant"""
+    if participant_ids.size == 0:
+        return np.zeros(0, dtype=bool)
+    return np.append(participant_ids[1:] != participant_ids[:-1], True)
+
+
+def _question_respondents(participant_ids: np.ndarray, question_ids: np.ndarray) -> Tuple[int, Dict[str, int]]:
+    """Distinct respondents overall and per question"""
+    respondents = np.unique(participant_ids).size
+    answered = question_ids >= 0
+    # Distinct (question, participant) pairs as columns; shard ids need all 64 bits
+    pairs = np.unique(np.stack([question_ids[answered], participant_ids[answered]]), axis=1)
+    questions, counts = np.unique(pairs[0], return_counts=True)
+    return respondents, {str(question): int(count) for question, count in zip(questions, counts)}
+
+
+def day_statistics(session, day: WebinarDay, now: datetime = None) -> Dict[str, Any]:
+    """
+    Answer statistics of one webinar day
+
+    Args:
+        session: Session to read responses with
+        day: The webinar day
+        now: Timestamp stored as computed_at
+
+    Returns:
+        Dict: A day_answer_stats row
+    """
+    participants = session.query(func.count(Participant.id)).filter(
+        Participant.webinar_id == day.webinar_id
+    ).scalar()
+
+    # Responses without a question id only count towards respondents
+    rows = session.execute(
+        select(Response.participant_id, func.coalesce(Response.question_id, -2)).where(
+            Response.day_id == day.id
+        )
+    ).all()
+    respondents, question_respondents = _question_respondents(*_columns(rows, (np.int64, np.int64)))
+
+    answers = session.execute(
+        select(
+            Response.participant_id,
+            func.coalesce(func.substr(Response.response_text, 1, MAX_ANSWER_LENGTH), "")
+        ).where(
+            Response.day_id == day.id,
+            Response.question_id == VISUAL_TEST_QUESTION_ID
+        ).order_by(Response.participant_id, Response.id)
+    ).all()
+    participant_ids, texts = _columns(answers, (np.int64, str))
+    texts = texts[_latest_per_participant(participant_ids)]
+
+    options, correct_answer = visual_test_key(session, day)
+    chosen = match_options(texts, options)
+    valid = chosen[chosen >= 0]
+    counts = np.bincount(valid, minlength=len(options)) if options else np.zeros(0, dtype=np.int64)
+
+    visual_correct = None
+    if correct_answer is not None and options:
+        correct_index = match_options(np.array([str(correct_answer)]), options)[0]
+        visual_correct = int(np.count_nonzero(valid == correct_index)) if correct_index >= 0 else 0
+
+    return {
+        "day_id": day.id,
+        "webinar_id": day.webinar_id,
+        "participants": participants,
+        "respondents": int(respondents),
+        "question_respondents": json.dumps(question_respondents),
+        "visual_answers": int(texts.size),
+        "visual_invalid": int(texts.size - valid.size),
+        "visual_correct": visual_correct,
+        "option_counts": json.dumps({option: int(count) for option, count in zip(options, counts)}, ensure_ascii=False),
+        "computed_at": now or datetime.utcnow()
+    }
+
+
+def stats_dict(row) -> Dict[str, Any]:
+    """API representation of a day_answer_stats row"""
+    correct_rate = None
+    if row.visual_correct is not None and row.visual_answers:
+        correct_rate = round(row.visual_correct / row.visual_answers, 4)
+    return {
+        "day_id": row.day_id,
+        "webinar_id": row.webinar_id,
+        "participants": row.participants,
+        "respondents": row.respondents,
+        "question_respondents": json.loads(row.question_respondents or "{}"),
+        "visual_answers": row.visual_answers,
+        "visual_invalid": row.visual_invalid,
+        "visual_correct": row.visual_correct,
+        "visual_correct_rate": correct_rate,
+        "option_counts": json.loads(row.option_counts or "{}"),
+        "computed_at": row.computed_at.isoformat() if row.computed_at else None
+    }
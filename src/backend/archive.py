@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Monthly partitions and cold archive for responses
+
+``responses`` is append-only and grows fastest of all tables. It is treated
+as a set of monthly partitions keyed by ``response_timestamp``:
+
+- the hot partitions (the current month and the RESPONSES_HOT_MONTHS - 1
+  before it) stay in the database;
+- closed months are written to gzip-compressed JSON Lines files in
+  RESPONSE_ARCHIVE_DIR, recorded in ``response_archives`` and deleted from
+  the hot table, so the hot table size stays bounded.
+
+``iter_responses`` reads both transparently: archived files and the hot
+table are merged into one stream ordered by (response_timestamp, id), which
+is what exports and analytics use. Readers that need archived rows in
+other shapes use ``iter_archived_by_id`` (webinar exports) and
+``archived_keys`` (import de-duplication). Full-text search and the
+day-advance check read the hot table only; ``archived_before`` tells where
+that coverage ends.
+
+Every database file (the shared file and each webinar shard, see
+webinar_shards.py) archives its own responses and keeps its own manifest;
+``merge_responses`` and ``merge_status`` combine the files.
+
+Environment variables:
+    RESPONSE_ARCHIVE_DIR: Directory for archive files (default ./data/archive/responses)
+    RESPONSES_HOT_MONTHS: Months kept in the database, including the current one (default 3)
+"""
+
+import gzip
+import heapq
+import itertools
+import json
+import os
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, or_
+
+from fast_json import dumps
+from models import Participant, Response, ResponseArchive
+
+ARCHIVE_DIR = os.getenv("RESPONSE_ARCHIVE_DIR", "./data/archive/responses")
+HOT_MONTHS = int(os.getenv("RESPONSES_HOT_MONTHS", "3"))
+
+RESPONSE_COLUMNS = ("id", "participant_id", "day_id", "question_id", "response_text", "response_timestamp")
+
+
+def month_key(moment: datetime) -> str:
+    """Partition key ("YYYY-MM") of a timestamp"""
+    return f"{moment.year:04d}-{moment.month:02d}"
+
+
+def month_start(key: str) -> datetime:
+    year, month = key.split("-")
+    return datetime(int(year), int(month), 1)
+
+
+def next_month(key: str) -> str:
+    start = month_start(key)
+    if start.month == 12:
+        return f"{start.year + 1:04d}-01"
+    return f"{start.year:04d}-{start.month + 1:02d}"
+
+
+def hot_cutoff(now: datetime = None, hot_months: int = None) -> datetime:
+    """
+    First moment that stays in the hot table
+
+    Args:
+        now: Reference time, defaults to utcnow
+        hot_months: Months kept hot including the current one
+
+    Returns:
+        datetime: Start of the oldest hot month
+    """
+    now = now or datetime.utcnow()
+    hot_months = max(HOT_MONTHS if hot_months is None else hot_months, 1)
+    month_index = now.year * 12 + now.month - 1 - (hot_months - 1)
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def closed_months(session, cutoff: datetime) -> List[str]:
+    """Months before the cutoff that still have rows in the hot table"""
+    oldest = session.query(func.min(Response.response_timestamp)).filter(
+        Response.response_timestamp < cutoff
+    ).scalar()
+    if oldest is None:
+        return []
+    months = []
+    key = month_key(oldest)
+    while month_start(key) < cutoff:
+        months.append(key)
+        key = next_month(key)
+    return months
+
+
+def _month_filter(key: str):
+    return (
+        Response.response_timestamp >= month_start(key),
+        Response.response_timestamp < month_start(next_month(key)),
+    )
+
+
+def _encode(row) -> bytes:
+    return dumps(dict(zip(RESPONSE_COLUMNS, row))) + b"\n"
+
+
+def archive_month(write_session, read_session, key: str, archive_dir: str = None,
+                  batch_size: int = 1000) -> Optional[Dict[str, Any]]:
+    """
+    Move one closed month of responses from the hot table to an archive file
+
+    Rows are streamed from the read session into a temporary file, which is
+    renamed into place once complete. The manifest row and the delete of
+    exactly the archived rows (same month, id up to the largest archived id)
+    then commit in one write transaction, so a crash at any point leaves
+    every response readable exactly once: an orphaned file without a
+    manifest row is ignored and overwritten by the next run.
+
+    Args:
+        write_session: Session on the write engine
+        read_session: Session used to stream the month's rows
+        key: Month to archive ("YYYY-MM")
+        archive_dir: Target directory, defaults to RESPONSE_ARCHIVE_DIR
+        batch_size: Rows fetched per round trip
+
+    Returns:
+        Optional[Dict]: Manifest data of the written file, or None if the
+            month has no rows left in the hot table
+    """
+    archive_dir = archive_dir or ARCHIVE_DIR
+    os.makedirs(archive_dir, exist_ok=True)
+
+    # SQLite hands out max(id) + 1 to new rows, so the newest row of the table
+    # always stays hot; otherwise ids of archived rows could be reused
+    newest_id = read_session.query(func.max(Response.id)).scalar()
+    max_id = read_session.query(func.max(Response.id)).filter(
+        *_month_filter(key), Response.id < newest_id
+    ).scalar() if newest_id is not None else None
+    if max_id is None:
+        return None
+
+    file_name = f"responses-{key}-{max_id}.jsonl.gz"
+    path = os.path.join(archive_dir, file_name)
+    temp_path = path + ".tmp"
+
+    query = read_session.query(
+        *[getattr(Response, column) for column in RESPONSE_COLUMNS]
+    ).filter(
+        *_month_filter(key), Response.id <= max_id
+    ).order_by(
+        Response.response_timestamp, Response.id
+    ).execution_options(stream_results=True).yield_per(batch_size)
+
+    row_count = 0
+    min_id = None
+    min_participant_id = max_participant_id = None
+    with open(temp_path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as archive_file:
+            for row in query:
+                archive_file.write(_encode(row))
+                row_count += 1
+                min_id = row.id if min_id is None else min(min_id, row.id)
+                if min_participant_id is None or row.participant_id < min_participant_id:
+                    min_participant_id = row.participant_id
+                if max_participant_id is None or row.participant_id > max_participant_id:
+                    max_participant_id = row.participant_id
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temp_path, path)
+
+    try:
+        write_session.add(ResponseArchive(
+            month=key,
+            path=file_name,
+            row_count=row_count,
+            min_response_id=min_id,
+            max_response_id=max_id,
+            min_participant_id=min_participant_id,
+            max_participant_id=max_participant_id
+        ))
+        deleted = write_session.query(Response).filter(
+            *_month_filter(key), Response.id <= max_id
+        ).delete(synchronize_session=False)
+        if deleted != row_count:
+            raise RuntimeError(f"Archived {row_count} responses for {key} but {deleted} matched for delete")
+        write_session.commit()
+    except Exception:
+        write_session.rollback()
+        os.remove(path)
+        raise
+
+    return {"month": key, "path": file_name, "row_count": row_count}
+
+
+def _read_archive_file(path: str) -> Iterator[Dict[str, Any]]:
+    with gzip.open(path, "rb") as archive_file:
+        for line in archive_file:
+            row = json.loads(line)
+            if row["response_timestamp"]:
+                row["response_timestamp"] = datetime.fromisoformat(row["response_timestamp"])
+            yield row
+
+
+def _sort_key(row: Dict[str, Any]) -> Tuple[datetime, int]:
+    return row["response_timestamp"] or datetime.min, row["id"]
+
+
+def _iter_archived(session, archive_dir: str, participant_ids, since: datetime,
+                   until: datetime) -> Iterator[Dict[str, Any]]:
+    manifest = session.query(ResponseArchive.month, ResponseArchive.path)
+    if participant_ids is not None:
+        if not participant_ids:
+            return
+        # Files whose participant range misses the wanted ids are not opened
+        manifest = manifest.filter(or_(
+            ResponseArchive.min_participant_id.is_(None),
+            and_(ResponseArchive.min_participant_id <= max(participant_ids),
+                 ResponseArchive.max_participant_id >= min(participant_ids))
+        ))
+    if since is not None:
+        manifest = manifest.filter(ResponseArchive.month >= month_key(since))
+    if until is not None:
+        manifest = manifest.filter(ResponseArchive.month <= month_key(until))
+    files = manifest.order_by(ResponseArchive.month, ResponseArchive.id).all()
+
+    # Files of different months never overlap, files of one month
+    # (written by separate runs) are merged
+    for _, month_files in itertools.groupby(files, key=lambda entry: entry.month):
+        readers = [_read_archive_file(os.path.join(archive_dir, entry.path)) for entry in month_files]
+        for row in heapq.merge(*readers, key=_sort_key):
+            if participant_ids is not None and row["participant_id"] not in participant_ids:
+                continue
+            timestamp = row["response_timestamp"]
+            if since is not None and (timestamp is None or timestamp < since):
+                continue
+            if until is not None and (timestamp is None or timestamp >= until):
+                continue
+            yield row
+
+
+def _iter_hot(session, participant_ids, webinar_id: int, since: datetime, until: datetime,
+              batch_size: int) -> Iterator[Dict[str, Any]]:
+    query = session.query(*[getattr(Response, column) for column in RESPONSE_COLUMNS])
+    if webinar_id is not None:
+        query = query.join(Participant, Participant.id == Response.participant_id).filter(
+            Participant.webinar_id == webinar_id
+        )
+    if participant_ids is not None:
+        query = query.filter(Response.participant_id.in_(participant_ids))
+    if since is not None:
+        query = query.filter(Response.response_timestamp >= since)
+    if until is not None:
+        query = query.filter(Response.response_timestamp < until)
+    query = query.order_by(
+        Response.response_timestamp, Response.id
+    ).execution_options(stream_results=True).yield_per(batch_size)
+    for row in query:
+        yield dict(zip(RESPONSE_COLUMNS, row))
+
+
+def iter_responses(session, participant_id: int = None, webinar_id: int = None,
+                   since: datetime = None, until: datetime = None, archive_dir: str = None,
+                   batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Yield responses from archived and hot partitions as one stream
+
+    Rows come out ordered by (response_timestamp, id) as plain dicts with
+    the Response columns. Archive files outside [since, until), and with
+    a participant filter files whose participant id range (recorded in the
+    manifest) does not cover the wanted participants, are skipped without
+    being opened. Participant ids grow with enrollment, so a participant's
+    stream only opens files of months since they enrolled.
+
+    Args:
+        session: Session to read the hot table and archive manifest with
+        participant_id: Only this participant's responses
+        webinar_id: Only responses of this webinar's participants
+        since: Inclusive lower bound on response_timestamp
+        until: Exclusive upper bound on response_timestamp
+        archive_dir: Archive directory, defaults to RESPONSE_ARCHIVE_DIR
+        batch_size: Hot rows fetched per round trip
+
+    Yields:
+        Dict: One response
+    """
+    archive_dir = archive_dir or ARCHIVE_DIR
+
+    participant_ids = None
+    if participant_id is not None:
+        participant_ids = {participant_id}
+    elif webinar_id is not None:
+        participant_ids = {
+            row.id for row in session.query(Participant.id).filter(Participant.webinar_id == webinar_id)
+        }
+
+    archived = _iter_archived(session, archive_dir, participant_ids, since, until)
+    hot = _iter_hot(
+        session,
+        [participant_id] if participant_id is not None else None,
+        webinar_id if participant_id is None else None,
+        since, until, batch_size
+    )
+    # Rows written with an old timestamp after their month was archived stay
+    # hot, so the two streams are merged rather than concatenated
+    return heapq.merge(archived, hot, key=_sort_key)
+
+
+def merge_responses(streams: Iterable[Iterator[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """Merge iter_responses streams of several database files (webinar shards) by (response_timestamp, id)"""
+    return heapq.merge(*streams, key=_sort_key)
+
+
+def iter_archived_by_id(session, participant_ids: Set[int], after_id: int = 0,
+                        archive_dir: str = None) -> Iterator[Dict[str, Any]]:
+    """
+    Archived responses of some participants in id order
+
+    Files whose ids all lie at or below after_id are skipped via the
+    manifest; the matching rows of the others are held in memory and merged.
+
+    Args:
+        session: Session to read the archive manifest with
+        participant_ids: Only these participants' responses
+        after_id: Only responses with a greater id
+        archive_dir: Archive directory, defaults to RESPONSE_ARCHIVE_DIR
+
+    Yields:
+        Dict: One response
+    """
+    archive_dir = archive_dir or ARCHIVE_DIR
+    files = session.query(ResponseArchive.path).filter(
+        ResponseArchive.max_response_id > after_id
+    ).order_by(ResponseArchive.min_response_id).all()
+    sorted_files = []
+    for entry in files:
+        rows = [
+            row for row in _read_archive_file(os.path.join(archive_dir, entry.path))
+            if row["id"] > after_id and row["participant_id"] in participant_ids
+        ]
+        rows.sort(key=itemgetter("id"))
+        sorted_files.append(rows)
+    return heapq.merge(*sorted_files, key=itemgetter("id"))
+
+
+def archived_keys(session, day_ids: Iterable[int], archive_dir: str = None) -> Set[Tuple[int, int, Optional[int]]]:
+    """(participant_id, day_id, question_id) of archived responses to some days"""
+    day_ids = set(day_ids)
+    if not day_ids:
+        return set()
+    return {
+        (row["participant_id"], row["day_id"], row["question_id"])
+        for row in _iter_archived(session, archive_dir or ARCHIVE_DIR, None, None, None)
+        if row["day_id"] in day_ids
+    }
+
+
+def has_archive(session) -> bool:
+    """Whether any month has been archived"""
+    return session.query(ResponseArchive.id).first() is not None
+
+
+def archived_before(session) -> Optional[datetime]:
+    """
+    End of the newest archived month
+
+    Readers of the hot table alone may miss responses timestamped before
+    this; None when nothing has been archived.
+    """
+    newest = session.query(func.max(ResponseArchive.month)).scalar()
+    return month_start(next_month(newest)) if newest else None
+
+
+def archive_status(session) -> Dict[str, Any]:
+    """Hot table size and archived partitions"""
+    hot_count, oldest_hot = session.query(
+        func.count(Response.id), func.min(Response.response_timestamp)
+    ).one()
+    archived = session.query(
+        ResponseArchive.month,
+        func.count(ResponseArchive.id),
+        func.sum(ResponseArchive.row_count)
+    ).group_by(ResponseArchive.month).order_by(ResponseArchive.month).all()
+    return {
+        "hot_rows": hot_count,
+        "oldest_hot_response": oldest_hot.isoformat() if oldest_hot else None,
+        "archived_months": [
+            {"month": month, "files": files, "rows": rows or 0} for month, files, rows in archived
+        ]
+    }
+
+
+def merge_status(statuses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One archive_status over several database files (webinar shards)"""
+    oldest = [status["oldest_hot_response"] for status in statuses if status["oldest_hot_response"]]
+    months: Dict[str, Dict[str, Any]] = {}
+    for status in statuses:
+        for entry in status["archived_months"]:
+            merged = months.setdefault(entry["month"], {"month": entry["month"], "files": 0, "rows": 0})
+            merged["files"] += entry["files"]
+            merged["rows"] += entry["rows"]
+    return {
+        "hot_rows": sum(status["hot_rows"] for status in statuses),
+        "oldest_hot_response": min(oldest) if oldest else None,
+        "archived_months": [months[month] for month in sorted(months)]
+    }
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Monthly response archive job for NewDay Platform
+
+Moves responses of closed months from the hot table to compressed archive
+files (see archive.py). Meant to be run from cron, e.g. on the first day of
+every month:
+
+    python archive_responses.py [--hot-months N]
+
+Archived responses are still returned by /api/n8n/responses/export.
+"""
+
+import argparse
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from n8n_integration import N8nIntegration
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive responses of closed months")
+    parser.add_argument("--hot-months", type=int, default=None,
+                        help="Months to keep in the database, including the current one")
+    args = parser.parse_args()
+    
+    result = N8nIntegration().archive_closed_responses(hot_months=args.hot_months)
+    if result is None:
+        sys.exit(1)
+    print(f"Archived {len(result['archived'])} file(s), cutoff {result['cutoff']}")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full-text response search vs a LIKE scan
+
+Loads N synthetic responses into a temporary SQLite database (or the
+database in POSTGRES_URL, whose tables are dropped and recreated) and times
+a ranked first page for rare and common words, next to the LIKE scan the
+same question needed before.
+
+Usage:
+    python benchmarks/bench_search.py [--responses 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from bulk import copy_rows
+from database import get_engines
+from models import Base, Webinar, WebinarDay, Participant, Response
+from search import install_search, search_responses
+
+WORDS = ("today felt calm tired breathing helped walk morning evening sleep better worse "
+         "stretch neck back pain focus energy water meal kind quiet noisy work family").split()
+RARE = ("anxiety", "тревога")
+
+
+def load(engine, responses):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    install_search(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        session.add(Webinar(id=1, title="Benchmark", duration_days=10))
+        session.flush()
+        session.add(WebinarDay(id=1, webinar_id=1, day_number=1, title="Day 1"))
+        session.flush()
+        session.add_all(Participant(id=i, user_id=i, webinar_id=1) for i in range(1, 1001))
+        session.commit()
+        rng = random.Random(42)
+        now = datetime.utcnow()
+
+        def rows():
+            for i in range(responses):
+                words = rng.sample(WORDS, 8)
+                if i % 1000 == 0:
+                    words.append(RARE[i // 1000 % 2])
+                yield {"participant_id": i % 1000 + 1, "day_id": 1, "question_id": i % 5,
+                       "response_text": " ".join(words), "response_timestamp": now}
+
+        copy_rows(session.connection(), Response, rows())
+        session.commit()
+    finally:
+        session.close()
+
+
+def timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--responses", type=int, default=200000)
+    args = parser.parse_args()
+
+    url = os.getenv("POSTGRES_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench_search.db"
+    engine, _ = get_engines(url)
+    start = time.perf_counter()
+    load(engine, args.responses)
+    print(f"{url.split(':')[0]}: loaded {args.responses} responses in {time.perf_counter() - start:.1f}s")
+
+    session = sessionmaker(bind=engine)()
+    try:
+        for word in ("anxiety", "breathing", "нет_такого"):
+            seconds, page = timed(lambda: search_responses(session, word, limit=20))
+            like_seconds, _ = timed(lambda: session.execute(text(
+                "SELECT id FROM responses WHERE response_text LIKE :pattern ORDER BY id LIMIT 21"
+            ), {"pattern": f"%{word}%"}).fetchall(), repeat=1)
+            print(f"  {word:>12}: search {seconds * 1000:7.1f} ms ({len(page['results'])} results)"
+                  f"   LIKE {like_seconds * 1000:7.1f} ms")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
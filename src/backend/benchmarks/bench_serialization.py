@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: default vs fast JSON serialization for course list endpoints
+
+Builds a throwaway SQLite database with one course and a long schedule,
+then times GET /api/courses/{id}/schedule and GET /api/courses/blocks
+through the regular response_model path and the `fast=true` path.
+
+Usage:
+    python benchmarks/bench_serialization.py [--days 90] [--blocks 10] [--runs 50]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+
+def setup_database(path, days, blocks_per_day):
+    """Create and fill a temporary database, returning the course id"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from models import Base, ContentBlock, Course, CourseSchedule
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        blocks = [
+            ContentBlock(
+                name=f"Block {i}",
+                category="breathing",
+                description="Benchmark block",
+                content_type="exercise",
+                content_data=json.dumps({"steps": [f"step {n}" for n in range(5)], "duration": 300}),
+            )
+            for i in range(blocks_per_day)
+        ]
+        course = Course(title="Benchmark course", description="", duration_days=days)
+        session.add_all(blocks + [course])
+        session.flush()
+        session.add_all(
+            CourseSchedule(course_id=course.id, day_number=day, content_block_id=block.id)
+            for day in range(1, days + 1)
+            for block in blocks
+        )
+        session.commit()
+        return course.id
+    finally:
+        session.close()
+
+
+def timed(client, url, runs):
+    """Return (mean ms, body size) for repeated GETs of url"""
+    client.get(url)  # warm-up
+    start = time.perf_counter()
+    for _ in range(runs):
+        response = client.get(url)
+        assert response.status_code == 200, response.text
+    elapsed = (time.perf_counter() - start) / runs * 1000
+    return elapsed, len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--blocks", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        course_id = setup_database(os.path.join(tmp, "bench.db"), args.days, args.blocks)
+
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from course_endpoints import router
+
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+
+        print(f"{args.days * args.blocks} schedule rows, {args.blocks} content blocks, {args.runs} runs each\n")
+        print(f"{'endpoint':<32}{'default ms':>12}{'fast ms':>12}{'speedup':>10}")
+        for label, url in (
+            ("/{id}/schedule", f"/api/courses/{course_id}/schedule"),
+            ("/blocks", "/api/courses/blocks"),
+        ):
+            default_ms, _ = timed(client, url, args.runs)
+            fast_ms, _ = timed(client, url + "?fast=true", args.runs)
+            print(f"{label:<32}{default_ms:>12.2f}{fast_ms:>12.2f}{default_ms / fast_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SQLite concurrency with stock settings vs the performance profile
+
+Runs writer threads (webhook-style: insert a response and touch the
+participant in one transaction) alongside reader threads (reminder-style
+aggregate reads) against a throwaway database file, once with stock SQLite
+settings and once with the WAL/pragma/pool profile from database.py, and
+reports throughput and "database is locked" failures.
+
+Usage:
+    python benchmarks/bench_sqlite_concurrency.py [--writers 4] [--readers 8] [--seconds 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker
+
+from database import create_engines, DEFAULT_PROFILE, PERFORMANCE_PROFILE
+from models import Base, Webinar, WebinarDay, Participant, Response
+
+PARTICIPANTS = 2000
+
+
+def seed(engine):
+    """Create tables and a webinar with participants"""
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        webinar = Webinar(title="Benchmark", duration_days=10)
+        session.add(webinar)
+        session.flush()
+        session.add(WebinarDay(webinar_id=webinar.id, day_number=1, title="Day 1"))
+        session.bulk_save_objects(
+            [Participant(user_id=i, webinar_id=webinar.id) for i in range(PARTICIPANTS)]
+        )
+        session.commit()
+    finally:
+        session.close()
+
+
+def run_profile(profile, writers, readers, seconds):
+    """Run the mixed workload for one profile and return counters"""
+    with tempfile.TemporaryDirectory() as tmp:
+        write_engine, read_engine = create_engines(f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile=profile)
+        seed(write_engine)
+        WriteSession = sessionmaker(bind=write_engine)
+        ReadSession = sessionmaker(bind=read_engine)
+
+        counters = {"writes": 0, "reads": 0, "locked": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def count(key):
+            with lock:
+                counters[key] += 1
+
+        def writer(worker):
+            n = 0
+            while time.perf_counter() < deadline:
+                n += 1
+                participant_id = (worker * 7919 + n) % PARTICIPANTS + 1
+                session = WriteSession()
+                try:
+                    session.add(Response(participant_id=participant_id, day_id=1, question_id=0,
+                                         response_text="benchmark answer"))
+                    session.query(Participant).filter_by(id=participant_id).update(
+                        {Participant.updated_at: datetime.utcnow()}, synchronize_session=False
+                    )
+                    session.commit()
+                    count("writes")
+                except (OperationalError, PoolTimeoutError):
+                    session.rollback()
+                    count("locked")
+                finally:
+                    session.close()
+
+        def reader():
+            while time.perf_counter() < deadline:
+                session = ReadSession()
+                try:
+                    session.query(
+                        Response.participant_id, func.max(Response.response_timestamp)
+                    ).group_by(Response.participant_id).limit(200).all()
+                    session.query(func.count(Participant.id)).scalar()
+                    count("reads")
+                except (OperationalError, PoolTimeoutError):
+                    count("locked")
+                finally:
+                    session.close()
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        write_engine.dispose()
+        read_engine.dispose()
+        return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds}s per profile\n")
+    print(f"{'profile':<14}{'writes/s':>10}{'reads/s':>10}{'total/s':>10}{'locked':>8}")
+    for profile in (DEFAULT_PROFILE, PERFORMANCE_PROFILE):
+        counters = run_profile(profile, args.writers, args.readers, args.seconds)
+        print(f"{profile:<14}{counters['writes'] / args.seconds:>10.0f}"
+              f"{counters['reads'] / args.seconds:>10.0f}"
+              f"{(counters['writes'] + counters['reads']) / args.seconds:>10.0f}{counters['locked']:>8}")
+
+
+if __name__ == "__main__":
+    main()
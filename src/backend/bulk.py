@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Bulk write helpers for NewDay Platform
+
+``copy_rows`` loads many rows at once: on PostgreSQL it streams them through
+``COPY ... FROM STDIN``, elsewhere it falls back to chunked multi-row
+``executemany`` inserts. ``upsert`` issues ``INSERT ... ON CONFLICT`` on
+PostgreSQL and SQLite and falls back to select-then-insert/update on other
+backends.
+
+Both take a SQLAlchemy Connection (``session.connection()`` works) so they
+run inside the caller's transaction.
+"""
+
+import io
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Sequence
+
+from sqlalchemy import and_, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def chunked(rows: Iterable[Any], size: int) -> Iterable[List[Any]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _csv_field(value: Any) -> str:
+    """One COPY CSV field: NULL is an unquoted empty field, every value is quoted"""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    elif isinstance(value, bool):
+        value = "t" if value else "f"
+    # Quoting keeps empty strings (and text such as "\N") from reading as NULL
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_postgres(connection, table, columns: Sequence[str], rows: Iterable[Dict[str, Any]], chunk_size: int) -> int:
+    """Stream rows through COPY FROM STDIN in CSV chunks"""
+    raw = connection.connection  # DBAPI (psycopg2) connection of this transaction
+    column_list = ", ".join(columns)
+    statement = f"COPY {table.name} ({column_list}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+    with raw.cursor() as cursor:
+        for chunk in chunked(rows, chunk_size):
+            buffer = io.StringIO()
+            for row in chunk:
+                buffer.write(",".join(_csv_field(row.get(column)) for column in columns))
+                buffer.write("\n")
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            total += len(chunk)
+    return total
+
+
+def copy_rows(connection, table, rows: Iterable[Dict[str, Any]], columns: Sequence[str] = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Insert many rows as fast as the backend allows
+
+    Column defaults defined in Python (e.g. ``created_at``) are not applied
+    by COPY, so callers must include every column they need.
+
+    Args:
+        connection: SQLAlchemy Connection inside the caller's transaction
+        table: Table (or mapped class) to load into
+        rows: Iterable of dicts keyed by column name
+        columns: Columns to load, defaults to the keys of the first row
+        chunk_size: Rows per COPY/executemany batch
+
+    Returns:
+        int: Number of rows written
+    """
+    table = getattr(table, "__table__", table)
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    columns = list(columns or first.keys())
+
+    def all_rows():
+        yield first
+        yield from rows
+
+    if connection.dialect.name == "postgresql":
+        return _copy_postgres(connection, table, columns, all_rows(), chunk_size)
+
+    total = 0
+    insert = table.insert()
+    for chunk in chunked(all_rows(), chunk_size):
+        connection.execute(insert, [{column: row.get(column) for column in columns} for row in chunk])
+        total += len(chunk)
+    return total
+
+
+def _upsert_by_lookup(connection, table, rows: List[Dict[str, Any]], index_elements: Sequence[str],
+                      update_columns: Sequence[str]):
+    """Row-by-row upsert for backends without ON CONFLICT (not safe against concurrent writers)"""
+    for row in rows:
+        key = and_(*[table.c[column] == row[column] for column in index_elements])
+        if update_columns:
+            result = connection.execute(
+                table.update().where(key).values({column: row[column] for column in update_columns})
+            )
+            if result.rowcount:
+                continue
+        elif connection.execute(select(literal(1)).select_from(table).where(key)).first():
+            continue
+        connection.execute(table.insert(), row)
+
+
+def upsert(connection, table, rows: List[Dict[str, Any]], index_elements: Sequence[str],
+           update_columns: Sequence[str] = None):
+    """
+    INSERT ... ON CONFLICT for PostgreSQL and SQLite
+
+    Other backends get a select-then-insert/update per row, which has the
+    same result for a single writer.
+
+    Args:
+        connection: SQLAlchemy Connection inside the caller's transaction
+        table: Table (or mapped class) to write
+        rows: Rows to insert
+        index_elements: Columns of the unique constraint to conflict on
+        update_columns: Columns to overwrite from the new row on conflict;
+            when empty, conflicting rows are skipped (DO NOTHING)
+    """
+    table = getattr(table, "__table__", table)
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(table)
+    elif dialect == "sqlite":
+        statement = sqlite.insert(table)
+    else:
+        _upsert_by_lookup(connection, table, rows, index_elements, update_columns)
+        return
+
+    if update_columns:
+        statement = statement.on_conflict_do_update(
+            index_elements=list(index_elements),
+            set_={column: statement.excluded[column] for column in update_columns}
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=list(index_elements))
+    connection.execute(statement, rows)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+In-memory snapshot of webinar day content
+
+Webinar days change a few times per cohort but are read on every
+participant request, and their ``content``, ``questions`` and
+``visual_test_data`` columns hold JSON text that has to be parsed. The
+snapshot keeps every day (with its visual tests) parsed in memory, keyed by
+(webinar_id, day_number).
+
+Freshness: at most once per CONTENT_SNAPSHOT_TTL_SECONDS (default 5) a
+request compares the (count, newest updated_at, highest id) watermarks of
+``webinar_days`` and ``visual_tests`` with the ones the snapshot was built
+from and reloads on a change. Writers in this process call ``invalidate``
+so their own changes are visible immediately.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func
+
+from models import WebinarDay, VisualTest
+
+TTL_SECONDS = float(os.getenv("CONTENT_SNAPSHOT_TTL_SECONDS", "5"))
+
+
+def _parse(value: Optional[str]) -> Any:
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _watermark(session, model) -> Tuple[Any, ...]:
+    return tuple(session.query(func.count(model.id), func.max(model.updated_at), func.max(model.id)).one())
+
+
+class ContentSnapshot:
+    """Parsed webinar days keyed by (webinar_id, day_number)"""
+
+    def __init__(self, ttl_seconds: float = TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._days: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Force a watermark check on the next read"""
+        self._checked_at = 0.0
+
+    def _load(self, session) -> Dict[Tuple[int, int], Dict[str, Any]]:
+        tests_by_day: Dict[int, list] = {}
+        for test in session.query(
+            VisualTest.id, VisualTest.day_id, VisualTest.image_url, VisualTest.options
+        ).order_by(VisualTest.id):
+            # correct_answer is the answer key and stays server-side
+            tests_by_day.setdefault(test.day_id, []).append({
+                "id": test.id,
+                "image_url": test.image_url,
+                "options": _parse(test.options)
+            })
+        days = {}
+        for day in session.query(
+            WebinarDay.id, WebinarDay.webinar_id, WebinarDay.day_number, WebinarDay.title,
+            WebinarDay.content, WebinarDay.questions, WebinarDay.visual_test_data
+        ):
+            days[(day.webinar_id, day.day_number)] = {
+                "id": day.id,
+                "day_number": day.day_number,
+                "title": day.title,
+                "content": _parse(day.content),
+                "questions": _parse(day.questions),
+                "visual_test_data": _parse(day.visual_test_data),
+                "visual_tests": tests_by_day.get(day.id, [])
+            }
+        return days
+
+    def _refresh(self, session):
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.ttl_seconds:
+                return
+            version = (_watermark(session, WebinarDay), _watermark(session, VisualTest))
+            if version != self._version:
+                self._days = self._load(session)
+                self._version = version
+            self._checked_at = time.monotonic()
+
+    def get_day(self, session, webinar_id: int, day_number: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a parsed webinar day
+
+        Args:
+            session: Session used if the snapshot has to be checked or reloaded
+            webinar_id: Webinar ID
+            day_number: Day number within the webinar
+
+        Returns:
+            Optional[Dict]: Shared day dict (do not modify), or None if missing
+        """
+        if time.monotonic() - self._checked_at >= self.ttl_seconds:
+            self._refresh(session)
+        return self._days.get((webinar_id, day_number))
+
+
+# Process-wide snapshot shared by all endpoints
+content_snapshot = ContentSnapshot()
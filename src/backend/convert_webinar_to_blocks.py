@@ -6,8 +6,8 @@ Script to convert existing webinar content to content blocks
 import os
 import sys
 import json
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from database import get_engines
 from models import ContentBlock, Base
 
 # Add the current directory to Python path
@@ -18,7 +18,7 @@ def convert_webinar_to_blocks():
     
     # Database setup
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/newday_platform.db")
-    engine = create_engine(DATABASE_URL)
+    engine, _ = get_engines(DATABASE_URL)
     Base.metadata.create_all(engine)
     Session = sessionmaker(bind=engine)
     session = Session()
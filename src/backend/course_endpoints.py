@@ -1,22 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from pydantic import BaseModel, validator
 from typing import List, Optional, Dict, Any
 import json
-from datetime import datetime
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from datetime import datetime, timedelta, timezone
 import os
+from sqlalchemy import Integer, Interval, and_, case, func, insert, literal, or_, select
 
+# Database sessions: writes go to the single writer, GETs to the read pool
+from database import get_db, get_read_db
 # Import models
 from models import ContentBlock, Course, CourseBlock, CourseSchedule
+from fast_json import FastJSONResponse, dumps, rows_to_dicts, decode_json_text
+from http_caching import make_etag, table_watermark, etag_matches, not_modified, with_etag, RenderCache
 
 router = APIRouter(prefix="/api/courses", tags=["courses"])
 
-# Database setup
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/newday_platform.db")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
 # Pydantic models for request/response
 class ContentBlockCreate(BaseModel):
     name: str
@@ -31,6 +29,12 @@ class ContentBlockResponse(ContentBlockCreate):
     created_at: datetime
     updated_at: datetime
 
+    class Config:
+        orm_mode = True
+
+    # content_data is written with json.dumps, so it is read back as a string
+    _decode_content_data = validator("content_data", pre=True, allow_reuse=True)(decode_json_text)
+
 class CourseCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -42,6 +46,9 @@ class CourseResponse(CourseCreate):
     created_at: datetime
     updated_at: datetime
 
+    class Config:
+        orm_mode = True
+
 class CourseBlockCreate(BaseModel):
     course_id: int
     content_block_id: int
@@ -55,6 +62,9 @@ class CourseBlockResponse(CourseBlockCreate):
     created_at: datetime
     updated_at: datetime
 
+    class Config:
+        orm_mode = True
+
 class CourseScheduleCreate(BaseModel):
     course_id: int
     day_number: int
@@ -67,16 +77,40 @@ class CourseScheduleResponse(CourseScheduleCreate):
     created_at: datetime
     updated_at: datetime
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    class Config:
+        orm_mode = True
+
+class CourseCloneRequest(BaseModel):
+    title: Optional[str] = None  # Defaults to "<original title> (copy)"
+    include_schedule: Optional[bool] = True
+    shift_days: Optional[int] = 0  # Move every scheduled_at by this many days
+    start_date: Optional[datetime] = None  # Or: move the earliest scheduled_at to this time
+
+    @validator("start_date")
+    def _naive_utc(cls, value):
+        # scheduled_at is stored as naive UTC; an offset would make the shift a TypeError
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+# Column order used by the fast (opt-in) list responses
+CONTENT_BLOCK_COLUMNS = ("name", "category", "description", "content_type", "content_data",
+                         "is_active", "id", "created_at", "updated_at")
+COURSE_COLUMNS = ("title", "description", "duration_days", "is_active", "id", "created_at", "updated_at")
+COURSE_SCHEDULE_COLUMNS = ("course_id", "day_number", "content_block_id", "scheduled_at", "is_sent",
+                           "id", "created_at", "updated_at")
+
+# Time slots of a course day in display order; other values follow alphabetically
+TIME_OF_DAY_ORDER = ("morning", "afternoon", "day", "evening", "night")
+
+# Rendered course days, reused until the course, its schedule or its blocks change
+course_day_cache = RenderCache(max_entries=int(os.getenv("COURSE_DAY_CACHE_SIZE", "512")))
+
+def _columns(model, names):
+    return [getattr(model, name) for name in names]
 
 @router.post("/blocks", response_model=ContentBlockResponse, summary="Create a new content block")
-async def create_content_block(block: ContentBlockCreate, db = Depends(get_db)):
+def create_content_block(block: ContentBlockCreate, db = Depends(get_db)):
     """
     Create a new content block (exercise, question, meditation, etc.)
     """
@@ -97,19 +131,80 @@ async def create_content_block(block: ContentBlockCreate, db = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating content block: {str(e)}")
 
+def _block_filters(category: Optional[str], content_type: Optional[str], is_active: Optional[bool]):
+    filters = []
+    if category is not None:
+        filters.append(ContentBlock.category == category)
+    if content_type is not None:
+        filters.append(ContentBlock.content_type == content_type)
+    if is_active is not None:
+        filters.append(ContentBlock.is_active == is_active)
+    return filters
+
 @router.get("/blocks", response_model=List[ContentBlockResponse], summary="Get all content blocks")
-async def get_content_blocks(skip: int = 0, limit: int = 100, db = Depends(get_db)):
+def get_content_blocks(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                             category: Optional[str] = None, content_type: Optional[str] = None,
+                             is_active: Optional[bool] = None, fast: bool = False, db = Depends(get_read_db)):
     """
-    Get all content blocks
+    Get content blocks, optionally filtered by category, content type and active flag
+
+    Pass `fast=true` to skip response model validation and encode plain rows with orjson.
     """
     try:
-        blocks = db.query(ContentBlock).offset(skip).limit(limit).all()
+        filters = _block_filters(category, content_type, is_active)
+        etag = make_etag("blocks", skip, limit, category, content_type, is_active, fast,
+                         table_watermark(db, ContentBlock, *filters))
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        
+        if fast:
+            rows = db.query(*_columns(ContentBlock, CONTENT_BLOCK_COLUMNS)).filter(
+                *filters
+            ).order_by(ContentBlock.id).offset(skip).limit(limit).all()
+            blocks = rows_to_dicts(CONTENT_BLOCK_COLUMNS, rows)
+            for block in blocks:
+                block["content_data"] = decode_json_text(block["content_data"])
+            return with_etag(FastJSONResponse(blocks), etag)
+        blocks = db.query(ContentBlock).filter(*filters).order_by(ContentBlock.id).offset(skip).limit(limit).all()
         return blocks
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving content blocks: {str(e)}")
 
+def _facet_counts(db, column, filters):
+    rows = db.query(column, func.count()).filter(*filters).group_by(column).order_by(column).all()
+    return [{"value": value, "count": count} for value, count in rows]
+
+@router.get("/blocks/facets", summary="Get content block counts per category and content type")
+def get_content_block_facets(request: Request, response: Response, category: Optional[str] = None,
+                             content_type: Optional[str] = None, include_inactive: bool = False,
+                             db = Depends(get_read_db)):
+    """
+    Get filter options for the block catalog with the number of blocks for each
+
+    Counts cover active blocks unless `include_inactive=true`. Each facet is narrowed
+    by the other facet's selection, so `content_type=exercise` returns the categories
+    that contain exercises.
+    """
+    try:
+        is_active = None if include_inactive else True
+        etag = make_etag("block-facets", category, content_type, is_active, table_watermark(db, ContentBlock))
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        
+        return {
+            "total": db.query(func.count(ContentBlock.id)).filter(
+                *_block_filters(category, content_type, is_active)
+            ).scalar(),
+            "category": _facet_counts(db, ContentBlock.category, _block_filters(None, content_type, is_active)),
+            "content_type": _facet_counts(db, ContentBlock.content_type, _block_filters(category, None, is_active))
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving content block facets: {str(e)}")
+
 @router.get("/blocks/{block_id}", response_model=ContentBlockResponse, summary="Get a specific content block")
-async def get_content_block(block_id: int, db = Depends(get_db)):
+def get_content_block(block_id: int, db = Depends(get_read_db)):
     """
     Get a specific content block by ID
     """
@@ -124,7 +219,7 @@ async def get_content_block(block_id: int, db = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error retrieving content block: {str(e)}")
 
 @router.put("/blocks/{block_id}", response_model=ContentBlockResponse, summary="Update a content block")
-async def update_content_block(block_id: int, block: ContentBlockCreate, db = Depends(get_db)):
+def update_content_block(block_id: int, block: ContentBlockCreate, db = Depends(get_db)):
     """
     Update a content block
     """
@@ -151,7 +246,7 @@ async def update_content_block(block_id: int, block: ContentBlockCreate, db = De
         raise HTTPException(status_code=500, detail=f"Error updating content block: {str(e)}")
 
 @router.post("/", response_model=CourseResponse, summary="Create a new course")
-async def create_course(course: CourseCreate, db = Depends(get_db)):
+def create_course(course: CourseCreate, db = Depends(get_db)):
     """
     Create a new course
     """
@@ -171,25 +266,36 @@ async def create_course(course: CourseCreate, db = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error creating course: {str(e)}")
 
 @router.get("/", response_model=List[CourseResponse], summary="Get all courses")
-async def get_courses(skip: int = 0, limit: int = 100, db = Depends(get_db)):
+def get_courses(skip: int = 0, limit: int = 100, fast: bool = False, db = Depends(get_read_db)):
     """
     Get all courses
+
+    Pass `fast=true` to skip response model validation and encode plain rows with orjson.
     """
     try:
+        if fast:
+            rows = db.query(*_columns(Course, COURSE_COLUMNS)).offset(skip).limit(limit).all()
+            return FastJSONResponse(rows_to_dicts(COURSE_COLUMNS, rows))
         courses = db.query(Course).offset(skip).limit(limit).all()
         return courses
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving courses: {str(e)}")
 
 @router.get("/{course_id}", response_model=CourseResponse, summary="Get a specific course")
-async def get_course(course_id: int, db = Depends(get_db)):
+def get_course(course_id: int, request: Request, response: Response, db = Depends(get_read_db)):
     """
     Get a specific course by ID
     """
     try:
-        course = db.query(Course).filter(Course.id == course_id).first()
-        if not course:
+        watermark = db.query(Course.updated_at).filter(Course.id == course_id).first()
+        if not watermark:
             raise HTTPException(status_code=404, detail="Course not found")
+        etag = make_etag("course", course_id, watermark[0])
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        
+        course = db.query(Course).filter(Course.id == course_id).first()
         return course
     except HTTPException:
         raise
@@ -197,7 +303,7 @@ async def get_course(course_id: int, db = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error retrieving course: {str(e)}")
 
 @router.post("/course-blocks", response_model=CourseBlockResponse, summary="Assign a content block to a course")
-async def assign_block_to_course(course_block: CourseBlockCreate, db = Depends(get_db)):
+def assign_block_to_course(course_block: CourseBlockCreate, db = Depends(get_db)):
     """
     Assign a content block to a course with scheduling parameters
     """
@@ -231,7 +337,7 @@ async def assign_block_to_course(course_block: CourseBlockCreate, db = Depends(g
         raise HTTPException(status_code=500, detail=f"Error assigning block to course: {str(e)}")
 
 @router.post("/build-course/{course_id}", summary="Automatically build course schedule")
-async def build_course_schedule(course_id: int, db = Depends(get_db)):
+def build_course_schedule(course_id: int, db = Depends(get_db)):
     """
     Automatically build course schedule based on assigned blocks and their frequencies
     """
@@ -266,7 +372,8 @@ async def build_course_schedule(course_id: int, db = Depends(get_db)):
                     schedule = CourseSchedule(
                         course_id=course_id,
                         day_number=day,
-                        content_block_id=course_block.content_block_id
+                        content_block_id=course_block.content_block_id,
+                        course_block_id=course_block.id
                     )
                     db.add(schedule)
         
@@ -278,20 +385,235 @@ async def build_course_schedule(course_id: int, db = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error building course schedule: {str(e)}")
 
+def _shifted(column, shift: timedelta, dialect_name: str):
+    """SQL expression moving a timestamp column by a fixed interval"""
+    if dialect_name == "sqlite":
+        # SQLite stores "YYYY-MM-DD HH:MM:SS.ffffff"; datetime() drops the fraction, so the
+        # shift is applied in whole seconds and the original fraction re-appended
+        modifier = f"{round(shift.total_seconds()):+d} seconds"
+        return func.datetime(column, modifier).concat(func.substr(column, 20))
+    return column + literal(shift, Interval())
+
+@router.post("/{course_id}/clone", response_model=CourseResponse, summary="Clone a course with its blocks and schedule")
+def clone_course(course_id: int, clone: CourseCloneRequest = None, db = Depends(get_db)):
+    """
+    Copy a course, its block assignments and (optionally) its schedule for a new cohort
+
+    Rows are copied with INSERT ... SELECT in one transaction, so the number of
+    statements does not depend on the schedule size. Copied schedule entries are
+    marked unsent; `shift_days` or `start_date` moves their `scheduled_at`.
+    """
+    clone = clone or CourseCloneRequest()
+    try:
+        source = db.query(Course).filter(Course.id == course_id).first()
+        if not source:
+            raise HTTPException(status_code=404, detail="Course not found")
+        
+        now = datetime.utcnow()
+        db_course = Course(
+            title=clone.title or f"{source.title} (copy)",
+            description=source.description,
+            duration_days=source.duration_days,
+            is_active=source.is_active,
+            created_at=now,
+            updated_at=now
+        )
+        db.add(db_course)
+        db.flush()
+        
+        db.execute(insert(CourseBlock).from_select(
+            ["course_id", "content_block_id", "frequency", "time_of_day", "day_of_week", "order_in_day",
+             "created_at", "updated_at"],
+            select(
+                literal(db_course.id), CourseBlock.content_block_id, CourseBlock.frequency,
+                CourseBlock.time_of_day, CourseBlock.day_of_week, CourseBlock.order_in_day,
+                literal(now), literal(now)
+            ).where(CourseBlock.course_id == course_id).order_by(CourseBlock.id)
+        ))
+        # Copies are inserted in id order, so the n-th copy belongs to the n-th original
+        assignment_ids = {
+            original: copy for original, copy in zip(
+                [row.id for row in db.query(CourseBlock.id).filter(CourseBlock.course_id == course_id).order_by(CourseBlock.id)],
+                [row.id for row in db.query(CourseBlock.id).filter(CourseBlock.course_id == db_course.id).order_by(CourseBlock.id)]
+            )
+        }
+        
+        if clone.include_schedule:
+            shift = timedelta(days=clone.shift_days or 0)
+            if clone.start_date is not None:
+                earliest = db.query(func.min(CourseSchedule.scheduled_at)).filter(
+                    CourseSchedule.course_id == course_id
+                ).scalar()
+                if earliest is not None:
+                    shift = clone.start_date - earliest
+            scheduled_at = CourseSchedule.scheduled_at
+            if shift:
+                scheduled_at = _shifted(CourseSchedule.scheduled_at, shift, db.bind.dialect.name)
+            course_block_id = literal(None, Integer)
+            if assignment_ids:
+                course_block_id = case(assignment_ids, value=CourseSchedule.course_block_id)
+            db.execute(insert(CourseSchedule).from_select(
+                ["course_id", "day_number", "content_block_id", "course_block_id", "scheduled_at", "is_sent",
+                 "created_at", "updated_at"],
+                select(
+                    literal(db_course.id), CourseSchedule.day_number, CourseSchedule.content_block_id,
+                    course_block_id, scheduled_at, literal(False), literal(now), literal(now)
+                ).where(CourseSchedule.course_id == course_id).order_by(CourseSchedule.id)
+            ))
+        
+        db.commit()
+        db.refresh(db_course)
+        return db_course
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error cloning course: {str(e)}")
+
 @router.get("/{course_id}/schedule", response_model=List[CourseScheduleResponse], summary="Get course schedule")
-async def get_course_schedule(course_id: int, db = Depends(get_db)):
+def get_course_schedule(course_id: int, request: Request, response: Response, fast: bool = False,
+                              db = Depends(get_read_db)):
     """
     Get the schedule for a specific course
+
+    Pass `fast=true` to skip response model validation and encode plain rows with orjson.
     """
     try:
         # Check if course exists
-        course = db.query(Course).filter(Course.id == course_id).first()
+        course = db.query(Course.id).filter(Course.id == course_id).first()
         if not course:
             raise HTTPException(status_code=404, detail="Course not found")
         
+        etag = make_etag("schedule", course_id, fast,
+                         table_watermark(db, CourseSchedule, CourseSchedule.course_id == course_id))
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        
+        if fast:
+            rows = db.query(*_columns(CourseSchedule, COURSE_SCHEDULE_COLUMNS)).filter(
+                CourseSchedule.course_id == course_id
+            ).all()
+            return with_etag(FastJSONResponse(rows_to_dicts(COURSE_SCHEDULE_COLUMNS, rows)), etag)
+        
         schedule = db.query(CourseSchedule).filter(CourseSchedule.course_id == course_id).all()
         return schedule
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error retrieving course schedule: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error retrieving course schedule: {str(e)}")
+
+def _course_day_version(db, course_id: int, day_number: int, course):
+    """Watermarks of everything a rendered course day depends on"""
+    day_blocks = db.query(func.count(ContentBlock.id), func.max(ContentBlock.updated_at)).join(
+        CourseSchedule, CourseSchedule.content_block_id == ContentBlock.id
+    ).filter(
+        CourseSchedule.course_id == course_id,
+        CourseSchedule.day_number == day_number
+    ).one()
+    return (
+        tuple(course),
+        table_watermark(db, CourseSchedule, CourseSchedule.course_id == course_id,
+                        CourseSchedule.day_number == day_number),
+        table_watermark(db, CourseBlock, CourseBlock.course_id == course_id),
+        tuple(day_blocks)
+    )
+
+def _render_course_day(db, course_id: int, day_number: int) -> bytes:
+    rows = db.query(
+        CourseSchedule.id.label("schedule_id"),
+        CourseSchedule.scheduled_at,
+        CourseSchedule.is_sent,
+        CourseBlock.id.label("course_block_id"),
+        CourseBlock.time_of_day,
+        CourseBlock.order_in_day,
+        CourseBlock.frequency,
+        *_columns(ContentBlock, CONTENT_BLOCK_COLUMNS)
+    ).join(
+        ContentBlock, ContentBlock.id == CourseSchedule.content_block_id
+    ).outerjoin(
+        CourseBlock, or_(
+            CourseBlock.id == CourseSchedule.course_block_id,
+            # Entries built before course_block_id was recorded: any assignment of the block
+            and_(
+                CourseSchedule.course_block_id.is_(None),
+                CourseBlock.course_id == CourseSchedule.course_id,
+                CourseBlock.content_block_id == CourseSchedule.content_block_id
+            )
+        )
+    ).filter(
+        CourseSchedule.course_id == course_id,
+        CourseSchedule.day_number == day_number
+    ).order_by(
+        CourseBlock.order_in_day, ContentBlock.id, CourseSchedule.id
+    ).all()
+    
+    # An older entry without course_block_id joins to every assignment of
+    # its block; pair each such entry with a different assignment, so a block
+    # assigned twice is listed once per entry
+    chosen: Dict[int, Any] = {}
+    taken = set()
+    for row in rows:
+        if row.schedule_id not in chosen and (row.course_block_id is None or row.course_block_id not in taken):
+            chosen[row.schedule_id] = row
+            taken.add(row.course_block_id)
+    for row in rows:
+        chosen.setdefault(row.schedule_id, row)
+    
+    slots: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        if chosen.get(row.schedule_id) is not row:
+            continue
+        block = rows_to_dicts(CONTENT_BLOCK_COLUMNS, [row[-len(CONTENT_BLOCK_COLUMNS):]])[0]
+        block["content_data"] = decode_json_text(block["content_data"])
+        block.update(
+            schedule_id=row.schedule_id,
+            scheduled_at=row.scheduled_at,
+            is_sent=row.is_sent,
+            order_in_day=row.order_in_day,
+            frequency=row.frequency
+        )
+        slots.setdefault(row.time_of_day or "any", []).append(block)
+    
+    def slot_order(name):
+        if name in TIME_OF_DAY_ORDER:
+            return (0, TIME_OF_DAY_ORDER.index(name), name)
+        return (1, 0, name)
+    
+    return dumps({
+        "course_id": course_id,
+        "day_number": day_number,
+        "block_count": len(chosen),
+        "time_slots": [
+            {"time_of_day": name, "blocks": slots[name]} for name in sorted(slots, key=slot_order)
+        ]
+    })
+
+@router.get("/{course_id}/days/{day_number}", summary="Get one course day with its blocks expanded")
+def get_course_day(course_id: int, day_number: int, request: Request, db = Depends(get_read_db)):
+    """
+    Get a course day: its blocks with content, grouped by time of day and ordered by `order_in_day`
+
+    Replaces fetching the schedule and then every block. The rendered day is cached
+    in memory until the course, its schedule or its blocks change.
+    """
+    try:
+        course = db.query(Course.duration_days, Course.updated_at).filter(Course.id == course_id).first()
+        if not course:
+            raise HTTPException(status_code=404, detail="Course not found")
+        if day_number < 1 or day_number > course.duration_days:
+            raise HTTPException(status_code=404, detail=f"Course has no day {day_number}")
+        
+        version = _course_day_version(db, course_id, day_number, course)
+        etag = make_etag("course-day", course_id, day_number, version)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        
+        body = course_day_cache.get_or_render(
+            (course_id, day_number), version, lambda: _render_course_day(db, course_id, day_number)
+        )
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving course day: {str(e)}")
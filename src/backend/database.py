@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Database engines and sessions for NewDay Platform
+
+All modules share one pair of engines per database URL:
+
+- a write engine, used for anything that modifies data
+- a read engine, used by read-only endpoints
+
+On PostgreSQL both roles share one pooled engine sized by DB_POOL_SIZE and
+DB_MAX_OVERFLOW; streaming endpoints use server-side cursors
+(``stream_results``) and bulk paths use COPY (see bulk.py).
+
+On SQLite the "performance" profile (default, see SQLITE_PROFILE) runs the
+database in WAL mode with tuned pragmas. Readers then never block the
+writer or each other. The write engine holds a single connection, so
+concurrent writers queue in the pool instead of fighting over the file lock
+and failing with "database is locked". The read engine is a pool of
+``query_only`` connections.
+
+Environment variables:
+    DATABASE_URL: SQLAlchemy URL (default sqlite:///./data/newday_platform.db)
+    DB_POOL_SIZE: PostgreSQL connections kept open (default 10)
+    DB_MAX_OVERFLOW: Extra PostgreSQL connections under load (default 20)
+    DB_POOL_TIMEOUT: Seconds to wait for a pooled connection (default 30)
+    DB_POOL_RECYCLE: Seconds after which connections are replaced (default 1800)
+    SQLITE_PROFILE: "performance" (default) or "default" for stock settings
+    SQLITE_BUSY_TIMEOUT_MS: Lock wait before giving up (default 5000)
+    SQLITE_MMAP_SIZE: Bytes of the file to memory-map (default 256 MiB)
+    SQLITE_CACHE_SIZE_KB: Page cache per connection (default 64 MiB)
+    SQLITE_READ_POOL_SIZE: Number of read-only connections (default 4)
+    SQLITE_READ_POOL_OVERFLOW: Extra read connections under load (default 4)
+    SQLITE_WRITE_QUEUE_TIMEOUT: Seconds a writer waits for the connection (default 30)
+"""
+
+import os
+import threading
+from typing import Dict, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from query_log import install_slow_query_log
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/newday_platform.db")
+
+# Worth retrying: "database is locked", lost connections, no pooled connection in time
+TRANSIENT_ERRORS = (OperationalError, PoolTimeoutError)
+
+PERFORMANCE_PROFILE = "performance"
+DEFAULT_PROFILE = "default"
+
+
+def _is_file_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and url not in ("sqlite://", "sqlite:///")
+
+
+def _sqlite_pragmas(read_only: bool):
+    busy_timeout = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    mmap_size = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    cache_size_kb = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+    pragmas = [
+        f"PRAGMA busy_timeout={busy_timeout}",
+        # WAL is a property of the database file; on an already converted file this is a no-op
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={mmap_size}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{cache_size_kb}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def _install_pragmas(engine: Engine, read_only: bool):
+    pragmas = _sqlite_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def create_engines(url: str, profile: str = None) -> Tuple[Engine, Engine]:
+    """
+    Create the (write, read) engine pair for a database URL
+
+    Args:
+        url: SQLAlchemy database URL
+        profile: SQLite profile name, defaults to SQLITE_PROFILE
+
+    Returns:
+        Tuple[Engine, Engine]: Write engine and read engine (the same engine
+            when no separate read pool is used)
+    """
+    profile = profile or os.getenv("SQLITE_PROFILE", PERFORMANCE_PROFILE)
+
+    if not url.startswith("sqlite"):
+        engine = create_engine(
+            url,
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            pool_pre_ping=True,
+        )
+        return engine, engine
+
+    # Sessions are used from threadpool threads and streaming generators,
+    # so SQLite connections must be allowed to cross threads
+    connect_args = {"check_same_thread": False}
+
+    if profile != PERFORMANCE_PROFILE or not _is_file_sqlite(url):
+        engine = create_engine(url, connect_args=connect_args)
+        return engine, engine
+
+    write_engine = create_engine(
+        url,
+        connect_args=connect_args,
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=int(os.getenv("SQLITE_WRITE_QUEUE_TIMEOUT", "30")),
+    )
+    _install_pragmas(write_engine, read_only=False)
+
+    read_engine = create_engine(
+        url,
+        connect_args=connect_args,
+        poolclass=QueuePool,
+        pool_size=int(os.getenv("SQLITE_READ_POOL_SIZE", "4")),
+        max_overflow=int(os.getenv("SQLITE_READ_POOL_OVERFLOW", "4")),
+    )
+    _install_pragmas(read_engine, read_only=True)
+
+    return write_engine, read_engine
+
+
+_engines: Dict[str, Tuple[Engine, Engine]] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engines(url: str = None) -> Tuple[Engine, Engine]:
+    """
+    Get the shared (write, read) engine pair for a URL, creating it once
+
+    Both engines report slow statements to the slow query log (query_log.py).
+    """
+    url = url or DATABASE_URL
+    with _engines_lock:
+        if url not in _engines:
+            write_engine, read_engine = create_engines(url)
+            for created in {write_engine, read_engine}:
+                install_slow_query_log(created)
+            _engines[url] = write_engine, read_engine
+        return _engines[url]
+
+
+engine, read_engine = get_engines(DATABASE_URL)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+
+def get_db():
+    """FastAPI dependency: session on the write engine"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db():
+    """FastAPI dependency: session on the read-only engine"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
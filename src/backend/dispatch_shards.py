@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Work sharding for parallel n8n workers
+
+Reminder delivery can be split across N workers by passing ``shard=i&of=n``.
+Participants are partitioned by a stable multiplicative hash of their id,
+computed identically in Python and in SQL, so every worker pulls a
+disjoint slice no matter how ids are clustered by webinar or enrollment
+time. Each (job, run, shard, of) keeps its own cursor in
+``dispatch_cursors`` so a restarted worker resumes after its last
+acknowledged participant.
+"""
+
+from datetime import datetime
+from typing import Optional, Tuple
+
+# Knuth's multiplicative hash constant, reduced modulo 2**32
+HASH_MULTIPLIER = 2654435761
+HASH_MODULUS = 2 ** 32
+
+
+def shard_of(participant_id: int, shard_count: int) -> int:
+    """Get the shard a participant belongs to"""
+    return (((participant_id % HASH_MODULUS) * HASH_MULTIPLIER) % HASH_MODULUS) % shard_count
+
+
+def shard_filter(column, shard: int, shard_count: int):
+    """SQL filter selecting the rows of one shard (matches shard_of)"""
+    # Reducing the id first keeps the product within 64 bits for the
+    # large ids of per-webinar database files (see webinar_shards.py)
+    return (((column % HASH_MODULUS) * HASH_MULTIPLIER) % HASH_MODULUS) % shard_count == shard
+
+
+def validate_shard(shard: Optional[int], shard_count: Optional[int]) -> Optional[Tuple[int, int]]:
+    """
+    Validate shard query parameters
+
+    Args:
+        shard: Zero-based shard index
+        shard_count: Total number of shards
+
+    Returns:
+        Optional[Tuple[int, int]]: (shard, shard_count), or None when unsharded
+
+    Raises:
+        ValueError: If only one parameter is given or they are out of range
+    """
+    if shard is None and shard_count is None:
+        return None
+    if shard is None or shard_count is None:
+        raise ValueError("shard and of must be given together")
+    if shard_count < 1 or not 0 <= shard < shard_count:
+        raise ValueError("shard must satisfy 0 <= shard < of")
+    return shard, shard_count
+
+
+def default_run_key() -> str:
+    """Daily run key: cursors restart every UTC day"""
+    return datetime.utcnow().date().isoformat()
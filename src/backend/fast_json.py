@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Fast JSON responses for NewDay Platform list endpoints
+
+The default FastAPI path loads ORM objects, validates every one of them
+through the pydantic ``response_model`` and encodes the result with the
+standard library ``json`` module. For rows coming straight out of our own
+database that validation is redundant, so list endpoints can opt into this
+path instead: select plain row tuples and encode them with orjson.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Sequence
+
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Fallback encoder used when orjson is not installed"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content to compact JSON bytes
+
+    Args:
+        content: Any JSON-compatible structure (datetimes are allowed)
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson (or compact json as a fallback)"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rows_to_dicts(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Zip plain row tuples with their column names
+
+    Args:
+        columns: Column names in select order
+        rows: Row tuples as returned by a Core/ORM column query
+
+    Returns:
+        List[Dict]: One dict per row
+    """
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def decode_json_text(value: Any) -> Any:
+    """
+    Decode JSON that was stored as a string inside a JSON/Text column
+
+    Content blocks are written with ``json.dumps`` into a JSON column, so the
+    driver hands the payload back as a string; the response models expose it
+    as an object.
+    """
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+HTTP caching helpers for NewDay Platform read endpoints
+
+Provides cheap strong ETags built from table watermarks (row count, newest
+``updated_at`` and highest id) so endpoints can answer ``If-None-Match``
+with ``304 Not Modified`` without loading or rendering the body, a small
+in-process cache for rendered bodies keyed by the same watermarks, and an
+ASGI middleware that gzip- or brotli-compresses large responses.
+"""
+
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from sqlalchemy import func
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong ETag from watermark parts
+
+    Args:
+        parts: Values identifying the representation (endpoint name, query
+            parameters and watermarks)
+
+    Returns:
+        str: Quoted ETag value
+    """
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def table_watermark(db, model, *criteria, timestamp_column=None) -> Tuple[Any, ...]:
+    """
+    Read a (count, newest timestamp, highest id) watermark in one query
+
+    Inserts bump the count and max id, updates bump the timestamp and deletes
+    lower the count, so the tuple changes whenever the selected rows do.
+
+    Args:
+        db: SQLAlchemy session
+        model: Mapped class to inspect
+        criteria: Optional filter expressions
+        timestamp_column: Column to use instead of ``model.updated_at``
+
+    Returns:
+        Tuple: (row count, max timestamp, max id)
+    """
+    timestamp = timestamp_column if timestamp_column is not None else model.updated_at
+    query = db.query(func.count(model.id), func.max(timestamp), func.max(model.id))
+    if criteria:
+        query = query.filter(*criteria)
+    return tuple(query.one())
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison, RFC 7232)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """Build an empty 304 response carrying the ETag"""
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    """Attach an ETag to a response object and return it"""
+    response.headers["ETag"] = etag
+    return response
+
+
+class RenderCache:
+    """
+    Thread-safe LRU of rendered response bodies, each stored with a version
+
+    A cached body is served only while the caller's current version (e.g. a
+    watermark tuple) still equals the version it was rendered for, so
+    entries never need explicit invalidation.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key: Hashable, version: Any, render: Callable[[], Any]) -> Any:
+        """
+        Return the body cached for key at this version, rendering it on a miss
+
+        Args:
+            key: Cache key (e.g. endpoint name and path parameters)
+            version: Current version of everything the body depends on
+            render: Callable producing the body
+
+        Returns:
+            Any: Cached or freshly rendered body
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+        body = render()
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honouring q=0"""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if params in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Incremental gzip/brotli compressor with a common interface"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 writes a gzip header and trailer
+            self._impl = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, more: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._impl.process(data)
+            return out + (self._impl.flush() if more else self._impl.finish())
+        out = self._impl.compress(data)
+        return out + self._impl.flush(zlib.Z_SYNC_FLUSH if more else zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies above a size threshold
+
+    Uses brotli when the client accepts it and the package is installed,
+    gzip otherwise. Streaming responses are compressed chunk by chunk and
+    flushed after every chunk so NDJSON consumers still see rows promptly.
+    Strong ETags are downgraded to weak ones on compressed responses, since
+    the bytes on the wire no longer match the identity representation.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if (
+                    start_message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                if "content-length" in headers:
+                    del headers["content-length"]
+                if not more_body:
+                    compressed = compressor.compress(body, more=False)
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                await send(start_message)
+
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(body, more=more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_wrapper)
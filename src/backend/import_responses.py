@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Bulk response import for NewDay Platform
+
+Loads responses collected by n8n/Telegram bots from an NDJSON or CSV file
+(see response_import.py for the record format):
+
+    python import_responses.py answers.ndjson
+    python import_responses.py answers.csv [--format csv] [--chunk-size 5000]
+
+Progress (records read and rows/sec) is reported on stderr after every
+chunk; the final summary is printed as JSON on stdout.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from n8n_integration import N8nIntegration
+import response_import
+
+def report_progress(summary):
+    print(
+        f"read {summary['read']}, inserted {summary['inserted']}, duplicates {summary['duplicates']}, "
+        f"invalid {summary['invalid']} ({summary['rows_per_second']} rows/sec)",
+        file=sys.stderr
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import responses from NDJSON or CSV")
+    parser.add_argument("path", help="File to import, - for stdin")
+    parser.add_argument("--format", choices=response_import.FORMATS, default=None,
+                        help="File format (default: from the file extension, else ndjson)")
+    parser.add_argument("--chunk-size", type=int, default=response_import.DEFAULT_CHUNK_SIZE,
+                        help="Records validated and written per transaction")
+    args = parser.parse_args()
+    
+    file_format = args.format or (response_import.CSV if args.path.endswith(".csv") else response_import.NDJSON)
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8-sig", newline="")
+    try:
+        summary = N8nIntegration().import_responses(
+            source, file_format, chunk_size=args.chunk_size, progress=report_progress
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    if summary is None:
+        sys.exit(1)
+    print(json.dumps(summary, indent=2))
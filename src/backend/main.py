@@ -2,10 +2,23 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
+from http_caching import CompressionMiddleware
+from admission import AdmissionMiddleware
+from profiling import ProfilingMiddleware
+from request_context import RequestContextMiddleware
+
 # Import the n8n endpoints
-from n8n_endpoints import router as n8n_router
+from n8n_endpoints import router as n8n_router, webhook_workers, coalescer as progress_coalescer
 # Import the course endpoints
 from course_endpoints import router as course_router
+# Import the search endpoints
+from search_endpoints import router as search_router
+# Import the participant endpoints
+from participant_endpoints import router as participant_router
+# Import the webinar export endpoints
+from webinar_endpoints import router as webinar_router
+# Import the admin endpoints
+from admin_endpoints import router as admin_router
 
 app = FastAPI(
     title="NewDay Platform API",
@@ -24,10 +37,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (gzip, or brotli when installed)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+)
+
+# Sampling profiler for requests sent with X-Profile: 1 and a share of all requests
+app.add_middleware(ProfilingMiddleware)
+
+# Bound concurrency of n8n ingestion/export groups; excess gets 429 + Retry-After
+app.add_middleware(AdmissionMiddleware)
+
+# Request id and endpoint for logs and the slow query log (outermost)
+app.add_middleware(RequestContextMiddleware)
+
 # Include n8n integration routes
 app.include_router(n8n_router)
 # Include course management routes
 app.include_router(course_router)
+# Include full-text search routes
+app.include_router(search_router)
+# Include participant feed routes
+app.include_router(participant_router)
+# Include webinar export routes
+app.include_router(webinar_router)
+# Include operational routes
+app.include_router(admin_router)
+
+# Workers for webhooks accepted with ?async=true
+@app.on_event("startup")
+def start_webhook_workers():
+    webhook_workers.start()
+
+@app.on_event("shutdown")
+def stop_webhook_workers():
+    webhook_workers.stop()
+
+# Flusher of journaled progress updates
+@app.on_event("startup")
+def start_progress_coalescer():
+    progress_coalescer.start()
+
+@app.on_event("shutdown")
+def stop_progress_coalescer():
+    progress_coalescer.stop()
 
 @app.get("/health")
 async def health_check():
@@ -39,7 +93,7 @@ async def root():
 
 # Database population endpoint
 @app.post("/populate-database")
-async def populate_database():
+def populate_database():
     """Populate the database with webinar content"""
     try:
         # Import and run the population script
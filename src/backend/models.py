@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, JSON, Index, UniqueConstraint, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -14,6 +14,7 @@ class Webinar(Base):
     duration_days = Column(Integer, default=10)
     start_date = Column(DateTime)
     end_date = Column(DateTime)
+    pacing_mode = Column(String, default="self_paced")  # self_paced, enrollment_paced, cohort_paced
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -36,6 +37,23 @@ class WebinarDay(Base):
     # Relationship
     webinar = relationship("Webinar", back_populates="days")
 
+class Question(Base):
+    __tablename__ = 'questions'
+
+    # Normalized copy of WebinarDay.questions, kept in sync by question_catalog.py
+    id = Column(Integer, primary_key=True)
+    day_id = Column(Integer, ForeignKey('webinar_days.id'), nullable=False)
+    position = Column(Integer, nullable=False)  # Index in the day's questions array, i.e. Response.question_id
+    text = Column(Text, nullable=False)
+    is_active = Column(Boolean, default=True)  # False once removed from the day's questions
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Resolving a response: (day_id, question_id) -> question
+        UniqueConstraint("day_id", "position", name="uq_questions_day_position"),
+    )
+
 class Participant(Base):
     __tablename__ = 'participants'
     
@@ -57,6 +75,57 @@ class Response(Base):
     question_id = Column(Integer)  # Reference to specific question
     response_text = Column(Text)
     response_timestamp = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Last-response lookups for reminders
+        Index("ix_responses_participant_timestamp", "participant_id", "response_timestamp"),
+    )
+
+class ResponseArchive(Base):
+    __tablename__ = 'response_archives'
+    
+    id = Column(Integer, primary_key=True)
+    month = Column(String, nullable=False)  # "YYYY-MM" partition the file holds
+    path = Column(String, nullable=False)  # File name inside RESPONSE_ARCHIVE_DIR
+    row_count = Column(Integer, default=0)
+    min_response_id = Column(Integer)
+    max_response_id = Column(Integer)
+    # Lets per-participant readers skip files; NULL for files archived before these columns existed
+    min_participant_id = Column(Integer)
+    max_participant_id = Column(Integer)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_response_archives_month", "month"),
+    )
+
+class WebhookJob(Base):
+    __tablename__ = 'webhook_jobs'
+
+    id = Column(Integer, primary_key=True)
+    event = Column(String, nullable=False)  # Webhook event type
+    payload = Column(Text, nullable=False)  # JSON formatted, already validated event data
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    result = Column(Text)  # Outcome message of the last attempt
+    available_at = Column(DateTime, default=datetime.utcnow)  # Not picked up before this (retry backoff)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        # Claiming the oldest runnable job
+        Index("ix_webhook_jobs_status_available", "status", "available_at"),
+    )
+
+class ProgressJournal(Base):
+    __tablename__ = 'progress_journal'
+
+    # Progress updates accepted but not yet applied to participants (see progress_coalescer.py)
+    id = Column(Integer, primary_key=True)
+    participant_id = Column(Integer, nullable=False)
+    day_completed = Column(Integer, nullable=False)
+    received_at = Column(DateTime, default=datetime.utcnow)
 
 class VisualTest(Base):
     __tablename__ = 'visual_tests'
@@ -69,6 +138,38 @@ class VisualTest(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class DayAnswerStats(Base):
+    __tablename__ = 'day_answer_stats'
+
+    # Answer statistics of a webinar day, recomputed by answer_scoring.py
+    id = Column(Integer, primary_key=True)
+    day_id = Column(Integer, ForeignKey('webinar_days.id'), nullable=False, unique=True)
+    webinar_id = Column(Integer, nullable=False)
+    participants = Column(Integer, default=0)  # Enrolled in the webinar
+    respondents = Column(Integer, default=0)  # Answered anything on this day
+    question_respondents = Column(Text)  # JSON formatted {question_id: participants who answered}
+    visual_answers = Column(Integer, default=0)  # Participants who answered the visual test
+    visual_invalid = Column(Integer, default=0)  # ... with an answer matching no option
+    visual_correct = Column(Integer)  # NULL when the test has no correct answer
+    option_counts = Column(Text)  # JSON formatted {option: participants who chose it}
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+class DispatchCursor(Base):
+    __tablename__ = 'dispatch_cursors'
+    
+    id = Column(Integer, primary_key=True)
+    job = Column(String, nullable=False)  # e.g. "reminders"
+    run_key = Column(String, nullable=False)  # Run identifier, by default the UTC date
+    shard = Column(Integer, nullable=False)
+    shard_count = Column(Integer, nullable=False)
+    last_participant_id = Column(Integer, default=0)  # Last acknowledged participant
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("job", "run_key", "shard", "shard_count", name="uq_dispatch_cursors_slice"),
+    )
+
 # Новые модели для системы блоков и курсов
 class ContentBlock(Base):
     __tablename__ = 'content_blocks'
@@ -85,6 +186,12 @@ class ContentBlock(Base):
     
     # Relationship to course blocks
     course_blocks = relationship("CourseBlock", back_populates="content_block")
+    
+    __table_args__ = (
+        # Catalog filters and facet counts (GROUP BY read from the index alone)
+        Index("ix_content_blocks_active_category", "is_active", "category"),
+        Index("ix_content_blocks_active_type", "is_active", "content_type"),
+    )
 
 class Course(Base):
     __tablename__ = 'courses'
@@ -117,6 +224,10 @@ class CourseBlock(Base):
     # Relationships
     course = relationship("Course", back_populates="course_blocks")
     content_block = relationship("ContentBlock", back_populates="course_blocks")
+    
+    __table_args__ = (
+        Index("ix_course_blocks_course", "course_id", "content_block_id"),
+    )
 
 class CourseSchedule(Base):
     __tablename__ = 'course_schedules'
@@ -125,6 +236,7 @@ class CourseSchedule(Base):
     course_id = Column(Integer, ForeignKey('courses.id'), nullable=False)
     day_number = Column(Integer, nullable=False)  # Номер дня курса
     content_block_id = Column(Integer, ForeignKey('content_blocks.id'), nullable=False)
+    course_block_id = Column(Integer, ForeignKey('course_blocks.id'))  # Assignment the entry was built from; NULL for older rows
     scheduled_at = Column(DateTime)  # Конкретное время отправки
     is_sent = Column(Boolean, default=False)  # Отправлено ли уже
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -132,4 +244,32 @@ class CourseSchedule(Base):
     
     # Relationships
     course = relationship("Course", back_populates="course_schedules")
-    content_block = relationship("ContentBlock")
\ No newline at end of file
+    content_block = relationship("ContentBlock")
+    
+    __table_args__ = (
+        # Schedule and rendered-day lookups
+        Index("ix_course_schedules_course_day", "course_id", "day_number"),
+    )
+
+def upgrade_schema(engine):
+    """
+    Bring existing tables up to date with the models
+
+    create_all only creates missing tables, so columns and indexes added to a
+    model after its table was created are added here. New columns are added
+    as nullable; code reading them treats NULL as the column default.
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(connection)
@@ -6,15 +6,25 @@ This module provides FastAPI endpoints for n8n integration,
 enabling bidirectional data flow between the NewDay platform and n8n.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Header
-from pydantic import BaseModel
-from typing import Dict, List, Optional, Any
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from typing import Dict, List, Optional, Any, Tuple
 import json
 import os
 from datetime import datetime
+from itertools import islice
 
 # Import our n8n integration module
 from n8n_integration import N8nIntegration
+from http_caching import make_etag, etag_matches, not_modified
+from fast_json import dumps
+from dispatch_shards import validate_shard, default_run_key
+import archive
+import webhook_jobs
+import progress_coalescer
+import response_import
 
 # Create router
 router = APIRouter(prefix="/api/n8n", tags=["n8n-integration"])
@@ -32,11 +42,21 @@ class ContentUpdateData(BaseModel):
     webinar_id: int
     day_number: int
     content: Dict[str, Any]
+    questions: Optional[List[Any]] = None  # Replaces the day's questions when given
 
 class ProgressUpdateData(BaseModel):
     participant_id: int
     day_completed: int
 
+class PacingData(BaseModel):
+    pacing_mode: str  # self_paced, enrollment_paced, cohort_paced
+
+class ShardAckData(BaseModel):
+    shard: int
+    of: int
+    cursor: int  # Last participant_id that was processed
+    run: Optional[str] = None
+
 class N8nWebhookData(BaseModel):
     event: str
     data: Dict[str, Any]
@@ -54,9 +74,66 @@ def verify_n8n_api_key(x_api_key: str = Header(None)) -> bool:
     
     return True
 
+def process_webhook_event(event_type: str, data: Dict[str, Any]) -> Tuple[bool, str]:
+    """
+    Run one webhook event; shared by the inline path and the job workers
+    
+    Returns (success, message); raises for unknown events and invalid data.
+    """
+    if event_type == "enrollment_data":
+        enrollment = EnrollmentData(**data)
+        if n8n.receive_enrollment_data(enrollment.dict()):
+            return True, "Enrollment processed"
+        return False, "Failed to process enrollment"
+    
+    elif event_type == "content_update":
+        content_update = ContentUpdateData(**data)
+        if n8n.receive_content_update(content_update.dict()):
+            return True, "Content update processed"
+        return False, "Failed to process content update"
+    
+    elif event_type == "progress_update":
+        progress_update = ProgressUpdateData(**data)
+        if coalescer.enabled:
+            if n8n.journal_progress_update(progress_update.participant_id, progress_update.day_completed):
+                coalescer.notify()
+                return True, "Progress update queued"
+            return False, "Failed to queue progress update"
+        if n8n.update_participant_progress(
+            progress_update.participant_id,
+            progress_update.day_completed
+        ):
+            return True, "Progress update processed"
+        return False, "Failed to process progress update"
+    
+    raise ValueError(f"Unknown event type: {event_type}")
+
+# Payload model of each webhook event, validated before a job is queued
+WEBHOOK_EVENT_MODELS = {
+    "enrollment_data": EnrollmentData,
+    "content_update": ContentUpdateData,
+    "progress_update": ProgressUpdateData
+}
+
+def run_webhook_job(event_type: str, data: Dict[str, Any]) -> Tuple[bool, str]:
+    """Run a queued job: post an outbound event to n8n or process a received webhook"""
+    if event_type in webhook_jobs.OUTBOUND_EVENTS:
+        if n8n.deliver_event(data):
+            return True, "Event sent to n8n"
+        return True, "Nothing sent (no n8n webhook URL or participant)"
+    return process_webhook_event(event_type, data)
+
+# Workers for ?async=true webhooks and outbound events, started and stopped with the app
+webhook_workers = webhook_jobs.WebhookWorkerPool(n8n.Session, run_webhook_job)
+n8n.on_events_queued = webhook_workers.notify
+
+# Applies journaled progress updates in batches, started and stopped with the app
+coalescer = progress_coalescer.ProgressCoalescer(n8n.flush_progress_journal)
+
 @router.post("/webhook", summary="Receive webhook from n8n")
-async def receive_n8n_webhook(
+def receive_n8n_webhook(
     webhook_data: N8nWebhookData,
+    async_mode: bool = Query(False, alias="async"),
     api_key_verified: bool = Depends(verify_n8n_api_key)
 ):
     """
@@ -66,46 +143,86 @@ async def receive_n8n_webhook(
     - enrollment_data: New participant enrollment
     - content_update: Content updates for webinars
     - progress_update: Participant progress updates
+    
+    With `async=true` the event is validated and queued, and the response is
+    `202 Accepted` with a job id to poll at `/api/n8n/jobs/{job_id}`.
     """
+    if async_mode:
+        return _enqueue_webhook(webhook_data)
+    
     try:
-        event_type = webhook_data.event
-        data = webhook_data.data
-        
-        if event_type == "enrollment_data":
-            enrollment = EnrollmentData(**data)
-            success = n8n.receive_enrollment_data(enrollment.dict())
-            if success:
-                return {"status": "success", "message": "Enrollment processed"}
-            else:
-                raise HTTPException(status_code=400, detail="Failed to process enrollment")
-        
-        elif event_type == "content_update":
-            content_update = ContentUpdateData(**data)
-            success = n8n.receive_content_update(content_update.dict())
-            if success:
-                return {"status": "success", "message": "Content update processed"}
-            else:
-                raise HTTPException(status_code=400, detail="Failed to process content update")
-        
-        elif event_type == "progress_update":
-            progress_update = ProgressUpdateData(**data)
-            success = n8n.update_participant_progress(
-                progress_update.participant_id,
-                progress_update.day_completed
-            )
-            if success:
-                return {"status": "success", "message": "Progress update processed"}
-            else:
-                raise HTTPException(status_code=400, detail="Failed to process progress update")
-        
+        success, message = process_webhook_event(webhook_data.event, webhook_data.data)
+        if success:
+            return {"status": "success", "message": message}
         else:
-            raise HTTPException(status_code=400, detail=f"Unknown event type: {event_type}")
+            raise HTTPException(status_code=400, detail=message)
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
 
+def _enqueue_webhook(webhook_data: N8nWebhookData) -> JSONResponse:
+    model = WEBHOOK_EVENT_MODELS.get(webhook_data.event)
+    if model is None:
+        raise HTTPException(status_code=400, detail=f"Unknown event type: {webhook_data.event}")
+    try:
+        payload = model(**webhook_data.data).dict()
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    
+    session = n8n.Session()
+    try:
+        job = webhook_jobs.enqueue(session, webhook_data.event, payload)
+        job_id = job.id
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(status_code=500, detail=f"Error queueing webhook: {str(e)}")
+    finally:
+        session.close()
+    webhook_workers.notify()
+    
+    status_url = f"{router.prefix}/jobs/{job_id}"
+    return JSONResponse(
+        {"status": "accepted", "job_id": job_id, "status_url": status_url},
+        status_code=202,
+        headers={"Location": status_url}
+    )
+
+@router.get("/jobs", summary="Webhook job queue depth")
+def get_webhook_queue(
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Get the number of webhook jobs per status
+    """
+    session = n8n.ReadSession()
+    try:
+        return {"jobs": webhook_jobs.queue_depth(session), "workers": webhook_workers.workers}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting webhook jobs: {str(e)}")
+    finally:
+        session.close()
+
+@router.get("/jobs/{job_id}", summary="Status of an asynchronous webhook job")
+def get_webhook_job(
+    job_id: int,
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Get the status and outcome of a webhook queued with `async=true`
+    """
+    session = n8n.ReadSession()
+    try:
+        job = webhook_jobs.get_job(session, job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting webhook job: {str(e)}")
+    finally:
+        session.close()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @router.post("/enroll", summary="Enroll participant via n8n")
-async def enroll_participant(
+def enroll_participant(
     enrollment_data: EnrollmentData,
     api_key_verified: bool = Depends(verify_n8n_api_key)
 ):
@@ -121,8 +238,27 @@ async def enroll_participant(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error enrolling participant: {str(e)}")
 
+@router.post("/enroll/bulk", summary="Enroll many participants via n8n")
+def bulk_enroll_participants(
+    enrollment_data: List[EnrollmentData],
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Enroll a batch of participants in one transaction (COPY on PostgreSQL);
+    already enrolled (user_id, webinar_id) pairs are skipped
+    """
+    try:
+        summary = n8n.bulk_enroll([enrollment.dict() for enrollment in enrollment_data])
+        if summary is None:
+            raise HTTPException(status_code=400, detail="Failed to enroll participants")
+        return {"status": "success", **summary}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error enrolling participants: {str(e)}")
+
 @router.post("/update-content", summary="Update webinar content via n8n")
-async def update_content(
+def update_content(
     content_data: ContentUpdateData,
     api_key_verified: bool = Depends(verify_n8n_api_key)
 ):
@@ -139,7 +275,7 @@ async def update_content(
         raise HTTPException(status_code=500, detail=f"Error updating content: {str(e)}")
 
 @router.post("/update-progress", summary="Update participant progress via n8n")
-async def update_progress(
+def update_progress(
     progress_data: ProgressUpdateData,
     api_key_verified: bool = Depends(verify_n8n_api_key)
 ):
@@ -147,6 +283,12 @@ async def update_progress(
     Update participant progress based on data from n8n
     """
     try:
+        if coalescer.enabled:
+            # Applied by the progress coalescer after PROGRESS_COALESCE_SECONDS
+            if not n8n.journal_progress_update(progress_data.participant_id, progress_data.day_completed):
+                raise HTTPException(status_code=400, detail="Failed to queue progress update")
+            coalescer.notify()
+            return {"status": "success", "message": "Progress update queued"}
         success = n8n.update_participant_progress(
             progress_data.participant_id,
             progress_data.day_completed
@@ -158,25 +300,284 @@ async def update_progress(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating progress: {str(e)}")
 
+@router.post("/webinars/{webinar_id}/pacing", summary="Set webinar pacing mode")
+def set_pacing(
+    webinar_id: int,
+    pacing_data: PacingData,
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Switch a webinar between self-paced progress (stored, advanced by n8n)
+    and time-paced progress (derived from enrollment date or webinar start date)
+    """
+    try:
+        success = n8n.set_webinar_pacing(webinar_id, pacing_data.pacing_mode)
+        if success:
+            return {"status": "success", "message": f"Pacing set to {pacing_data.pacing_mode}"}
+        else:
+            raise HTTPException(status_code=400, detail="Failed to set pacing mode")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error setting pacing mode: {str(e)}")
+
+@router.post("/webinars/{webinar_id}/score", summary="Score visual tests and aggregate answers per day")
+def score_webinar(
+    webinar_id: int,
+    day_number: Optional[int] = Query(None, ge=1),
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Recompute the answer statistics of a webinar's days (or one day) for the evening summary
+    
+    Visual-test answers are responses with `question_id=-1`. Stored results
+    are read back with `GET /api/webinars/{webinar_id}/stats`.
+    """
+    try:
+        stats = n8n.score_webinar_days(webinar_id, day_number)
+        if stats is None:
+            raise HTTPException(status_code=400, detail="Failed to score webinar")
+        return {"status": "success", "days": stats}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error scoring webinar: {str(e)}")
+
+@router.post("/advance-day/{webinar_id}", summary="Advance all eligible participants of a webinar")
+def advance_day(
+    webinar_id: int,
+    require_responses: bool = True,
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Advance eligible participants of a webinar by one day in a single batch
+    
+    With `require_responses=true` (default) only participants who answered
+    their current day's questions are advanced.
+    """
+    try:
+        summary = n8n.advance_webinar_participants(webinar_id, require_responses)
+        if summary is None:
+            raise HTTPException(status_code=400, detail="Failed to advance participants")
+        return {
+            "status": "success",
+            "advanced_count": len(summary["advanced"]),
+            "completed_count": len(summary["completed"]),
+            **summary
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error advancing participants: {str(e)}")
+
+def _reminder_shard(shard: Optional[int], of: Optional[int]):
+    """Validate shard query parameters, mapping errors to 400"""
+    try:
+        return validate_shard(shard, of)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/reminders", summary="Get reminder data for n8n")
-async def get_reminder_data(
+def get_reminder_data(
+    request: Request,
+    response: Response,
+    shard: Optional[int] = None,
+    of: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = 500,
+    run: Optional[str] = None,
     api_key_verified: bool = Depends(verify_n8n_api_key)
 ):
     """
     Get participant data for sending reminders via n8n
+    
+    Supports conditional GET: the ETag is derived from table watermarks, so
+    an unchanged list is answered with 304 before any reminder is computed.
+    
+    With `shard=i&of=n` only that shard's participants are returned, one page
+    of at most `limit` reminders at a time. Without an explicit `cursor` the
+    page starts after the shard's last acknowledged participant for `run`
+    (default: today), see POST /reminders/ack.
     """
+    shard_slice = _reminder_shard(shard, of)
     try:
-        reminder_data = n8n.send_daily_reminder_data()
+        if shard_slice is None:
+            etag = make_etag("reminders", n8n.reminder_watermark())
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return not_modified(etag)
+            response.headers["ETag"] = etag
+            
+            reminder_data = n8n.send_daily_reminder_data()
+            return {
+                "status": "success",
+                "count": len(reminder_data),
+                "reminders": reminder_data
+            }
+        
+        run_key = run or default_run_key()
+        if cursor is None:
+            cursor = n8n.get_dispatch_cursor("reminders", run_key, shard_slice)
+        
+        etag = make_etag("reminders", shard_slice, run_key, cursor, limit, n8n.reminder_watermark())
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        
+        page = list(islice(n8n.iter_daily_reminder_data(shard=shard_slice, after_id=cursor), limit + 1))
+        reminder_data = page[:limit]
         return {
             "status": "success",
+            "shard": shard_slice[0],
+            "of": shard_slice[1],
+            "run": run_key,
+            "cursor": cursor,
+            "next_cursor": reminder_data[-1]["participant_id"] if reminder_data else cursor,
+            "has_more": len(page) > limit,
             "count": len(reminder_data),
             "reminders": reminder_data
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting reminder data: {str(e)}")
 
+@router.get("/reminders/stream", summary="Stream reminder data for n8n as NDJSON")
+def stream_reminder_data(
+    shard: Optional[int] = None,
+    of: Optional[int] = None,
+    cursor: Optional[int] = None,
+    run: Optional[str] = None,
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Stream participant data for reminders, one JSON object per line
+    
+    Rows are read from a server-side cursor and written as they are produced,
+    so n8n can start sending reminders before the whole list is computed.
+    Accepts the same `shard`/`of`/`cursor`/`run` parameters as /reminders.
+    """
+    shard_slice = _reminder_shard(shard, of)
+    if shard_slice is not None and cursor is None:
+        cursor = n8n.get_dispatch_cursor("reminders", run or default_run_key(), shard_slice)
+    
+    def generate():
+        for reminder in n8n.iter_daily_reminder_data(shard=shard_slice, after_id=cursor or 0):
+            yield dumps(reminder) + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.post("/reminders/ack", summary="Acknowledge processed reminders of a shard")
+def ack_reminders(
+    ack_data: ShardAckData,
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Persist a shard's progress so a restarted worker resumes after `cursor`
+    """
+    shard_slice = _reminder_shard(ack_data.shard, ack_data.of)
+    try:
+        run_key = ack_data.run or default_run_key()
+        stored = n8n.ack_dispatch_cursor("reminders", run_key, shard_slice, ack_data.cursor)
+        return {"status": "success", "run": run_key, "cursor": stored}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error acknowledging reminders: {str(e)}")
+
+@router.get("/responses/export", summary="Export responses as NDJSON, including archived months")
+def export_responses(
+    webinar_id: Optional[int] = None,
+    participant_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Stream responses ordered by time, one JSON object per line
+    
+    Hot rows and archived months are merged transparently; `since` is
+    inclusive and `until` exclusive. Without a participant or webinar filter
+    the shared database file and all webinar shards are merged.
+    """
+    sessions = [factory() for factory in n8n.shards.read_sessions(webinar_id, participant_id)]
+    
+    def generate():
+        try:
+            for row in archive.merge_responses(
+                archive.iter_responses(
+                    session, participant_id=participant_id, webinar_id=webinar_id, since=since, until=until
+                ) for session in sessions
+            ):
+                yield dumps(row) + b"\n"
+        finally:
+            for session in sessions:
+                session.close()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.get("/responses/archive", summary="Hot and archived response partitions")
+def get_response_archive_status(
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Get the hot table size and the archived months, over the shared file and all webinar shards
+    """
+    sessions = [factory() for factory in n8n.shards.read_sessions()]
+    try:
+        return archive.merge_status([archive.archive_status(session) for session in sessions])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting archive status: {str(e)}")
+    finally:
+        for session in sessions:
+            session.close()
+
+@router.post("/responses/archive", summary="Archive responses of closed months")
+def archive_responses(
+    hot_months: Optional[int] = None,
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Move closed months out of the hot responses table into archive files
+    """
+    if hot_months is not None and hot_months < 1:
+        raise HTTPException(status_code=400, detail="hot_months must be at least 1")
+    result = n8n.archive_closed_responses(hot_months=hot_months)
+    if result is None:
+        raise HTTPException(status_code=500, detail="Failed to archive responses")
+    return {"status": "success", **result}
+
+@router.post("/responses/import", summary="Bulk import responses from NDJSON or CSV")
+async def import_responses(
+    request: Request,
+    file_format: Optional[str] = Query(None, alias="format", description="ndjson or csv; defaults from Content-Type"),
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Import responses collected by n8n bots
+    
+    The request body is an NDJSON or CSV file with participant_id, day_id,
+    question_id, response_text and response_timestamp. Unknown references
+    are reported per line, duplicates of existing answers are skipped.
+    Large files are better loaded with import_responses.py.
+    """
+    if file_format is None:
+        content_type = request.headers.get("content-type", "")
+        file_format = response_import.CSV if "csv" in content_type else response_import.NDJSON
+    if file_format not in response_import.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(response_import.FORMATS)}")
+    
+    # Streamed to a spool file, so a large upload is never held in memory at once
+    try:
+        body = await response_import.spool_upload(request.stream())
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8 text")
+    lines = response_import.text_lines(body)
+    try:
+        summary = await run_in_threadpool(n8n.import_responses, lines, file_format)
+    finally:
+        lines.close()
+    if summary is None:
+        raise HTTPException(status_code=500, detail="Failed to import responses")
+    return {"status": "success", **summary}
+
 @router.post("/send-progress/{participant_id}", summary="Send participant progress to n8n")
-async def send_progress(
+def send_progress(
     participant_id: int,
     api_key_verified: bool = Depends(verify_n8n_api_key)
 ):
@@ -193,7 +594,7 @@ async def send_progress(
         raise HTTPException(status_code=500, detail=f"Error sending progress data: {str(e)}")
 
 @router.post("/send-completion/{participant_id}", summary="Send completion event to n8n")
-async def send_completion(
+def send_completion(
     participant_id: int,
     api_key_verified: bool = Depends(verify_n8n_api_key)
 ):
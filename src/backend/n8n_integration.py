@@ -10,71 +10,27 @@ import os
 import json
 import requests
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Tuple
+from sqlalchemy import bindparam, func, case, or_
+from sqlalchemy.orm import sessionmaker
 
-# Import the models we created in populate_database.py
-Base = declarative_base()
+from database import TRANSIENT_ERRORS, get_engines
+from bulk import chunked, copy_rows, upsert
 
-class Webinar(Base):
-    __tablename__ = 'webinars'
-    
-    id = Column(Integer, primary_key=True)
-    title = Column(String, nullable=False)
-    description = Column(Text)
-    duration_days = Column(Integer, default=10)
-    start_date = Column(DateTime)
-    end_date = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-class WebinarDay(Base):
-    __tablename__ = 'webinar_days'
-    
-    id = Column(Integer, primary_key=True)
-    webinar_id = Column(Integer, ForeignKey('webinars.id'), nullable=False)
-    day_number = Column(Integer, nullable=False)
-    title = Column(String, nullable=False)
-    content = Column(Text)  # JSON formatted content
-    visual_test_data = Column(Text)  # JSON formatted visual test data
-    questions = Column(Text)  # JSON formatted questions
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-class Participant(Base):
-    __tablename__ = 'participants'
-    
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer)  # Removed ForeignKey reference to non-existent users table
-    webinar_id = Column(Integer, ForeignKey('webinars.id'), nullable=False)
-    enrollment_date = Column(DateTime, default=datetime.utcnow)
-    completion_status = Column(String, default="enrolled")  # enrolled, in_progress, completed
-    current_day = Column(Integer, default=1)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+# Shared models (also used by populate_database.py and course_endpoints.py)
+from models import Base, Webinar, WebinarDay, Participant, Response, VisualTest, DispatchCursor, ProgressJournal, DayAnswerStats, upgrade_schema
+import pacing
+import archive
+import response_import
+import answer_scoring
+import question_catalog
+import webinar_shards
+import webhook_jobs
+from dispatch_shards import shard_filter
+from search import install_search
+from structured_logging import get_logger
 
-class Response(Base):
-    __tablename__ = 'responses'
-    
-    id = Column(Integer, primary_key=True)
-    participant_id = Column(Integer, ForeignKey('participants.id'), nullable=False)
-    day_id = Column(Integer, ForeignKey('webinar_days.id'), nullable=False)
-    question_id = Column(Integer)  # Reference to specific question
-    response_text = Column(Text)
-    response_timestamp = Column(DateTime, default=datetime.utcnow)
-
-class VisualTest(Base):
-    __tablename__ = 'visual_tests'
-    
-    id = Column(Integer, primary_key=True)
-    day_id = Column(Integer, ForeignKey('webinar_days.id'), nullable=False)
-    image_url = Column(String)
-    options = Column(Text)  # JSON formatted options
-    correct_answer = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+logger = get_logger("n8n")
 
 class N8nIntegration:
     """Handles bidirectional data flow between NewDay platform and n8n"""
@@ -95,42 +51,88 @@ class N8nIntegration:
         if self.n8n_api_key:
             self.headers["Authorization"] = f"Bearer {self.n8n_api_key}"
         
-        # Database setup
+        # Database setup: shared write engine plus a read-only pool (see database.py)
         self.DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/newday_platform.db")
-        self.engine = create_engine(self.DATABASE_URL)
+        self.engine, self.read_engine = get_engines(self.DATABASE_URL)
         Base.metadata.create_all(self.engine)
+        upgrade_schema(self.engine)
+        install_search(self.engine)
+        question_catalog.backfill_questions(self.engine)
         self.Session = sessionmaker(bind=self.engine)
+        self.ReadSession = sessionmaker(bind=self.read_engine)
+        # Participants, responses and days of sharded webinars live in their own files
+        self.shards = webinar_shards.get_shards(self.DATABASE_URL)
+        # Called after events were added to the webhook_jobs outbox, e.g. to wake its workers
+        self.on_events_queued: Optional[Callable[[], None]] = None
     
-    def send_participant_progress(self, participant_id: int) -> bool:
+    def _commit_with_events(self, session, payloads: List[Dict[str, Any]]) -> bool:
         """
-        Send participant progress data to n8n
+        Commit a write session together with events for n8n
+        
+        Events go to the webhook_jobs outbox and are posted by its workers,
+        so no HTTP call runs while the write connection is held. The outbox
+        lives in the shared file: there the jobs commit atomically with the
+        changes. A shard session commits first and the jobs follow in a
+        transaction on the shared file, so a crash in between loses the
+        events but never reports a rolled-back change.
+        
+        Args:
+            session: Write session with the changes the events report
+            payloads: Event payloads, each with an "event" key
+            
+        Returns:
+            bool: True if events were queued (never without a webhook URL)
+        """
+        payloads = payloads if self.n8n_webhook_url else []
+        if session.get_bind() is self.engine:
+            for payload in payloads:
+                webhook_jobs.add_job(session, payload["event"], payload)
+            session.commit()
+        else:
+            session.commit()
+            if payloads:
+                outbox = self.Session()
+                try:
+                    for payload in payloads:
+                        webhook_jobs.add_job(outbox, payload["event"], payload)
+                    outbox.commit()
+                finally:
+                    outbox.close()
+        if payloads and self.on_events_queued:
+            self.on_events_queued()
+        return bool(payloads)
+    
+    def _progress_payload(self, participant_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Current progress and responses of a participant, as sent to n8n
         
         Args:
             participant_id: ID of the participant
             
         Returns:
-            bool: True if successful, False otherwise
+            Optional[Dict]: "participant_progress" event payload, or None if
+                the participant or their webinar does not exist
         """
+        session = self.shards.sessions_for_row(participant_id)[1]()
         try:
-            session = self.Session()
-            
             # Get participant data
             participant = session.query(Participant).filter_by(id=participant_id).first()
             if not participant:
-                print(f"Participant with ID {participant_id} not found")
-                return False
+                logger.warning("Participant not found", extra={"participant_id": participant_id})
+                return None
             
             # Get webinar data
             webinar = session.query(Webinar).filter_by(id=participant.webinar_id).first()
             if not webinar:
-                print(f"Webinar with ID {participant.webinar_id} not found")
-                return False
+                logger.warning("Webinar not found", extra={"webinar_id": participant.webinar_id})
+                return None
             
-            # Get responses
-            responses = session.query(Response).filter_by(participant_id=participant_id).all()
+            # Get responses, including archived months
+            responses = list(archive.iter_responses(session, participant_id=participant_id))
             
-            # Prepare data payload
-            payload = {
+            current_day, completion_status = pacing.effective_progress(participant, webinar)
+            
+            return {
                 "event": "participant_progress",
                 "timestamp": datetime.utcnow().isoformat(),
                 "participant": {
@@ -139,22 +141,39 @@ class N8nIntegration:
                     "webinar_id": participant.webinar_id,
                     "webinar_title": webinar.title,
                     "enrollment_date": participant.enrollment_date.isoformat() if participant.enrollment_date else None,
-                    "completion_status": participant.completion_status,
-                    "current_day": participant.current_day,
+                    "completion_status": completion_status,
+                    "current_day": current_day,
                     "total_days": webinar.duration_days
                 },
                 "responses": [
                     {
-                        "id": resp.id,
-                        "day_id": resp.day_id,
-                        "question_id": resp.question_id,
-                        "response_text": resp.response_text,
-                        "response_timestamp": resp.response_timestamp.isoformat() if resp.response_timestamp else None
+                        "id": resp["id"],
+                        "day_id": resp["day_id"],
+                        "question_id": resp["question_id"],
+                        "response_text": resp["response_text"],
+                        "response_timestamp": resp["response_timestamp"].isoformat() if resp["response_timestamp"] else None
                     }
                     for resp in responses
                 ],
-                "progress_percentage": (participant.current_day / webinar.duration_days) * 100 if webinar.duration_days else 0
+                "progress_percentage": (current_day / webinar.duration_days) * 100 if webinar.duration_days else 0
             }
+        finally:
+            session.close()
+    
+    def send_participant_progress(self, participant_id: int) -> bool:
+        """
+        Send participant progress data to n8n
+        
+        Args:
+            participant_id: ID of the participant
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            payload = self._progress_payload(participant_id)
+            if payload is None:
+                return False
             
             # Send to n8n
             if self.n8n_webhook_url:
@@ -165,17 +184,32 @@ class N8nIntegration:
                     timeout=30
                 )
                 response.raise_for_status()
-                print(f"Successfully sent progress data for participant {participant_id}")
+                logger.info("Sent progress data to n8n", extra={"participant_id": participant_id, "sampled": True})
                 return True
             else:
-                print("n8n webhook URL not configured")
+                logger.debug("n8n webhook URL not configured")
                 return False
                 
         except Exception as e:
-            print(f"Error sending participant progress to n8n: {e}")
+            logger.error("Error sending participant progress to n8n: %s", e, extra={"participant_id": participant_id})
             return False
-        finally:
-            session.close()
+    
+    @staticmethod
+    def _completion_payload(participant: Participant, webinar: Webinar) -> Dict[str, Any]:
+        """"webinar_completion" event payload of a participant"""
+        return {
+            "event": "webinar_completion",
+            "timestamp": datetime.utcnow().isoformat(),
+            "participant": {
+                "id": participant.id,
+                "user_id": participant.user_id,
+                "webinar_id": participant.webinar_id,
+                "webinar_title": webinar.title,
+                "enrollment_date": participant.enrollment_date.isoformat() if participant.enrollment_date else None,
+                "completion_date": datetime.utcnow().isoformat(),
+                "total_days": webinar.duration_days
+            }
+        }
     
     def send_completion_event(self, participant_id: int) -> bool:
         """
@@ -188,34 +222,22 @@ class N8nIntegration:
             bool: True if successful, False otherwise
         """
         try:
-            session = self.Session()
+            session = self.shards.sessions_for_row(participant_id)[1]()
             
             # Get participant data
             participant = session.query(Participant).filter_by(id=participant_id).first()
             if not participant:
-                print(f"Participant with ID {participant_id} not found")
+                logger.warning("Participant not found", extra={"participant_id": participant_id})
                 return False
             
             # Get webinar data
             webinar = session.query(Webinar).filter_by(id=participant.webinar_id).first()
             if not webinar:
-                print(f"Webinar with ID {participant.webinar_id} not found")
+                logger.warning("Webinar not found", extra={"webinar_id": participant.webinar_id})
                 return False
             
             # Prepare data payload
-            payload = {
-                "event": "webinar_completion",
-                "timestamp": datetime.utcnow().isoformat(),
-                "participant": {
-                    "id": participant.id,
-                    "user_id": participant.user_id,
-                    "webinar_id": participant.webinar_id,
-                    "webinar_title": webinar.title,
-                    "enrollment_date": participant.enrollment_date.isoformat() if participant.enrollment_date else None,
-                    "completion_date": datetime.utcnow().isoformat(),
-                    "total_days": webinar.duration_days
-                }
-            }
+            payload = self._completion_payload(participant, webinar)
             
             # Send to n8n
             if self.n8n_webhook_url:
@@ -226,18 +248,52 @@ class N8nIntegration:
                     timeout=30
                 )
                 response.raise_for_status()
-                print(f"Successfully sent completion event for participant {participant_id}")
+                logger.info("Sent completion event to n8n", extra={"participant_id": participant_id})
                 return True
             else:
-                print("n8n webhook URL not configured")
+                logger.debug("n8n webhook URL not configured")
                 return False
                 
         except Exception as e:
-            print(f"Error sending completion event to n8n: {e}")
+            logger.error("Error sending completion event to n8n: %s", e, extra={"participant_id": participant_id})
             return False
         finally:
             session.close()
     
+    def deliver_event(self, payload: Dict[str, Any]) -> bool:
+        """
+        Post an event from the webhook_jobs outbox to n8n
+        
+        A "participant_progress" job only holds the participant id; its
+        payload (with all responses) is built here, off the request path.
+        
+        Args:
+            payload: Event payload
+            
+        Returns:
+            bool: True if sent, False if no webhook URL is configured or the
+                participant of a progress event no longer exists
+            
+        Raises:
+            requests.RequestException: If n8n did not accept the event (the job is retried)
+        """
+        if not self.n8n_webhook_url:
+            logger.debug("n8n webhook URL not configured")
+            return False
+        if payload.get("event") == "participant_progress" and "participant" not in payload:
+            payload = self._progress_payload(payload["participant_id"])
+            if payload is None:
+                return False
+        response = requests.post(
+            self.n8n_webhook_url,
+            headers=self.headers,
+            data=json.dumps(payload),
+            timeout=30
+        )
+        response.raise_for_status()
+        logger.info("Sent event to n8n", extra={"event": payload.get("event")})
+        return True
+    
     def receive_enrollment_data(self, enrollment_data: Dict[str, Any]) -> bool:
         """
         Receive enrollment data from n8n and create participant record
@@ -247,9 +303,12 @@ class N8nIntegration:
             
         Returns:
             bool: True if successful, False otherwise
+            
+        Raises:
+            TRANSIENT_ERRORS: Locked database or lost connection, worth retrying
         """
         try:
-            session = self.Session()
+            session = self.shards.sessions(enrollment_data.get("webinar_id"))[0]()
             
             # Extract data
             user_id = enrollment_data.get("user_id")
@@ -257,7 +316,7 @@ class N8nIntegration:
             enrollment_date = enrollment_data.get("enrollment_date")
             
             if not user_id or not webinar_id:
-                print("Missing required enrollment data")
+                logger.warning("Missing required enrollment data")
                 return False
             
             # Check if participant already exists
@@ -267,7 +326,7 @@ class N8nIntegration:
             ).first()
             
             if existing_participant:
-                print(f"Participant already enrolled in webinar {webinar_id}")
+                logger.info("Participant already enrolled", extra={"user_id": user_id, "webinar_id": webinar_id, "sampled": True})
                 return True
             
             # Create new participant
@@ -280,39 +339,132 @@ class N8nIntegration:
             )
             
             session.add(participant)
-            session.commit()
-            session.refresh(participant)
+            session.flush()
+            participant_id = participant.id
             
-            print(f"Successfully enrolled participant {participant.id} in webinar {webinar_id}")
-            
-            # Send confirmation back to n8n
-            confirmation_payload = {
+            # Confirmation for n8n, queued with the enrollment
+            self._commit_with_events(session, [{
                 "event": "enrollment_confirmation",
                 "timestamp": datetime.utcnow().isoformat(),
-                "participant_id": participant.id,
+                "participant_id": participant_id,
                 "user_id": user_id,
                 "webinar_id": webinar_id
-            }
+            }])
             
-            if self.n8n_webhook_url:
+            logger.info("Enrolled participant", extra={"participant_id": participant_id, "webinar_id": webinar_id, "sampled": True})
+            
+            return True
+            
+        except TRANSIENT_ERRORS:
+            # Retried by the caller (e.g. the webhook job workers)
+            raise
+        except Exception as e:
+            logger.error("Error receiving enrollment data from n8n: %s", e, exc_info=True)
+            return False
+        finally:
+            session.close()
+    
+    def bulk_enroll(self, enrollments: List[Dict[str, Any]]) -> Optional[Dict[str, int]]:
+        """
+        Enroll many participants in one transaction per database file
+        
+        Existing (user_id, webinar_id) pairs are found with one set lookup per
+        webinar and skipped, the rest are written with COPY on PostgreSQL or
+        chunked multi-row inserts elsewhere, and a single batched
+        confirmation event is sent to n8n. Sharded webinars are written to
+        their own files (see webinar_shards.py), so re-running a partly
+        failed batch only enrolls what is missing.
+        
+        Args:
+            enrollments: Enrollment dicts with user_id, webinar_id and optional
+                enrollment_date (ISO format)
+            
+        Returns:
+            Optional[Dict]: Counts of enrolled and skipped records, or None on failure
+        """
+        try:
+            now = datetime.utcnow()
+            requested = {}
+            for enrollment in enrollments:
+                user_id = enrollment.get("user_id")
+                webinar_id = enrollment.get("webinar_id")
+                if not user_id or not webinar_id:
+                    continue
+                requested.setdefault((user_id, webinar_id), enrollment.get("enrollment_date"))
+            
+            by_webinar = {}
+            for user_id, webinar_id in requested:
+                by_webinar.setdefault(webinar_id, []).append(user_id)
+            
+            by_database = {}
+            for webinar_id in by_webinar:
+                by_database.setdefault(self.shards.sessions(webinar_id)[0], []).append(webinar_id)
+            
+            rows = []
+            for Session, webinar_ids in by_database.items():
+                session = Session()
+                try:
+                    existing = set()
+                    for webinar_id in webinar_ids:
+                        user_ids = by_webinar[webinar_id]
+                        for start in range(0, len(user_ids), 500):
+                            existing.update(session.query(Participant.user_id, Participant.webinar_id).filter(
+                                Participant.webinar_id == webinar_id,
+                                Participant.user_id.in_(user_ids[start:start + 500])
+                            ).all())
+                    
+                    database_rows = [
+                        {
+                            "user_id": user_id,
+                            "webinar_id": webinar_id,
+                            "enrollment_date": datetime.fromisoformat(requested[(user_id, webinar_id)])
+                                if requested[(user_id, webinar_id)] else now,
+                            "completion_status": "enrolled",
+                            "current_day": 1,
+                            "created_at": now,
+                            "updated_at": now
+                        }
+                        for webinar_id in webinar_ids
+                        for user_id in by_webinar[webinar_id]
+                        if (user_id, webinar_id) not in existing
+                    ]
+                    copy_rows(session.connection(), Participant, database_rows)
+                    session.commit()
+                    rows.extend(database_rows)
+                except Exception:
+                    session.rollback()
+                    raise
+                finally:
+                    session.close()
+            enrolled = len(rows)
+            
+            summary = {"enrolled": enrolled, "skipped": len(enrollments) - enrolled}
+            logger.info("Bulk enrolled participants", extra=summary)
+            
+            if enrolled and self.n8n_webhook_url:
+                payload = {
+                    "event": "enrollment_confirmation_batch",
+                    "timestamp": now.isoformat(),
+                    "enrollments": [
+                        {"user_id": row["user_id"], "webinar_id": row["webinar_id"]} for row in rows
+                    ]
+                }
                 try:
                     response = requests.post(
                         self.n8n_webhook_url,
                         headers=self.headers,
-                        data=json.dumps(confirmation_payload),
+                        data=json.dumps(payload),
                         timeout=30
                     )
                     response.raise_for_status()
                 except Exception as e:
-                    print(f"Warning: Could not send enrollment confirmation to n8n: {e}")
+                    logger.warning("Could not send enrollment confirmation batch to n8n: %s", e)
             
-            return True
+            return summary
             
         except Exception as e:
-            print(f"Error receiving enrollment data from n8n: {e}")
-            return False
-        finally:
-            session.close()
+            logger.error("Error bulk enrolling participants: %s", e, exc_info=True)
+            return None
     
     def receive_content_update(self, content_data: Dict[str, Any]) -> bool:
         """
@@ -323,17 +475,21 @@ class N8nIntegration:
             
         Returns:
             bool: True if successful, False otherwise
+            
+        Raises:
+            TRANSIENT_ERRORS: Locked database or lost connection, worth retrying
         """
         try:
-            session = self.Session()
+            session = self.shards.sessions(content_data.get("webinar_id"))[0]()
             
             # Extract data
             webinar_id = content_data.get("webinar_id")
             day_number = content_data.get("day_number")
             updated_content = content_data.get("content")
+            updated_questions = content_data.get("questions")
             
             if not webinar_id or not day_number or not updated_content:
-                print("Missing required content update data")
+                logger.warning("Missing required content update data")
                 return False
             
             # Find the webinar day
@@ -343,24 +499,115 @@ class N8nIntegration:
             ).first()
             
             if not webinar_day:
-                print(f"Webinar day {day_number} for webinar {webinar_id} not found")
+                logger.warning("Webinar day not found", extra={"webinar_id": webinar_id, "day_number": day_number})
                 return False
             
             # Update content
             webinar_day.content = json.dumps(updated_content)
             webinar_day.updated_at = datetime.utcnow()
             
+            # Questions are replaced as a whole and mirrored into the questions table
+            if updated_questions is not None:
+                webinar_day.questions = json.dumps(updated_questions)
+                question_catalog.sync_day_questions(session.connection(), webinar_day.id, updated_questions)
+            
             session.commit()
+            self.shards.snapshot(webinar_id).invalidate()
             
-            print(f"Successfully updated content for webinar {webinar_id}, day {day_number}")
+            logger.info("Updated webinar day content", extra={"webinar_id": webinar_id, "day_number": day_number})
             return True
             
+        except TRANSIENT_ERRORS:
+            # Retried by the caller (e.g. the webhook job workers)
+            raise
         except Exception as e:
-            print(f"Error receiving content update from n8n: {e}")
+            logger.error("Error receiving content update from n8n: %s", e, exc_info=True)
             return False
         finally:
             session.close()
     
+    def iter_daily_reminder_data(self, shard: Tuple[int, int] = None, after_id: int = 0,
+                                 batch_size: int = 500) -> Iterator[Dict]:
+        """
+        Yield daily reminder data one participant at a time
+        
+        Uses a single joined query read through a server-side cursor
+        (stream_results + yield_per), so memory stays constant regardless of
+        enrollment and the first reminder is available immediately. The last
+        response time is a correlated lookup on the
+        (participant_id, response_timestamp) index. Per-webinar shard files
+        are read after the shared file; their ids are larger, so the stream
+        stays in participant id order.
+        
+        Args:
+            shard: Optional (shard, shard_count) slice, see dispatch_shards
+            after_id: Only participants with a greater id (resume cursor)
+            batch_size: Rows fetched from the cursor per round trip
+            
+        Yields:
+            Dict: Participant data for one reminder, in participant id order
+        """
+        after_id = after_id or 0
+        for webinar_id, _, ReadSession in self.shards.all_sessions():
+            # Everything in this file was already delivered
+            if webinar_id and after_id >= webinar_shards.id_base(webinar_id + 1):
+                continue
+            yield from self._iter_reminder_rows(ReadSession, shard, after_id, batch_size)
+    
+    def _iter_reminder_rows(self, ReadSession, shard: Optional[Tuple[int, int]], after_id: int,
+                            batch_size: int) -> Iterator[Dict]:
+        session = ReadSession()
+        try:
+            now = datetime.utcnow()
+            dialect = session.bind.dialect.name
+            completion_status = pacing.completion_status_expr(dialect, now)
+            last_response_at = session.query(
+                func.max(Response.response_timestamp)
+            ).filter(
+                Response.participant_id == Participant.id
+            ).correlate(Participant).scalar_subquery()
+            
+            # Get participants who need reminders (not completed, not on current day);
+            # for time-paced webinars completion is derived from the calendar
+            query = session.query(
+                Participant.id,
+                Participant.user_id,
+                Participant.webinar_id,
+                Participant.enrollment_date,
+                Webinar.title.label("webinar_title"),
+                pacing.current_day_expr(dialect, now).label("current_day"),
+                completion_status.label("completion_status"),
+                last_response_at.label("last_response_at")
+            ).join(
+                Webinar, Webinar.id == Participant.webinar_id
+            ).filter(
+                completion_status != "completed",
+                Participant.id > after_id
+            )
+            if shard is not None:
+                query = query.filter(shard_filter(Participant.id, *shard))
+            query = query.order_by(
+                Participant.id
+            ).execution_options(stream_results=True).yield_per(batch_size)
+            
+            for row in query:
+                # Remind if they haven't responded in 24 hours, or (no responses yet)
+                # if they enrolled more than 1 day ago
+                reference = row.last_response_at or row.enrollment_date
+                if reference is None or (now - reference).days < 1:
+                    continue
+                
+                yield {
+                    "participant_id": row.id,
+                    "user_id": row.user_id,
+                    "webinar_id": row.webinar_id,
+                    "webinar_title": row.webinar_title,
+                    "current_day": row.current_day,
+                    "completion_status": row.completion_status
+                }
+        finally:
+            session.close()
+    
     def send_daily_reminder_data(self) -> List[Dict]:
         """
         Get data for daily reminders to send to n8n
@@ -369,54 +616,136 @@ class N8nIntegration:
             List[Dict]: List of participant data for reminders
         """
         try:
-            session = self.Session()
+            return list(self.iter_daily_reminder_data())
+        except Exception as e:
+            logger.error("Error getting reminder data: %s", e, exc_info=True)
+            return []
+    
+    def get_dispatch_cursor(self, job: str, run_key: str, shard: Tuple[int, int]) -> int:
+        """
+        Get the last acknowledged participant id of a work shard
+        
+        Args:
+            job: Job name (e.g. "reminders")
+            run_key: Run identifier
+            shard: (shard, shard_count)
             
-            # Get participants who need reminders (not completed, not on current day)
-            participants = session.query(Participant).filter(
-                Participant.completion_status != "completed"
-            ).all()
+        Returns:
+            int: Participant id to resume after (0 if the shard has not started)
+        """
+        session = self.ReadSession()
+        try:
+            cursor = session.query(DispatchCursor.last_participant_id).filter_by(
+                job=job, run_key=run_key, shard=shard[0], shard_count=shard[1]
+            ).first()
+            return cursor[0] if cursor and cursor[0] else 0
+        finally:
+            session.close()
+    
+    def ack_dispatch_cursor(self, job: str, run_key: str, shard: Tuple[int, int], last_participant_id: int) -> int:
+        """
+        Record that a work shard has processed everything up to a participant
+        
+        Cursors only move forward, so a late or repeated acknowledgement
+        cannot rewind a shard. The row is created with INSERT ... ON CONFLICT
+        DO NOTHING, so concurrent first acknowledgements do not collide.
+        
+        Args:
+            job: Job name (e.g. "reminders")
+            run_key: Run identifier
+            shard: (shard, shard_count)
+            last_participant_id: Last participant id that was processed
             
-            reminder_data = []
-            for participant in participants:
-                # Get webinar
-                webinar = session.query(Webinar).filter_by(id=participant.webinar_id).first()
-                if not webinar:
-                    continue
-                
-                # Check if participant should receive reminder
-                # (e.g., if they haven't responded in 24 hours)
-                last_response = session.query(Response).filter_by(
-                    participant_id=participant.id
-                ).order_by(Response.response_timestamp.desc()).first()
-                
-                should_remind = False
-                if not last_response:
-                    # No responses yet, remind if enrolled more than 1 day ago
-                    if (datetime.utcnow() - participant.enrollment_date).days >= 1:
-                        should_remind = True
-                else:
-                    # Check if last response was more than 24 hours ago
-                    if (datetime.utcnow() - last_response.response_timestamp).days >= 1:
-                        should_remind = True
-                
-                if should_remind:
-                    reminder_data.append({
-                        "participant_id": participant.id,
-                        "user_id": participant.user_id,
-                        "webinar_id": participant.webinar_id,
-                        "webinar_title": webinar.title,
-                        "current_day": participant.current_day,
-                        "completion_status": participant.completion_status
-                    })
+        Returns:
+            int: The stored cursor after the update
+        """
+        session = self.Session()
+        try:
+            key = {"job": job, "run_key": run_key, "shard": shard[0], "shard_count": shard[1]}
+            now = datetime.utcnow()
+            connection = session.connection()
+            upsert(connection, DispatchCursor, [dict(key, last_participant_id=0, created_at=now, updated_at=now)],
+                   index_elements=["job", "run_key", "shard", "shard_count"])
+            session.query(DispatchCursor).filter_by(**key).filter(
+                DispatchCursor.last_participant_id < last_participant_id
+            ).update({
+                DispatchCursor.last_participant_id: last_participant_id,
+                DispatchCursor.updated_at: now
+            }, synchronize_session=False)
+            stored = session.query(DispatchCursor.last_participant_id).filter_by(**key).scalar()
+            session.commit()
+            return stored
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
+    def set_webinar_pacing(self, webinar_id: int, pacing_mode: str) -> bool:
+        """
+        Switch a webinar between self-paced and time-paced progress
+        
+        Args:
+            webinar_id: ID of the webinar
+            pacing_mode: One of pacing.PACING_MODES
             
-            return reminder_data
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if pacing_mode not in pacing.PACING_MODES:
+            logger.warning("Unknown pacing mode", extra={"pacing_mode": pacing_mode})
+            return False
+        
+        session = self.Session()
+        try:
+            webinar = session.query(Webinar).filter_by(id=webinar_id).first()
+            if not webinar:
+                logger.warning("Webinar not found", extra={"webinar_id": webinar_id})
+                return False
+            
+            webinar.pacing_mode = pacing_mode
+            webinar.updated_at = datetime.utcnow()
+            session.commit()
+            
+            logger.info("Set webinar pacing", extra={"webinar_id": webinar_id, "pacing_mode": pacing_mode})
+            return True
             
         except Exception as e:
-            print(f"Error getting reminder data: {e}")
-            return []
+            session.rollback()
+            logger.error("Error setting webinar pacing: %s", e, extra={"webinar_id": webinar_id}, exc_info=True)
+            return False
         finally:
             session.close()
     
+    def reminder_watermark(self) -> Tuple:
+        """
+        Get a cheap watermark for the reminder list, used as its ETag source
+        
+        Reminder eligibility also depends on the clock (24 hours since the last
+        response), so the watermark includes the current time bucket; the
+        bucket size is REMINDER_ETAG_BUCKET_SECONDS (default 60).
+        
+        Returns:
+            Tuple: Participant and response watermarks of every database
+                file, the webinar watermark and the time bucket
+        """
+        bucket_seconds = max(int(os.getenv("REMINDER_ETAG_BUCKET_SECONDS", "60")), 1)
+        watermark = []
+        for webinar_id, _, ReadSession in self.shards.all_sessions():
+            session = ReadSession()
+            try:
+                participants = session.query(
+                    func.count(Participant.id), func.max(Participant.updated_at), func.max(Participant.id)
+                ).one()
+                responses = session.query(func.count(Response.id), func.max(Response.id)).one()
+                watermark.extend([tuple(participants), tuple(responses)])
+                if not webinar_id:
+                    watermark.append(tuple(session.query(func.count(Webinar.id), func.max(Webinar.updated_at)).one()))
+            finally:
+                session.close()
+        bucket = int(datetime.utcnow().timestamp()) // bucket_seconds
+        return tuple(watermark) + (bucket,)
+    
     def update_participant_progress(self, participant_id: int, day_completed: int) -> bool:
         """
         Update participant progress based on data from n8n
@@ -427,53 +756,519 @@ class N8nIntegration:
             
         Returns:
             bool: True if successful, False otherwise
+            
+        Raises:
+            TRANSIENT_ERRORS: Locked database or lost connection, worth retrying
         """
         try:
-            session = self.Session()
+            session = self.shards.sessions_for_row(participant_id)[0]()
             
             # Get participant
             participant = session.query(Participant).filter_by(id=participant_id).first()
             if not participant:
-                print(f"Participant with ID {participant_id} not found")
+                logger.warning("Participant not found", extra={"participant_id": participant_id})
                 return False
             
             # Get webinar
             webinar = session.query(Webinar).filter_by(id=participant.webinar_id).first()
             if not webinar:
-                print(f"Webinar with ID {participant.webinar_id} not found")
+                logger.warning("Webinar not found", extra={"webinar_id": participant.webinar_id})
                 return False
             
+            # The progress event is built by the webhook worker that sends it
+            progress_event = {"event": "participant_progress", "participant_id": participant_id}
+            
+            # Time-paced progress is derived from the calendar, nothing to store
+            if pacing.is_paced(webinar):
+                self._commit_with_events(session, [progress_event])
+                return True
+            
             # Update progress
             if day_completed >= participant.current_day:
                 participant.current_day = day_completed + 1
+                events = []
                 
                 # Check if webinar is completed
                 if participant.current_day > webinar.duration_days:
                     participant.completion_status = "completed"
                     participant.current_day = webinar.duration_days
-                    
-                    # Send completion event
-                    self.send_completion_event(participant_id)
+                    events.append(self._completion_payload(participant, webinar))
                 else:
                     participant.completion_status = "in_progress"
                 
                 participant.updated_at = datetime.utcnow()
-                session.commit()
+                current_day = participant.current_day
+                events.append(progress_event)
+                self._commit_with_events(session, events)
                 
-                print(f"Updated progress for participant {participant_id} to day {participant.current_day}")
-                
-                # Send progress update to n8n
-                self.send_participant_progress(participant_id)
+                logger.info("Updated participant progress", extra={"participant_id": participant_id, "current_day": current_day, "sampled": True})
                 
                 return True
             
             return False
             
+        except TRANSIENT_ERRORS:
+            # Retried by the caller (e.g. the webhook job workers)
+            raise
+        except Exception as e:
+            logger.error("Error updating participant progress: %s", e, extra={"participant_id": participant_id}, exc_info=True)
+            return False
+        finally:
+            session.close()
+
+    def journal_progress_update(self, participant_id: int, day_completed: int) -> bool:
+        """
+        Record a progress update to be applied by the progress coalescer
+        
+        Args:
+            participant_id: ID of the participant
+            day_completed: Day that was completed
+            
+        Returns:
+            bool: True if the update was journaled, False otherwise
+            
+        Raises:
+            TRANSIENT_ERRORS: Locked database or lost connection, worth retrying
+        """
+        session = self.Session()
+        try:
+            session.add(ProgressJournal(participant_id=participant_id, day_completed=day_completed))
+            session.commit()
+            return True
+        except TRANSIENT_ERRORS:
+            # Retried by the caller (e.g. the webhook job workers)
+            raise
         except Exception as e:
-            print(f"Error updating participant progress: {e}")
+            session.rollback()
+            logger.error("Error journaling progress update: %s", e, extra={"participant_id": participant_id}, exc_info=True)
             return False
         finally:
             session.close()
+    
+    def flush_progress_journal(self, batch_size: int = 5000) -> Optional[Dict[str, Any]]:
+        """
+        Apply journaled progress updates (see progress_coalescer.py)
+        
+        Takes up to batch_size journal entries, keeps the highest
+        day_completed per participant and applies them with one batched
+        UPDATE per database file using the same rules as
+        update_participant_progress. The journal entries are deleted in the
+        transaction of the shared file, which also adds one batched
+        "participants_progress" event for n8n to the webhook_jobs outbox.
+        Per-webinar shard files commit their updates first, so entries can
+        be applied again after a crash; a participant already at the
+        journaled day is not changed again and not reported again.
+        
+        Args:
+            batch_size: Journal entries applied in this transaction
+            
+        Returns:
+            Optional[Dict]: Numbers of entries and updated participants,
+                completed participant IDs and whether an event was queued, or
+                None if the flush failed
+        """
+        session = self.Session()
+        try:
+            query = session.query(
+                ProgressJournal.id, ProgressJournal.participant_id, ProgressJournal.day_completed
+            ).order_by(ProgressJournal.id).limit(batch_size)
+            if self.engine.dialect.name == "postgresql":
+                # Concurrent flushers (one per worker process) take disjoint batches
+                query = query.with_for_update(skip_locked=True)
+            entries = query.all()
+            if not entries:
+                session.rollback()
+                return {"entries": 0, "updated": 0, "completed": [], "event_queued": False}
+            
+            latest: Dict[int, int] = {}
+            for entry in entries:
+                latest[entry.participant_id] = max(latest.get(entry.participant_id, entry.day_completed), entry.day_completed)
+            
+            now = datetime.utcnow()
+            by_database: Dict[Any, Dict[int, int]] = {}
+            for participant_id, day_completed in latest.items():
+                by_database.setdefault(self.shards.sessions_for_row(participant_id)[0], {})[participant_id] = day_completed
+            
+            updated = 0
+            progress = []
+            completed = []
+            for Session, participant_days in by_database.items():
+                # Shared-file updates commit together with the journal deletion;
+                # shard updates commit first and are re-applied as a no-op after a crash
+                target = session if Session is self.shards.shared[0] else Session()
+                try:
+                    result = self._apply_progress(target, participant_days, now)
+                    if target is not session:
+                        target.commit()
+                except Exception:
+                    if target is not session:
+                        target.rollback()
+                    raise
+                finally:
+                    if target is not session:
+                        target.close()
+                updated += result[0]
+                progress.extend(result[1])
+                completed.extend(result[2])
+            
+            for entry_ids in chunked((entry.id for entry in entries), 500):
+                session.query(ProgressJournal).filter(
+                    ProgressJournal.id.in_(entry_ids)
+                ).delete(synchronize_session=False)
+            
+            # Queued in the outbox with the journal deletion, posted by the webhook workers
+            event_queued = bool(progress and self.n8n_webhook_url)
+            if event_queued:
+                webhook_jobs.add_job(session, "participants_progress", {
+                    "event": "participants_progress",
+                    "timestamp": now.isoformat(),
+                    "participants": progress,
+                    "completed_participant_ids": completed
+                })
+            session.commit()
+            if event_queued and self.on_events_queued:
+                self.on_events_queued()
+            
+            summary = {"entries": len(entries), "updated": updated, "completed": completed, "event_queued": event_queued}
+            logger.info("Flushed progress journal", extra={
+                "entries": summary["entries"],
+                "updated": summary["updated"],
+                "completed": len(completed)
+            })
+            
+            return summary
+            
+        except Exception as e:
+            session.rollback()
+            logger.error("Error flushing progress journal: %s", e, exc_info=True)
+            return None
+        finally:
+            session.close()
+
+    def _apply_progress(self, session, participant_days: Dict[int, int], now: datetime) -> Tuple[int, List[Dict], List[int]]:
+        """Apply the highest completed day of each participant in one database file
+
+        Returns the number of changed participants, their progress (plus that
+        of time-paced participants) and the IDs that completed the webinar.
+        """
+        updates = []
+        progress = []
+        completed = []
+        paced = set()
+        for participant_ids in chunked(participant_days, 500):
+            rows = session.query(Participant, Webinar).join(
+                Webinar, Webinar.id == Participant.webinar_id
+            ).filter(Participant.id.in_(participant_ids)).all()
+            for participant, webinar in rows:
+                day_completed = participant_days.pop(participant.id)
+                if pacing.is_paced(webinar):
+                    # Time-paced progress is derived from the calendar, nothing to store
+                    current_day, completion_status = pacing.effective_progress(participant, webinar)
+                    paced.add(participant.id)
+                elif day_completed >= participant.current_day:
+                    current_day = day_completed + 1
+                    completion_status = "in_progress"
+                    if current_day > webinar.duration_days:
+                        current_day = webinar.duration_days
+                        completion_status = "completed"
+                        completed.append(participant.id)
+                    updates.append({
+                        "participant_id": participant.id,
+                        "day_completed": day_completed,
+                        "new_day": current_day,
+                        "new_status": completion_status
+                    })
+                else:
+                    continue
+                progress.append({
+                    "id": participant.id,
+                    "user_id": participant.user_id,
+                    "webinar_id": participant.webinar_id,
+                    "webinar_title": webinar.title,
+                    "completion_status": completion_status,
+                    "current_day": current_day,
+                    "total_days": webinar.duration_days,
+                    "progress_percentage": (current_day / webinar.duration_days) * 100 if webinar.duration_days else 0
+                })
+        for participant_id in participant_days:
+            logger.warning("Participant not found", extra={"participant_id": participant_id})
+        
+        changed = set()
+        if updates:
+            participants = Participant.__table__
+            # The day guard keeps a concurrent advance from being undone; rows
+            # already holding the new values (a replayed journal entry) are left alone
+            session.execute(
+                participants.update().where(
+                    participants.c.id == bindparam("participant_id"),
+                    participants.c.current_day <= bindparam("day_completed"),
+                    or_(
+                        participants.c.current_day != bindparam("new_day"),
+                        func.coalesce(participants.c.completion_status, "") != bindparam("new_status")
+                    )
+                ).values(
+                    current_day=bindparam("new_day"),
+                    completion_status=bindparam("new_status"),
+                    updated_at=now
+                ),
+                updates
+            )
+            # Only rows stamped by this UPDATE changed
+            for participant_ids in chunked([update["participant_id"] for update in updates], 500):
+                changed.update(participant_id for participant_id, in session.query(Participant.id).filter(
+                    Participant.id.in_(participant_ids), Participant.updated_at == now
+                ))
+        progress = [entry for entry in progress if entry["id"] in changed or entry["id"] in paced]
+        completed = [participant_id for participant_id in completed if participant_id in changed]
+        return len(changed), progress, completed
+    
+    def advance_webinar_participants(self, webinar_id: int, require_responses: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Advance every eligible participant of a webinar by one day
+        
+        Selects the eligible participants once, then advances them with
+        set-based UPDATEs by id instead of one read-modify-write per
+        participant; each UPDATE re-checks the day that was read, so
+        overlapping calls advance a participant once. Participants who move
+        past the last day are marked completed by the same statement, and
+        one batched event for the whole webinar is queued in the
+        webhook_jobs outbox with the changes. A missing duration counts as
+        one day (see pacing.total_days).
+        
+        Args:
+            webinar_id: ID of the webinar
+            require_responses: Only advance participants who answered at least
+                one question of their current day; only the hot responses
+                table is checked, so participants whose answers were all
+                archived (inactive for the whole hot window) are not advanced
+            
+        Returns:
+            Optional[Dict]: Summary with advanced and completed participant IDs,
+                or None if the webinar does not exist or the update failed
+        """
+        session = self.shards.sessions(webinar_id)[0]()
+        try:
+            webinar = session.query(Webinar).filter_by(id=webinar_id).first()
+            if not webinar:
+                logger.warning("Webinar not found", extra={"webinar_id": webinar_id})
+                return None
+            
+            if pacing.is_paced(webinar):
+                logger.info("Webinar is time-paced, progress is derived on read", extra={"webinar_id": webinar_id})
+                return {"webinar_id": webinar_id, "advanced": [], "completed": []}
+            
+            duration = pacing.total_days(webinar)
+            now = datetime.utcnow()
+            current_day = func.coalesce(Participant.current_day, 1)
+            next_day = current_day + 1
+            
+            query = session.query(Participant.id, current_day.label("current_day")).filter(
+                Participant.webinar_id == webinar_id,
+                Participant.completion_status != "completed"
+            )
+            if require_responses:
+                answered_current_day = session.query(Response.id).join(
+                    WebinarDay, WebinarDay.id == Response.day_id
+                ).filter(
+                    Response.participant_id == Participant.id,
+                    WebinarDay.webinar_id == webinar_id,
+                    WebinarDay.day_number == Participant.current_day
+                ).exists()
+                query = query.filter(answered_current_day)
+            eligible = query.order_by(Participant.id).all()
+            
+            by_day: Dict[int, List[int]] = {}
+            for row in eligible:
+                by_day.setdefault(row.current_day, []).append(row.id)
+            
+            advanced = []
+            for day, day_ids in by_day.items():
+                for participant_ids in chunked(day_ids, 500):
+                    # The day read above must still be current: a concurrent
+                    # advance or progress flush must not be applied twice.
+                    # SET expressions see the pre-update row, so both CASEs test the old day
+                    count = session.query(Participant).filter(
+                        Participant.id.in_(participant_ids),
+                        current_day == day,
+                        Participant.completion_status != "completed"
+                    ).update({
+                        Participant.completion_status: case((next_day > duration, "completed"), else_="in_progress"),
+                        Participant.current_day: case((next_day > duration, duration), else_=next_day),
+                        Participant.updated_at: now
+                    }, synchronize_session=False)
+                    if count < len(participant_ids):
+                        # Rows stamped with this call's updated_at are the ones it advanced
+                        participant_ids = [row.id for row in session.query(Participant.id).filter(
+                            Participant.id.in_(participant_ids),
+                            Participant.updated_at == now
+                        )]
+                    advanced.extend((participant_id, day) for participant_id in participant_ids)
+            advanced.sort()
+            
+            summary = {
+                "webinar_id": webinar_id,
+                "advanced": [participant_id for participant_id, _ in advanced],
+                "completed": [participant_id for participant_id, day in advanced if day + 1 > duration]
+            }
+            events = [{
+                "event": "participants_advanced",
+                "timestamp": now.isoformat(),
+                "webinar_id": webinar_id,
+                "webinar_title": webinar.title,
+                "total_days": duration,
+                "advanced_participant_ids": summary["advanced"],
+                "completed_participant_ids": summary["completed"]
+            }] if advanced else []
+            self._commit_with_events(session, events)
+            
+            logger.info("Advanced participants", extra={
+                "webinar_id": webinar_id,
+                "advanced": len(summary["advanced"]),
+                "completed": len(summary["completed"])
+            })
+            
+            return summary
+            
+        except Exception as e:
+            session.rollback()
+            logger.error("Error advancing participants: %s", e, extra={"webinar_id": webinar_id}, exc_info=True)
+            return None
+        finally:
+            session.close()
+    
+    def score_webinar_days(self, webinar_id: int, day_number: int = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Score visual tests and aggregate answers of a webinar's days
+        
+        Statistics are computed with vectorized NumPy operations from the
+        read pool (see answer_scoring.py) and replace the day_answer_stats
+        rows of the scored days.
+        
+        Args:
+            webinar_id: ID of the webinar
+            day_number: Only score this day
+            
+        Returns:
+            Optional[List[Dict]]: Statistics per day, or None if the webinar
+                does not exist or scoring failed
+        """
+        read_session = self.shards.sessions(webinar_id)[1]()
+        session = self.Session()
+        try:
+            if not read_session.query(Webinar.id).filter(Webinar.id == webinar_id).first():
+                logger.warning("Webinar not found", extra={"webinar_id": webinar_id})
+                return None
+            query = read_session.query(WebinarDay).filter(WebinarDay.webinar_id == webinar_id)
+            if day_number is not None:
+                query = query.filter(WebinarDay.day_number == day_number)
+            now = datetime.utcnow()
+            rows = [answer_scoring.day_statistics(read_session, day, now) for day in query.order_by(WebinarDay.day_number)]
+            read_session.close()
+            
+            upsert(session.connection(), DayAnswerStats, rows, ["day_id"], update_columns=answer_scoring.STATS_COLUMNS)
+            session.commit()
+            logger.info("Scored webinar days", extra={"webinar_id": webinar_id, "days": len(rows)})
+            
+            # Days of a sharded webinar are not in the shared file, so no join here
+            stats = {
+                row.day_id: row for row in session.query(DayAnswerStats).filter(
+                    DayAnswerStats.day_id.in_([row["day_id"] for row in rows])
+                )
+            }
+            return [answer_scoring.stats_dict(stats[row["day_id"]]) for row in rows]
+        except Exception as e:
+            session.rollback()
+            logger.error("Error scoring webinar days: %s", e, extra={"webinar_id": webinar_id}, exc_info=True)
+            return None
+        finally:
+            read_session.close()
+            session.close()
+    
+    def archive_closed_responses(self, hot_months: int = None) -> Optional[Dict[str, Any]]:
+        """
+        Move responses of closed months out of the hot table
+        
+        Every month older than the hot window (RESPONSES_HOT_MONTHS, see
+        archive.py) is written to a compressed archive file and deleted from
+        the responses table, in the shared file and in every webinar shard.
+        Archived responses stay readable through archive.iter_responses.
+        
+        Args:
+            hot_months: Months to keep in the database, including the current one
+            
+        Returns:
+            Optional[Dict]: Archived months with row counts, or None on failure
+        """
+        try:
+            cutoff = archive.hot_cutoff(hot_months=hot_months)
+            archived = []
+            for webinar_id, Session, ReadSession in self.shards.all_sessions():
+                write_session = Session()
+                read_session = ReadSession()
+                try:
+                    for key in archive.closed_months(read_session, cutoff):
+                        result = archive.archive_month(write_session, read_session, key)
+                        if result:
+                            archived.append(result)
+                            logger.info("Archived responses", extra=dict(result, webinar_id=webinar_id or None))
+                finally:
+                    read_session.close()
+                    write_session.close()
+            return {"cutoff": cutoff.isoformat(), "archived": archived}
+        except Exception as e:
+            logger.error("Error archiving responses: %s", e, exc_info=True)
+            return None
+
+    def import_responses(self, lines: Iterable[str], file_format: str, chunk_size: int = None,
+                         progress: Callable[[Dict[str, Any]], None] = None) -> Optional[Dict[str, Any]]:
+        """
+        Bulk import responses collected by n8n bots
+        
+        Records are validated against participants and days, de-duplicated
+        on (participant_id, day_id, question_id) and written in chunks with
+        COPY on PostgreSQL (see response_import.py).
+        
+        Args:
+            lines: Lines of an NDJSON or CSV file
+            file_format: "ndjson" or "csv"
+            chunk_size: Records per chunk, defaults to response_import.DEFAULT_CHUNK_SIZE
+            progress: Called with the running summary after every chunk
+            
+        Returns:
+            Optional[Dict]: Import summary, or None on failure
+        """
+        session = self.Session()
+        # Sessions of the shard files records were routed to, opened on first use
+        shard_sessions = {}
+        
+        def route(participant_id: int):
+            Session = self.shards.sessions_for_row(participant_id)[0]
+            if Session is self.shards.shared[0]:
+                return session
+            if Session not in shard_sessions:
+                shard_sessions[Session] = Session()
+            return shard_sessions[Session]
+        
+        try:
+            summary = response_import.import_responses(
+                session,
+                response_import.iter_records(lines, file_format),
+                chunk_size=chunk_size or response_import.DEFAULT_CHUNK_SIZE,
+                progress=progress,
+                route=route if self.shards.enabled else None
+            )
+            logger.info("Imported responses", extra={
+                key: summary[key] for key in ("read", "inserted", "duplicates", "invalid", "rows_per_second")
+            })
+            return summary
+        except Exception as e:
+            session.rollback()
+            logger.error("Error importing responses: %s", e, exc_info=True)
+            return None
+        finally:
+            for shard_session in shard_sessions.values():
+                shard_session.close()
+            session.close()
 
 # Example usage
 if __name__ == "__main__":
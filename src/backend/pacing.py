@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Webinar pacing for NewDay Platform
+
+Self-paced webinars store each participant's progress in
+``Participant.current_day`` and advance it on n8n progress updates. For
+time-paced webinars the current day is a pure function of the calendar:
+
+- enrollment_paced: day 1 is the participant's enrollment date
+- cohort_paced: day 1 is ``Webinar.start_date`` (enrollment date if unset)
+
+For those, current day and completion status are computed on read, either
+in Python (``effective_progress``) or as SQL expressions joined against
+``webinars`` (``current_day_expr`` / ``completion_status_expr``), and
+nothing is written per participant per day. Both treat a missing
+``duration_days`` as one day and a missing anchor date as day 1,
+"enrolled", so reminders and the participant feed agree.
+"""
+
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import Integer, case, cast, func, literal
+from sqlalchemy.sql.expression import ColumnElement
+
+from models import Participant, Webinar
+
+SELF_PACED = "self_paced"
+ENROLLMENT_PACED = "enrollment_paced"
+COHORT_PACED = "cohort_paced"
+PACING_MODES = (SELF_PACED, ENROLLMENT_PACED, COHORT_PACED)
+
+
+def is_paced(webinar) -> bool:
+    """Check whether a webinar derives progress from the calendar"""
+    return (webinar.pacing_mode or SELF_PACED) != SELF_PACED
+
+
+def total_days(webinar) -> int:
+    """Duration of a webinar; NULL or 0 counts as a single day"""
+    return webinar.duration_days or 1
+
+
+def _anchor(participant, webinar) -> Optional[datetime]:
+    if webinar.pacing_mode == COHORT_PACED and webinar.start_date:
+        return webinar.start_date
+    return participant.enrollment_date
+
+
+def effective_progress(participant, webinar, now: datetime = None) -> Tuple[int, str]:
+    """
+    Get a participant's current day and completion status
+
+    Args:
+        participant: Participant row
+        webinar: The participant's webinar
+        now: Reference time (defaults to utcnow)
+
+    Returns:
+        Tuple[int, str]: (current_day, completion_status)
+    """
+    if not is_paced(webinar):
+        return participant.current_day, participant.completion_status
+
+    anchor = _anchor(participant, webinar)
+    if anchor is None:
+        return 1, "enrolled"
+    duration = total_days(webinar)
+    elapsed = ((now or datetime.utcnow()).date() - anchor.date()).days
+    current_day = min(max(elapsed + 1, 1), duration)
+    if elapsed >= duration:
+        return current_day, "completed"
+    if elapsed >= 1:
+        return current_day, "in_progress"
+    return current_day, "enrolled"
+
+
+def _days_elapsed_expr(dialect_name: str, now):
+    """Whole calendar days between the pacing anchor and now, as SQL"""
+    # now may also be a bindparam, so a statement can be built once and reused
+    now = now if isinstance(now, ColumnElement) else literal(now)
+    anchor = case(
+        (Webinar.pacing_mode == COHORT_PACED, func.coalesce(Webinar.start_date, Participant.enrollment_date)),
+        else_=Participant.enrollment_date
+    )
+    if dialect_name == "sqlite":
+        return cast(func.julianday(func.date(now)) - func.julianday(func.date(anchor)), Integer)
+    # PostgreSQL: date - date yields an integer number of days
+    return func.date(now) - func.date(anchor)
+
+
+def _total_days_expr():
+    """SQL counterpart of total_days"""
+    return func.coalesce(func.nullif(Webinar.duration_days, 0), 1)
+
+
+def _self_paced_expr():
+    return func.coalesce(Webinar.pacing_mode, SELF_PACED) == SELF_PACED
+
+
+def current_day_expr(dialect_name: str, now=None):
+    """
+    SQL expression for the effective current day
+
+    Requires ``participants`` joined with ``webinars`` in the query.
+    """
+    elapsed = _days_elapsed_expr(dialect_name, now if now is not None else datetime.utcnow())
+    duration = _total_days_expr()
+    return case(
+        (_self_paced_expr(), Participant.current_day),
+        (elapsed.is_(None), 1),
+        (elapsed + 1 > duration, duration),
+        (elapsed < 0, 1),
+        else_=elapsed + 1
+    )
+
+
+def completion_status_expr(dialect_name: str, now=None):
+    """
+    SQL expression for the effective completion status
+
+    Requires ``participants`` joined with ``webinars`` in the query.
+    """
+    elapsed = _days_elapsed_expr(dialect_name, now if now is not None else datetime.utcnow())
+    return case(
+        (_self_paced_expr(), Participant.completion_status),
+        (elapsed.is_(None), "enrolled"),
+        (elapsed >= _total_days_expr(), "completed"),
+        (elapsed >= 1, "in_progress"),
+        else_="enrolled"
+    )
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Participant endpoints for NewDay Platform
+
+Single-call views of a participant for the frontend and the n8n bot.
+"""
+
+from fastapi import APIRouter, HTTPException, Depends
+from datetime import datetime
+from sqlalchemy import DateTime, bindparam, func, select
+
+from models import Participant, Webinar, WebinarDay, Response
+from fast_json import FastJSONResponse
+from webinar_shards import get_shards
+import pacing
+
+router = APIRouter(prefix="/api/participants", tags=["participants"])
+
+shards = get_shards()
+
+def get_participant_db(participant_id: int):
+    """FastAPI dependency: read session on the database file holding the participant"""
+    db = shards.sessions_for_row(participant_id)[1]()
+    try:
+        yield db
+    finally:
+        db.close()
+
+_progress_statements = {}
+
+def _progress_statement(dialect_name: str):
+    """
+    Participant, webinar and effective progress in one query
+
+    Built once per dialect with `participant_id` and `now` as bind parameters,
+    so requests skip rebuilding the pacing expressions.
+    """
+    if dialect_name in _progress_statements:
+        return _progress_statements[dialect_name]
+    
+    now = bindparam("now", type_=DateTime)
+    current_day = pacing.current_day_expr(dialect_name, now)
+    answered_today = select(Response.id).join(
+        WebinarDay, WebinarDay.id == Response.day_id
+    ).where(
+        Response.participant_id == Participant.id,
+        WebinarDay.webinar_id == Participant.webinar_id,
+        WebinarDay.day_number == current_day
+    ).correlate(Participant, Webinar).exists()
+    last_response_at = select(
+        func.max(Response.response_timestamp)
+    ).where(
+        Response.participant_id == Participant.id
+    ).correlate(Participant).scalar_subquery()
+    
+    statement = select(
+        Participant.id,
+        Participant.user_id,
+        Participant.webinar_id,
+        Participant.enrollment_date,
+        Webinar.title.label("webinar_title"),
+        Webinar.duration_days,
+        Webinar.pacing_mode,
+        current_day.label("current_day"),
+        pacing.completion_status_expr(dialect_name, now).label("completion_status"),
+        answered_today.label("answered_today"),
+        last_response_at.label("last_response_at")
+    ).join(
+        Webinar, Webinar.id == Participant.webinar_id
+    ).where(
+        Participant.id == bindparam("participant_id")
+    )
+    _progress_statements[dialect_name] = statement
+    return statement
+
+@router.get("/{participant_id}/today", summary="Get a participant's content and progress for today")
+def get_participant_today(participant_id: int, db = Depends(get_participant_db)):
+    """
+    Get everything needed to show a participant their current day
+
+    Returns the current day's content, questions and visual tests (already parsed
+    from JSON) together with the participant's progress. Progress comes from one
+    query; day content is served from the in-memory content snapshot.
+    """
+    try:
+        row = db.execute(
+            _progress_statement(db.bind.dialect.name),
+            {"participant_id": participant_id, "now": datetime.utcnow()}
+        ).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Participant not found")
+        
+        duration = row.duration_days or 0
+        return FastJSONResponse({
+            "participant": {
+                "id": row.id,
+                "user_id": row.user_id,
+                "webinar_id": row.webinar_id,
+                "enrollment_date": row.enrollment_date
+            },
+            "webinar": {
+                "id": row.webinar_id,
+                "title": row.webinar_title,
+                "duration_days": row.duration_days,
+                "pacing_mode": row.pacing_mode or pacing.SELF_PACED
+            },
+            "progress": {
+                "current_day": row.current_day,
+                "total_days": row.duration_days,
+                "completion_status": row.completion_status,
+                "progress_percentage": (row.current_day / duration) * 100 if duration else 0,
+                "answered_today": bool(row.answered_today),
+                "last_response_at": row.last_response_at
+            },
+            "day": shards.snapshot(row.webinar_id).get_day(db, row.webinar_id, row.current_day)
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving participant feed: {str(e)}")
@@ -10,21 +10,22 @@ import os
 import sys
 import json
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 # Add the app directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
 # Import models from models.py
+from database import get_engines
 from models import Base, Webinar, WebinarDay, Participant, Response, VisualTest
+from question_catalog import backfill_day_questions
 
 def populate_webinar_content():
     """Populate the database with the 10-day webinar content"""
     
     # Database setup
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/newday_platform.db")
-    engine = create_engine(DATABASE_URL)
+    engine, _ = get_engines(DATABASE_URL)
     Base.metadata.create_all(engine)
     Session = sessionmaker(bind=engine)
     session = Session()
@@ -525,6 +526,10 @@ def populate_webinar_content():
         
         session.add(day10)
         
+        # Mirror the days' questions into the questions table
+        session.flush()
+        backfill_day_questions(session.connection(), webinar.id)
+        
         # Commit all changes
         session.commit()
         print("Successfully populated database with webinar content!")
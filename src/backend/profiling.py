@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Sampling CPU profiler for single requests
+
+``ProfilingMiddleware`` runs selected requests under a sampling profiler:
+
+- on demand: an admin sends ``X-Profile: 1`` (or ``?profile=1``) together
+  with the admin key in ``X-API-Key`` (ADMIN_API_KEY, falling back to
+  N8N_API_KEY; open when neither is set). The response carries an
+  ``X-Profile-Id`` header;
+- automatically: a random PROFILE_AUTO_RATE share of all requests is
+  profiled, and the profile is kept if the request took at least
+  PROFILE_SLOW_MS. The PROFILE_KEEP slowest of those are retained.
+
+While any profile is active, a background thread wakes every
+PROFILE_INTERVAL_MS and reads the stacks of all threads
+(``sys._current_frames``). A stack is counted for a request when the code
+is running in that request's context: handlers of ``def`` endpoints (and
+sync streaming generators) run in starlette's threadpool inside a copy of
+the request context, ``async`` code runs in asyncio callbacks bound to the
+request's task context. Both carry the profile in a context variable, so
+concurrent requests do not pollute each other's profiles.
+
+Profiles are kept in memory and served by /api/admin/profiles as folded
+stacks (``frame;frame;frame count`` per line), the input format of
+flamegraph.pl, inferno and speedscope.
+
+Environment variables:
+    PROFILE_INTERVAL_MS: Sampling interval (default 5)
+    PROFILE_AUTO_RATE: Share of requests profiled automatically (default 0.01, 0 disables)
+    PROFILE_SLOW_MS: Minimum duration of kept automatic profiles (default 500)
+    PROFILE_KEEP: Profiles retained per kind (default 20)
+"""
+
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import thread as futures_thread
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from asyncio import events as asyncio_events
+
+INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+AUTO_RATE = float(os.getenv("PROFILE_AUTO_RATE", "0.01"))
+SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "500"))
+KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+
+ON_DEMAND = "on_demand"
+AUTOMATIC = "automatic"
+
+_current_profile: contextvars.ContextVar = contextvars.ContextVar("current_profile", default=None)
+
+# Frames that enter a context on behalf of a request: threadpool work items
+# (fn is Context.run) and asyncio callbacks (self._context)
+_WORK_ITEM_CODE = futures_thread._WorkItem.run.__code__
+_HANDLE_CODE = asyncio_events.Handle._run.__code__
+
+
+class Profile:
+    """Sampled stacks of one request"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, method: str, path: str, trigger: str):
+        self.id = next(self._ids)
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.created_at = datetime.utcnow()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration_ms: Optional[float] = None
+        self.status_code: Optional[int] = None
+
+    def add(self, stack: str):
+        self.stacks[stack] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """Folded stacks, one "root;...;leaf count" line per distinct stack"""
+        root = f"{self.method} {self.path}"
+        return "".join(
+            f"{root};{stack} {count}\n" if stack else f"{root} {count}\n"
+            for stack, count in self.stacks.most_common()
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "status_code": self.status_code,
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+            "created_at": self.created_at.isoformat()
+        }
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _request_context(frame) -> Optional[contextvars.Context]:
+    """The context a frame of a request's work item or callback runs in"""
+    if frame.f_code is _WORK_ITEM_CODE:
+        entered = getattr(frame.f_locals.get("self"), "fn", None)
+        context = getattr(entered, "__self__", None)
+    elif frame.f_code is _HANDLE_CODE:
+        context = getattr(frame.f_locals.get("self"), "_context", None)
+    else:
+        return None
+    return context if isinstance(context, contextvars.Context) else None
+
+
+class Sampler:
+    """Background thread sampling all threads while profiles are active"""
+
+    def __init__(self, interval_ms: float = INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self):
+        with self._lock:
+            self._active += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+            self._wakeup.set()
+
+    def end(self):
+        with self._lock:
+            self._active -= 1
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while True:
+            if not self._active:
+                # Idle: cost nothing until the next profiled request
+                self._wakeup.clear()
+                self._wakeup.wait()
+                continue
+            for ident, frame in sys._current_frames().items():
+                if ident != own_ident:
+                    self._sample(frame)
+            time.sleep(self.interval)
+
+    def _sample(self, frame):
+        labels = []
+        while frame is not None:
+            context = _request_context(frame)
+            if context is not None:
+                profile = context.get(_current_profile)
+                if profile is not None:
+                    profile.add(";".join(reversed(labels)))
+                return
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+
+
+class ProfileStore:
+    """Retained profiles: the latest on-demand ones and the slowest automatic ones"""
+
+    def __init__(self, keep: int = KEEP):
+        self.keep = keep
+        self._on_demand: "OrderedDict[int, Profile]" = OrderedDict()
+        self._slowest: List = []  # min-heap of (duration_ms, id, profile)
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile):
+        with self._lock:
+            if profile.trigger == ON_DEMAND:
+                self._on_demand[profile.id] = profile
+                while len(self._on_demand) > self.keep:
+                    self._on_demand.popitem(last=False)
+                return
+            entry = (profile.duration_ms, profile.id, profile)
+            if len(self._slowest) < self.keep:
+                heapq.heappush(self._slowest, entry)
+            elif entry[:2] > self._slowest[0][:2]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        with self._lock:
+            if profile_id in self._on_demand:
+                return self._on_demand[profile_id]
+            for _, entry_id, profile in self._slowest:
+                if entry_id == profile_id:
+                    return profile
+        return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            profiles = list(self._on_demand.values()) + [entry[2] for entry in self._slowest]
+        profiles.sort(key=lambda profile: profile.duration_ms or 0, reverse=True)
+        return [profile.summary() for profile in profiles]
+
+
+sampler = Sampler()
+profile_store = ProfileStore()
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _profile_requested(scope) -> bool:
+    if _header(scope, b"x-profile") in ("1", "true"):
+        return True
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("profile", [""])[-1] in ("1", "true")
+
+
+def _is_admin(scope) -> bool:
+    expected_key = os.getenv("ADMIN_API_KEY") or os.getenv("N8N_API_KEY")
+    if not expected_key:
+        # If no key is configured, allow access (development mode)
+        return True
+    return _header(scope, b"x-api-key") == expected_key
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling on-demand and randomly chosen requests"""
+
+    def __init__(self, app, auto_rate: float = AUTO_RATE, slow_ms: float = SLOW_MS,
+                 store: ProfileStore = None):
+        self.app = app
+        self.auto_rate = auto_rate
+        self.slow_ms = slow_ms
+        self.store = store or profile_store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if _profile_requested(scope) and _is_admin(scope):
+            trigger = ON_DEMAND
+        elif self.auto_rate > 0 and random.random() < self.auto_rate:
+            trigger = AUTOMATIC
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"], trigger)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                if trigger == ON_DEMAND:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-id", str(profile.id).encode()))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        token = _current_profile.set(profile)
+        sampler.begin()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            sampler.end()
+            _current_profile.reset(token)
+            if trigger == ON_DEMAND or profile.duration_ms >= self.slow_ms:
+                self.store.add(profile)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Write-behind coalescing of participant progress updates
+
+n8n can send several progress updates for one participant within seconds
+(one per answered question). Applied one by one, each is a read-modify-write
+of the participant plus two outbound calls. With coalescing enabled
+(PROGRESS_COALESCE_SECONDS > 0), an update only appends a row to
+``progress_journal`` and wakes the coalescer; the endpoint answers at once.
+
+The coalescer waits out the window, then ``N8nIntegration.flush_progress_journal``
+takes the journaled updates, keeps the highest ``day_completed`` per
+participant and applies them with one batched UPDATE per database file. The
+journal rows are deleted, and one batched progress event for n8n is added to
+the ``webhook_jobs`` outbox, in the transaction of the shared file.
+
+Participants of per-webinar shard files are updated in the shard's own
+transaction, which commits before the journal rows are deleted. If the
+process dies in between, those rows are applied again on restart; a
+participant already at the journaled day is left unchanged and is not
+reported again, so the replay neither moves anyone twice nor queues a
+second event for them.
+
+The journal is the source of truth, so accepted updates survive a crash:
+whatever is left in it is flushed when the coalescer starts. A failed flush
+leaves the journal as it was and is retried after a growing delay (1 second,
+doubling up to PROGRESS_RETRY_MAX_SECONDS).
+
+Environment variables:
+    PROGRESS_COALESCE_SECONDS: Coalescing window (default 2, 0 applies updates inline)
+    PROGRESS_FLUSH_BATCH: Journal rows applied per transaction (default 5000)
+    PROGRESS_RETRY_MAX_SECONDS: Longest delay between retries of a failed flush (default 60)
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from structured_logging import get_logger
+
+logger = get_logger("progress_coalescer")
+
+WINDOW_SECONDS = float(os.getenv("PROGRESS_COALESCE_SECONDS", "2"))
+FLUSH_BATCH = int(os.getenv("PROGRESS_FLUSH_BATCH", "5000"))
+RETRY_MAX_SECONDS = float(os.getenv("PROGRESS_RETRY_MAX_SECONDS", "60"))
+
+# Flush: batch_size -> summary of the flushed batch (None on failure)
+FlushFunction = Callable[[int], Optional[Dict[str, Any]]]
+
+
+class ProgressCoalescer:
+    """Background thread flushing the progress journal after each window"""
+
+    def __init__(self, flush: FlushFunction, window_seconds: float = WINDOW_SECONDS,
+                 batch_size: int = FLUSH_BATCH):
+        self.flush = flush
+        self.window_seconds = window_seconds
+        self.batch_size = batch_size
+        self._pending = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    def start(self):
+        """Start the flusher; updates journaled before a restart are applied first"""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._pending.set()
+        self._thread = threading.Thread(target=self._run, name="progress-coalescer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the flusher after a final flush"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._pending.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def notify(self):
+        """Called after an update was journaled"""
+        self._pending.set()
+
+    def _run(self):
+        retry_delay = 1.0
+        while not self._stopping.is_set():
+            self._pending.wait()
+            # Let updates of the same participants pile up, unless shutting down
+            self._stopping.wait(self.window_seconds)
+            self._pending.clear()
+            if self.flush_all():
+                retry_delay = 1.0
+                continue
+            # Left in the journal; retried after a delay even if no update arrives
+            logger.error("Flushing the progress journal failed", extra={"retry_in": retry_delay})
+            self._stopping.wait(retry_delay)
+            retry_delay = min(retry_delay * 2, RETRY_MAX_SECONDS)
+            self._pending.set()
+        self.flush_all()
+
+    def flush_all(self) -> bool:
+        """Apply everything journaled so far, one batch per transaction; False if a flush failed"""
+        while True:
+            summary = self.flush(self.batch_size)
+            if summary is None:
+                return False
+            if summary["entries"] < self.batch_size:
+                return True
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Slow query log with query plan capture
+
+``install_slow_query_log`` hooks an engine's ``before_cursor_execute`` and
+``after_cursor_execute`` events. Every statement slower than SLOW_QUERY_MS
+is recorded with:
+
+- the normalized SQL (literals replaced by ``?``, IN lists collapsed), which
+  also groups the per-statement totals;
+- the shape of its parameters (names and types, never the values);
+- its duration, the request it served (see request_context.py) or the
+  thread it ran on, and the backend function that issued it;
+- the query plan: ``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` on
+  PostgreSQL (inside a savepoint, so a failing EXPLAIN cannot abort the
+  caller's transaction). Plans are captured at most once per
+  SLOW_QUERY_EXPLAIN_INTERVAL seconds per normalized statement.
+
+Records go to a bounded ring buffer served by /api/admin/slow-queries.
+
+Environment variables:
+    SLOW_QUERY_MS: Duration from which a statement is logged (default 100, negative disables)
+    SLOW_QUERY_LOG_SIZE: Records kept in the ring buffer (default 200)
+    SLOW_QUERY_EXPLAIN_INTERVAL: Seconds between plan captures of one statement (default 60)
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from request_context import current_request
+from structured_logging import get_logger
+
+logger = get_logger("query_log")
+
+THRESHOLD_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "60"))
+
+# Statements EXPLAIN accepts
+_EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|(?<!:):\w+|\$\d+|%s|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """SQL with literals and placeholders replaced by ?, for grouping"""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("(?...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def _value_shape(value) -> str:
+    return type(value).__name__
+
+
+def parameter_shape(parameters, executemany: bool) -> Any:
+    """Names and types of bound parameters, without their values"""
+    if executemany:
+        rows = list(parameters) if parameters is not None else []
+        return {"rows": len(rows), "row": parameter_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: _value_shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if len(parameters) > 20:
+            return [_value_shape(value) for value in parameters[:20]] + [f"... {len(parameters)} total"]
+        return [_value_shape(value) for value in parameters]
+    return None
+
+
+def _caller() -> Optional[str]:
+    """Innermost backend function (outside this module) on the stack"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_BACKEND_DIR) and not filename.endswith("query_log.py"):
+            return f"{os.path.basename(filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def _explain(connection, statement: str, parameters) -> Optional[List[str]]:
+    dialect = connection.dialect.name
+    raw = connection.connection
+    cursor = raw.cursor()
+    try:
+        if dialect == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            # Rows are (id, parent, notused, detail); indent by nesting depth
+            depth = {0: -1}
+            lines = []
+            for row in cursor.fetchall():
+                depth[row[0]] = depth.get(row[1], -1) + 1
+                lines.append("  " * depth[row[0]] + str(row[3]))
+            return lines
+        if dialect == "postgresql":
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(f"EXPLAIN {statement}", parameters)
+                lines = [row[0] for row in cursor.fetchall()]
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return lines
+        return None
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements plus per-statement totals"""
+
+    def __init__(self, threshold_ms: float = THRESHOLD_MS, size: int = LOG_SIZE,
+                 explain_interval: float = EXPLAIN_INTERVAL):
+        self.threshold_ms = threshold_ms
+        self.explain_interval = explain_interval
+        self._records: deque = deque(maxlen=size)
+        self._totals: Dict[str, Dict[str, Any]] = {}
+        self._plans: Dict[str, Any] = {}  # normalized SQL -> (captured_at, plan)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms >= 0
+
+    def _plan_for(self, connection, normalized: str, statement: str, parameters, executemany: bool):
+        if executemany or not statement.lstrip().lower().startswith(_EXPLAINABLE):
+            return None
+        now = time.monotonic()
+        with self._lock:
+            cached = self._plans.get(normalized)
+            if cached is not None and now - cached[0] < self.explain_interval:
+                return cached[1]
+            # Claim the capture so concurrent slow runs do not all EXPLAIN
+            self._plans[normalized] = (now, cached[1] if cached else None)
+        try:
+            plan = _explain(connection, statement, parameters)
+        except Exception as e:
+            plan = [f"EXPLAIN failed: {e}"]
+        with self._lock:
+            self._plans[normalized] = (now, plan)
+            if len(self._plans) > 10 * (self._records.maxlen or 1):
+                self._plans.clear()
+        return plan
+
+    def record(self, connection, statement: str, parameters, executemany: bool, duration_ms: float):
+        normalized = normalize_sql(statement)
+        request = current_request()
+        entry = {
+            "sql": normalized,
+            "parameters": parameter_shape(parameters, executemany),
+            "duration_ms": round(duration_ms, 2),
+            "database": connection.dialect.name,
+            "request_id": request["request_id"] if request else None,
+            "endpoint": f"{request['method']} {request['path']}" if request else None,
+            "thread": threading.current_thread().name,
+            "caller": _caller(),
+            "plan": self._plan_for(connection, normalized, statement, parameters, executemany),
+            "recorded_at": datetime.utcnow().isoformat()
+        }
+        with self._lock:
+            self._records.append(entry)
+            totals = self._totals.get(normalized)
+            if totals is None:
+                # Totals cover distinct statements; bounded like the plan cache
+                if len(self._totals) >= 10 * (self._records.maxlen or 1):
+                    self._totals.clear()
+                totals = self._totals[normalized] = {"sql": normalized, "count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            totals["count"] += 1
+            totals["total_ms"] += duration_ms
+            totals["max_ms"] = max(totals["max_ms"], duration_ms)
+            totals["last_endpoint"] = entry["endpoint"]
+            totals["last_caller"] = entry["caller"]
+
+    def recent(self, limit: int = None) -> List[Dict[str, Any]]:
+        """Newest records first"""
+        with self._lock:
+            records = list(self._records)
+        records.reverse()
+        return records[:limit] if limit else records
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Statements with the largest total slow time"""
+        with self._lock:
+            totals = [dict(item) for item in self._totals.values()]
+        totals.sort(key=lambda item: item["total_ms"], reverse=True)
+        for item in totals:
+            item["total_ms"] = round(item["total_ms"], 2)
+            item["max_ms"] = round(item["max_ms"], 2)
+            item["avg_ms"] = round(item["total_ms"] / item["count"], 2)
+        return totals[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._totals.clear()
+            self._plans.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def install_slow_query_log(engine, log: SlowQueryLog = None):
+    """Time every statement of an engine and record the slow ones"""
+    log = log or slow_query_log
+    if not log.enabled:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= log.threshold_ms:
+            try:
+                log.record(connection, statement, parameters, executemany, duration_ms)
+            except Exception as e:
+                logger.error("Error recording slow query: %s", e)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Normalized questions of webinar days
+
+``WebinarDay.questions`` holds a JSON array and ``Response.question_id`` is
+an index into it. The ``questions`` table keeps one row per array element
+with a stable id, so a response resolves to its question with an indexed
+join on ``(day_id, position)``::
+
+    SELECT r.response_text, q.text
+    FROM responses r
+    JOIN questions q ON q.day_id = r.day_id AND q.position = r.question_id
+
+Rows are written by ``sync_day_questions`` whenever a day's questions change
+(see ``N8nIntegration.receive_content_update``) and by populate_database.py.
+Days that have none yet are filled in by ``backfill_questions`` on startup
+and by ``ensure_webinar_questions`` before a webinar's responses are
+exported, which covers days added while the API is running. A
+question removed from a day keeps its row with ``is_active`` false, since
+older responses still refer to its position.
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import sessionmaker
+
+from bulk import upsert
+from models import Question, WebinarDay
+from structured_logging import get_logger
+
+logger = get_logger("questions")
+
+
+def question_text(item: Any) -> str:
+    """Text of a questions array element (a string, or an object with "text"/"question")"""
+    if isinstance(item, dict):
+        item = item.get("text") or item.get("question") or json.dumps(item, ensure_ascii=False)
+    return str(item)
+
+
+def parse_questions(value: Optional[str]) -> List[Any]:
+    """The JSON array of WebinarDay.questions; anything else counts as no questions"""
+    if not value:
+        return []
+    try:
+        questions = json.loads(value)
+    except ValueError:
+        return []
+    return questions if isinstance(questions, list) else []
+
+
+def sync_day_questions(connection, day_id: int, questions: List[Any], now: datetime = None) -> int:
+    """
+    Make a day's question rows match its questions array
+
+    Positions keep their row (and id); positions past the end of the array
+    are deactivated.
+
+    Args:
+        connection: Connection inside the caller's transaction
+        day_id: ID of the webinar day
+        questions: The day's questions array
+
+    Returns:
+        int: Number of active questions
+    """
+    now = now or datetime.utcnow()
+    rows = [
+        {"day_id": day_id, "position": position, "text": question_text(item),
+         "is_active": True, "created_at": now, "updated_at": now}
+        for position, item in enumerate(questions)
+    ]
+    upsert(connection, Question, rows, ["day_id", "position"], update_columns=["text", "is_active", "updated_at"])
+    questions_table = Question.__table__
+    connection.execute(
+        questions_table.update().where(
+            questions_table.c.day_id == day_id,
+            questions_table.c.position >= len(rows),
+            questions_table.c.is_active.is_(True)
+        ).values(is_active=False, updated_at=now)
+    )
+    return len(rows)
+
+
+def _missing_days(webinar_id: Optional[int] = None):
+    """Days that have questions but no question rows yet (one anti-join)"""
+    days = WebinarDay.__table__
+    questions_table = Question.__table__
+    query = select(days.c.id, days.c.questions).where(
+        days.c.questions.isnot(None),
+        ~exists().where(questions_table.c.day_id == days.c.id)
+    )
+    if webinar_id is not None:
+        query = query.where(days.c.webinar_id == webinar_id)
+    return query
+
+
+def backfill_day_questions(connection, webinar_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Create question rows for days that have questions but none yet
+
+    Args:
+        connection: Connection inside the caller's transaction
+        webinar_id: Only backfill this webinar's days
+
+    Returns:
+        Dict[str, int]: Numbers of backfilled days and questions
+    """
+    summary = {"days": 0, "questions": 0}
+    now = datetime.utcnow()
+    for day_id, value in connection.execute(_missing_days(webinar_id)).all():
+        summary["questions"] += sync_day_questions(connection, day_id, parse_questions(value), now)
+        summary["days"] += 1
+    return summary
+
+
+def backfill_questions(engine) -> Dict[str, int]:
+    """
+    Backfill the question rows of all days
+
+    Cheap when everything is in sync (one anti-join), so it runs on startup.
+    """
+    with engine.begin() as connection:
+        summary = backfill_day_questions(connection)
+    if summary["days"]:
+        logger.info("Backfilled questions", extra=summary)
+    return summary
+
+
+def ensure_webinar_questions(sessions: Tuple[sessionmaker, sessionmaker], webinar_id: int) -> Dict[str, int]:
+    """
+    Backfill a webinar's days before reading its questions, e.g. for exports
+
+    Days added after startup (another process, populate_database.py run
+    against a live database, direct SQL) have no rows yet. The check runs
+    on the read session; the write session is only opened if rows are missing.
+
+    Args:
+        sessions: (write, read) session factories of the file holding the webinar's days
+        webinar_id: ID of the webinar
+    """
+    write_session, read_session = sessions
+    session = read_session()
+    try:
+        missing = session.execute(_missing_days(webinar_id).limit(1)).first()
+    finally:
+        session.close()
+    if missing is None:
+        return {"days": 0, "questions": 0}
+    session = write_session()
+    try:
+        summary = backfill_day_questions(session.connection(), webinar_id)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    logger.info("Backfilled questions", extra=dict(summary, webinar_id=webinar_id))
+    return summary
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Per-request context for NewDay Platform
+
+``RequestContextMiddleware`` gives every HTTP request an id (the incoming
+``X-Request-ID`` header, or a new random one) and stores it with the method
+and path in a context variable. Starlette copies the context into the
+threadpool that runs ``def`` endpoints, so code anywhere below a request,
+such as the slow query log, can tell which request it is serving. The id is
+echoed in the ``X-Request-ID`` response header.
+"""
+
+import contextvars
+import re
+import uuid
+from typing import Any, Dict, Optional
+
+_current_request: contextvars.ContextVar = contextvars.ContextVar("current_request", default=None)
+
+# Accepted incoming ids; anything else is replaced by a fresh one
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def current_request() -> Optional[Dict[str, Any]]:
+    """Context of the request being served ({"request_id", "method", "path"}), or None"""
+    return _current_request.get()
+
+
+def current_request_id() -> Optional[str]:
+    context = _current_request.get()
+    return context["request_id"] if context else None
+
+
+class RequestContextMiddleware:
+    """ASGI middleware setting the request context and X-Request-ID header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get("headers", []):
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if not request_id or not _REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        token = _current_request.set({
+            "request_id": request_id,
+            "method": scope["method"],
+            "path": scope["path"]
+        })
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            _current_request.reset(token)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Bulk import of responses collected outside the platform
+
+Telegram/n8n bots collect answers offline and deliver them as NDJSON or CSV
+files with one response per record::
+
+    {"participant_id": 12, "day_id": 3, "question_id": 0,
+     "response_text": "...", "response_timestamp": "2026-10-01T09:30:00"}
+
+``import_responses`` reads records in chunks. For each chunk:
+
+- participant and day references are validated with one set lookup per
+  table for the ids not seen before, and the day must belong to the
+  participant's webinar;
+- records are de-duplicated on (participant_id, day_id, question_id), both
+  within the chunk and against the hot responses table (one indexed lookup
+  per chunk) plus the cold archive (see archive.py; keys of archived
+  responses are read once per day and cached), so re-running an import is
+  a no-op;
+- the remaining rows are written with ``bulk.copy_rows`` (COPY on
+  PostgreSQL, multi-row inserts elsewhere) and committed.
+
+Committing per chunk keeps the SQLite write lock short; earlier chunks are
+visible to the duplicate check of later ones. With per-webinar shard files
+(see webinar_shards.py) each chunk is split by the file holding the
+participant and every part is checked and written in that file.
+"""
+
+import codecs
+import csv
+import io
+import json
+import tempfile
+import time
+from datetime import datetime
+from typing import IO, Any, AsyncIterable, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import archive
+from bulk import chunked, copy_rows
+from models import Participant, Response, WebinarDay
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+# Uploads larger than this are spooled to a temporary file instead of memory
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+IMPORT_COLUMNS = ["participant_id", "day_id", "question_id", "response_text", "response_timestamp"]
+
+NDJSON = "ndjson"
+CSV = "csv"
+FORMATS = (NDJSON, CSV)
+
+
+class InvalidRecord(ValueError):
+    """A record that cannot be imported"""
+
+
+def iter_ndjson(lines: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """(line number, decoded object) for every non-blank line"""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, InvalidRecord(f"Invalid JSON: {e}")
+
+
+def iter_csv(lines: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """(line number, row dict) for every CSV row after the header"""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_records(lines: Iterable[str], file_format: str) -> Iterator[Tuple[int, Any]]:
+    if file_format == NDJSON:
+        return iter_ndjson(lines)
+    if file_format == CSV:
+        return iter_csv(lines)
+    raise ValueError(f"Unknown import format: {file_format}")
+
+
+def _optional_int(value: Any, field: str) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise InvalidRecord(f"{field} must be an integer")
+
+
+def normalize_record(record: Any, now: datetime) -> Dict[str, Any]:
+    """
+    Convert a decoded record into a responses row
+
+    Raises:
+        InvalidRecord: If a required field is missing or malformed
+    """
+    if isinstance(record, InvalidRecord):
+        raise record
+    if not isinstance(record, dict):
+        raise InvalidRecord("Record must be an object")
+    participant_id = _optional_int(record.get("participant_id"), "participant_id")
+    day_id = _optional_int(record.get("day_id"), "day_id")
+    if participant_id is None or day_id is None:
+        raise InvalidRecord("participant_id and day_id are required")
+    timestamp = record.get("response_timestamp")
+    if timestamp:
+        try:
+            timestamp = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).replace(tzinfo=None)
+        except ValueError:
+            raise InvalidRecord("response_timestamp must be an ISO 8601 timestamp")
+    response_text = record.get("response_text")
+    return {
+        "participant_id": participant_id,
+        "day_id": day_id,
+        "question_id": _optional_int(record.get("question_id"), "question_id"),
+        "response_text": None if response_text is None else str(response_text),
+        "response_timestamp": timestamp or now
+    }
+
+
+class _References:
+    """participant -> webinar and day -> webinar, loaded on demand and cached"""
+
+    def __init__(self, session):
+        self.session = session
+        self.participants: Dict[int, int] = {}
+        self.days: Dict[int, int] = {}
+
+    @staticmethod
+    def _load(session, model, ids: List[int], known: Dict[int, int]):
+        missing = [item for item in ids if item not in known]
+        for start in range(0, len(missing), 500):
+            for row_id, webinar_id in session.query(model.id, model.webinar_id).filter(
+                model.id.in_(missing[start:start + 500])
+            ):
+                known[row_id] = webinar_id
+        # Unknown ids are remembered as None so they are looked up once
+        for item in missing:
+            known.setdefault(item, None)
+
+    def load(self, rows: List[Dict[str, Any]]):
+        self._load(self.session, Participant, list({row["participant_id"] for row in rows}), self.participants)
+        self._load(self.session, WebinarDay, list({row["day_id"] for row in rows}), self.days)
+
+    def check(self, row: Dict[str, Any]):
+        participant_webinar = self.participants.get(row["participant_id"])
+        if participant_webinar is None:
+            raise InvalidRecord(f"Participant {row['participant_id']} not found")
+        day_webinar = self.days.get(row["day_id"])
+        if day_webinar is None:
+            raise InvalidRecord(f"Webinar day {row['day_id']} not found")
+        if day_webinar != participant_webinar:
+            raise InvalidRecord(f"Day {row['day_id']} does not belong to the participant's webinar")
+
+
+class _ArchivedKeys:
+    """Duplicate keys of archived responses, loaded per day on demand and cached"""
+
+    def __init__(self, session):
+        self.session = session
+        self.enabled = archive.has_archive(session)
+        self.days: Set[int] = set()
+        self.keys: Set[Tuple[int, int, Optional[int]]] = set()
+
+    def load(self, rows: List[Dict[str, Any]]):
+        if not self.enabled:
+            return
+        missing = {row["day_id"] for row in rows} - self.days
+        if missing:
+            self.keys.update(archive.archived_keys(self.session, missing))
+            self.days.update(missing)
+
+    def __contains__(self, key) -> bool:
+        return key in self.keys
+
+
+def _existing_keys(session, rows: List[Dict[str, Any]]) -> set:
+    participant_ids = list({row["participant_id"] for row in rows})
+    day_ids = list({row["day_id"] for row in rows})
+    existing = set()
+    for start in range(0, len(participant_ids), 500):
+        existing.update(
+            tuple(key) for key in session.query(
+                Response.participant_id, Response.day_id, Response.question_id
+            ).filter(
+                Response.participant_id.in_(participant_ids[start:start + 500]),
+                Response.day_id.in_(day_ids)
+            )
+        )
+    return existing
+
+
+def import_responses(session, records: Iterable[Tuple[int, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     progress: Callable[[Dict[str, Any]], None] = None,
+                     route: Callable[[int], Any] = None) -> Dict[str, Any]:
+    """
+    Validate, de-duplicate and bulk insert response records
+
+    Args:
+        session: Session on the write engine; committed after every chunk
+        records: (line number, decoded record) pairs, see iter_records
+        chunk_size: Records validated and written per transaction
+        progress: Called with the running summary after every chunk
+        route: Maps a participant id to the session of the database file
+            holding it; all records go to session by default
+
+    Returns:
+        Dict: Counts of read, inserted, duplicate and invalid records, rows
+            per second and the first MAX_REPORTED_ERRORS errors by line
+    """
+    started = time.monotonic()
+    now = datetime.utcnow()
+    references: Dict[Any, _References] = {}
+    archived: Dict[Any, _ArchivedKeys] = {}
+    summary = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0, "errors": []}
+
+    def reject(line: int, error: Exception):
+        summary["invalid"] += 1
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append({"line": line, "error": str(error)})
+
+    for chunk in chunked(records, chunk_size):
+        summary["read"] += len(chunk)
+        rows = []
+        for line, record in chunk:
+            try:
+                rows.append((line, normalize_record(record, now)))
+            except InvalidRecord as e:
+                reject(line, e)
+
+        by_database: Dict[Any, List[Tuple[int, Dict[str, Any]]]] = {}
+        for line, row in rows:
+            target = route(row["participant_id"]) if route is not None else session
+            by_database.setdefault(target, []).append((line, row))
+
+        for target, target_rows in by_database.items():
+            target_references = references.setdefault(target, _References(target))
+            target_references.load([row for _, row in target_rows])
+            valid = []
+            for line, row in target_rows:
+                try:
+                    target_references.check(row)
+                    valid.append(row)
+                except InvalidRecord as e:
+                    reject(line, e)
+
+            seen = _existing_keys(target, valid) if valid else set()
+            target_archived = archived.setdefault(target, _ArchivedKeys(target))
+            target_archived.load(valid)
+            new_rows = []
+            for row in valid:
+                key = (row["participant_id"], row["day_id"], row["question_id"])
+                if key in seen or key in target_archived:
+                    summary["duplicates"] += 1
+                    continue
+                seen.add(key)
+                new_rows.append(row)
+
+            summary["inserted"] += copy_rows(target.connection(), Response, new_rows, columns=IMPORT_COLUMNS)
+            target.commit()
+
+        elapsed = time.monotonic() - started
+        summary["elapsed_seconds"] = round(elapsed, 3)
+        summary["rows_per_second"] = round(summary["read"] / elapsed, 1) if elapsed > 0 else None
+        if progress is not None:
+            progress(summary)
+
+    elapsed = time.monotonic() - started
+    summary["elapsed_seconds"] = round(elapsed, 3)
+    summary["rows_per_second"] = round(summary["read"] / elapsed, 1) if elapsed > 0 else None
+    return summary
+
+
+async def spool_upload(chunks: AsyncIterable[bytes]) -> IO[bytes]:
+    """
+    Copy a streamed upload to a temporary file, checking it is UTF-8 on the way
+
+    Returns:
+        IO[bytes]: The spooled body, rewound
+
+    Raises:
+        UnicodeDecodeError: If the body is not UTF-8 text
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        async for chunk in chunks:
+            decoder.decode(chunk)
+            spool.write(chunk)
+        decoder.decode(b"", final=True)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def text_lines(binary_file: IO[bytes]) -> io.TextIOWrapper:
+    """Lines of text of a binary file, decoded as they are read (a UTF-8 BOM is dropped)"""
+    return io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Full-text search over content blocks and participant responses
+
+The index lives in the database and is kept in sync by the database itself,
+so every write path (ORM, bulk COPY, archive deletes) is covered:
+
+- SQLite: FTS5 tables ``content_blocks_fts`` and ``responses_fts`` (the
+  latter an external-content index over ``responses``) maintained by
+  insert/update/delete triggers;
+- PostgreSQL: generated ``search_vector`` tsvector columns with GIN indexes.
+
+Block content is stored as JSON text, so only its string values are
+indexed, not the JSON keys. All words of a query must match and a
+trailing * matches by prefix. Results are ranked (bm25 / ts_rank_cd) and
+paginated with limit/offset; ``has_more`` is computed by fetching one extra
+row instead of counting every match.
+
+Environment variables:
+    SEARCH_CONFIG: PostgreSQL text search configuration (default "simple";
+        e.g. "russian" for stemming). Changing it requires dropping the
+        search_vector columns so they are recreated.
+    SEARCH_RANK_WINDOW: Unfiltered response searches rank only the newest N
+        matches (default 10000, 0 ranks all); such results are flagged
+        ``truncated``, see search_responses.
+
+With webinar shards, each shard file has its own ``responses_fts`` index;
+``search_responses_in_files`` searches several files and merges the results.
+"""
+
+import os
+import re
+import heapq
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+
+import archive
+from structured_logging import get_logger
+
+logger = get_logger("search")
+
+SEARCH_CONFIG = os.getenv("SEARCH_CONFIG", "simple")
+RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "10000"))
+
+MAX_LIMIT = 100
+
+_SQLITE_TOKENIZER = "unicode61 remove_diacritics 2"
+
+# String values of a content_data JSON document. Blocks are saved with
+# json.dumps into a JSON column, so the stored value may be a JSON string
+# holding the document; it is unwrapped first.
+_SQLITE_BLOCK_TEXT = """(SELECT group_concat(value, ' ') FROM json_tree(
+    CASE WHEN json_valid({inner}) THEN {inner} END) WHERE type = 'text')"""
+_SQLITE_UNWRAP = ("(CASE WHEN json_valid({column}) AND json_type({column}) = 'text' "
+                  "THEN json_extract({column}, '$') ELSE {column} END)")
+
+
+def _sqlite_block_text(row: str) -> str:
+    inner = _SQLITE_UNWRAP.format(column=f"{row}.content_data")
+    return _SQLITE_BLOCK_TEXT.format(inner=inner)
+
+
+def _sqlite_statements() -> Dict[str, List[str]]:
+    block_values = (
+        "new.id, new.name, new.category, new.description, " + _sqlite_block_text("new")
+    )
+    return {
+        "content_blocks_fts": [
+            f"""CREATE VIRTUAL TABLE IF NOT EXISTS content_blocks_fts USING fts5(
+                name, category, description, content_text, tokenize='{_SQLITE_TOKENIZER}')""",
+            f"""CREATE TRIGGER IF NOT EXISTS content_blocks_fts_ai AFTER INSERT ON content_blocks BEGIN
+                INSERT INTO content_blocks_fts(rowid, name, category, description, content_text)
+                VALUES ({block_values});
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS content_blocks_fts_ad AFTER DELETE ON content_blocks BEGIN
+                DELETE FROM content_blocks_fts WHERE rowid = old.id;
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS content_blocks_fts_au AFTER UPDATE ON content_blocks BEGIN
+                DELETE FROM content_blocks_fts WHERE rowid = old.id;
+                INSERT INTO content_blocks_fts(rowid, name, category, description, content_text)
+                VALUES ({block_values});
+            END""",
+        ],
+        "responses_fts": [
+            f"""CREATE VIRTUAL TABLE IF NOT EXISTS responses_fts USING fts5(
+                response_text, content='responses', content_rowid='id', tokenize='{_SQLITE_TOKENIZER}')""",
+            """CREATE TRIGGER IF NOT EXISTS responses_fts_ai AFTER INSERT ON responses BEGIN
+                INSERT INTO responses_fts(rowid, response_text) VALUES (new.id, new.response_text);
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS responses_fts_ad AFTER DELETE ON responses BEGIN
+                INSERT INTO responses_fts(responses_fts, rowid, response_text)
+                VALUES ('delete', old.id, old.response_text);
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS responses_fts_au AFTER UPDATE ON responses BEGIN
+                INSERT INTO responses_fts(responses_fts, rowid, response_text)
+                VALUES ('delete', old.id, old.response_text);
+                INSERT INTO responses_fts(rowid, response_text) VALUES (new.id, new.response_text);
+            END""",
+        ],
+    }
+
+
+_SQLITE_REBUILD = {
+    "content_blocks_fts": [
+        "DELETE FROM content_blocks_fts",
+        "INSERT INTO content_blocks_fts(rowid, name, category, description, content_text) "
+        "SELECT b.id, b.name, b.category, b.description, " + _sqlite_block_text("b") + " FROM content_blocks b",
+    ],
+    "responses_fts": [
+        "INSERT INTO responses_fts(responses_fts) VALUES ('rebuild')",
+    ],
+}
+
+
+def _postgres_statements(config: str) -> List[str]:
+    return [
+        f"""ALTER TABLE responses ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (to_tsvector('{config}', coalesce(response_text, ''))) STORED""",
+        "CREATE INDEX IF NOT EXISTS ix_responses_search ON responses USING gin (search_vector)",
+        f"""ALTER TABLE content_blocks ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('{config}', coalesce(name, '')), 'A') ||
+                setweight(to_tsvector('{config}', coalesce(category, '')), 'B') ||
+                setweight(to_tsvector('{config}', coalesce(description, '')), 'B') ||
+                setweight(coalesce(jsonb_to_tsvector('{config}',
+                    CASE WHEN json_typeof(content_data) = 'string'
+                         THEN (content_data #>> '{{}}')::jsonb
+                         ELSE content_data::jsonb END,
+                    '["string"]'), ''::tsvector), 'C')
+            ) STORED""",
+        "CREATE INDEX IF NOT EXISTS ix_content_blocks_search ON content_blocks USING gin (search_vector)",
+    ]
+
+
+def install_search(engine, indexes: Iterable[str] = None):
+    """
+    Create the search index objects if they are missing
+
+    On SQLite, an index whose table or triggers were missing is rebuilt from
+    the current rows, so existing databases are indexed on first start.
+    ``indexes`` limits SQLite to some of the indexes, e.g. ``("responses_fts",)``
+    for webinar shards, which have no content_blocks table.
+    """
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_.]*", SEARCH_CONFIG):
+            raise ValueError(f"Invalid SEARCH_CONFIG: {SEARCH_CONFIG!r}")
+        with engine.begin() as connection:
+            for statement in _postgres_statements(SEARCH_CONFIG):
+                connection.execute(text(statement))
+        return
+    if dialect != "sqlite":
+        logger.warning("Full-text search is not supported", extra={"dialect": dialect})
+        return
+
+    with engine.begin() as connection:
+        existing = {
+            row.name for row in connection.execute(text(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE '%_fts%'"
+            ))
+        }
+        for index_name, statements in _sqlite_statements().items():
+            if indexes is not None and index_name not in indexes:
+                continue
+            objects = [index_name] + [f"{index_name}_{suffix}" for suffix in ("ai", "ad", "au")]
+            if all(name in existing for name in objects):
+                continue
+            for statement in statements:
+                connection.execute(text(statement))
+            for statement in _SQLITE_REBUILD[index_name]:
+                connection.execute(text(statement))
+
+
+def _fts5_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 query
+
+    Every word must match (AND); a trailing * keeps prefix matching. FTS5
+    operators and quotes in the input are treated as plain text.
+    """
+    terms = []
+    for word, prefix in re.findall(r"(\w+)(\*?)", query):
+        terms.append(f'"{word}"{prefix}')
+    return " ".join(terms)
+
+
+def _tsquery(query: str) -> str:
+    """Same semantics as _fts5_query, as a PostgreSQL to_tsquery expression"""
+    return " & ".join(f"{word}{':*' if prefix else ''}" for word, prefix in re.findall(r"(\w+)(\*?)", query))
+
+
+def _page(rows, limit: int, offset: int) -> Dict[str, Any]:
+    results = [dict(row._mapping) for row in rows[:limit]]
+    return {"limit": limit, "offset": offset, "has_more": len(rows) > limit, "results": results}
+
+
+def _clamp(limit: int, offset: int):
+    return max(1, min(limit, MAX_LIMIT)), max(offset, 0)
+
+
+def search_blocks(session, query: str, active_only: bool = True, limit: int = 20,
+                  offset: int = 0) -> Dict[str, Any]:
+    """
+    Search content blocks by name, category, description and content
+
+    Args:
+        session: Database session
+        query: Free-text query
+        active_only: Only return active blocks
+        limit: Page size (at most MAX_LIMIT)
+        offset: Number of results to skip
+
+    Returns:
+        Dict: Page of results ordered by relevance, with a [marked] snippet
+    """
+    limit, offset = _clamp(limit, offset)
+    params = {"limit": limit + 1, "offset": offset}
+    active_filter = "AND b.is_active" if active_only else ""
+
+    if session.bind.dialect.name == "postgresql":
+        params.update(query=_tsquery(query), config=SEARCH_CONFIG)
+        if not params["query"]:
+            return _page([], limit, offset)
+        statement = f"""
+            WITH q AS (SELECT to_tsquery(CAST(:config AS regconfig), :query) AS tsquery),
+            page AS (
+                SELECT b.id, b.name, b.category, b.content_type, b.is_active, b.description, b.content_data,
+                       ts_rank_cd(b.search_vector, q.tsquery) AS rank
+                FROM content_blocks b, q
+                WHERE b.search_vector @@ q.tsquery {active_filter}
+                ORDER BY rank DESC, b.id
+                LIMIT :limit OFFSET :offset
+            )
+            SELECT page.id, page.name, page.category, page.content_type, page.is_active, page.rank,
+                   ts_headline(CAST(:config AS regconfig), concat_ws(' ', page.name, page.description, (
+                       SELECT string_agg(value #>> '{{}}', ' ')
+                       FROM jsonb_path_query(
+                           CASE WHEN json_typeof(page.content_data) = 'string'
+                                THEN (page.content_data #>> '{{}}')::jsonb
+                                ELSE page.content_data::jsonb END,
+                           'strict $.** ? (@.type() == "string")') AS value
+                   )), q.tsquery, 'StartSel=[, StopSel=], MaxWords=20, MinWords=5') AS snippet
+            FROM page, q
+            ORDER BY page.rank DESC, page.id
+        """
+    else:
+        params["query"] = _fts5_query(query)
+        if not params["query"]:
+            return _page([], limit, offset)
+        statement = f"""
+            SELECT b.id, b.name, b.category, b.content_type, b.is_active,
+                   bm25(content_blocks_fts, 10.0, 5.0, 3.0, 1.0) AS rank,
+                   snippet(content_blocks_fts, -1, '[', ']', '…', 12) AS snippet
+            FROM content_blocks_fts
+            JOIN content_blocks b ON b.id = content_blocks_fts.rowid
+            WHERE content_blocks_fts MATCH :query {active_filter}
+            ORDER BY rank, b.id
+            LIMIT :limit OFFSET :offset
+        """
+    rows = session.execute(text(statement), params).fetchall()
+    return _page(rows, limit, offset)
+
+
+def search_responses(session, query: str, webinar_id: Optional[int] = None,
+                     participant_id: Optional[int] = None, limit: int = 20,
+                     offset: int = 0) -> Dict[str, Any]:
+    """
+    Search participant responses
+
+    Only the hot responses table is indexed; months moved to the cold
+    archive (see archive.py) are not searched, and ``archived_before`` in
+    the result tells from when on the results are complete. Without
+    filters, results are ranked among the newest SEARCH_RANK_WINDOW
+    matches, which keeps common words fast over millions of responses;
+    ``truncated`` is true when there are more matches than that, and
+    filtering by webinar or participant then finds the rest.
+
+    Args:
+        session: Database session
+        query: Free-text query
+        webinar_id: Only responses of this webinar's participants
+        participant_id: Only this participant's responses
+        limit: Page size (at most MAX_LIMIT)
+        offset: Number of results to skip
+
+    Returns:
+        Dict: Page of results ordered by relevance, with a [marked] snippet
+    """
+    limit, offset = _clamp(limit, offset)
+    page = _search_responses(session, query, webinar_id, participant_id, limit, offset)
+    page.setdefault("truncated", False)
+    archived_before = archive.archived_before(session)
+    page["archived_before"] = archived_before.isoformat() if archived_before else None
+    return page
+
+
+def search_responses_in_files(sessions: List[Any], query: str, webinar_id: Optional[int] = None,
+                              participant_id: Optional[int] = None, limit: int = 20,
+                              offset: int = 0) -> Dict[str, Any]:
+    """
+    Search participant responses in several database files
+
+    The shared file and every webinar shard (see webinar_shards.py) have
+    their own index. The best offset + limit matches of each file are merged
+    by rank; bm25 weighs terms by the statistics of each file, so ranks of
+    different files are only approximately comparable. Arguments and result
+    are those of search_responses; ``truncated`` is true if it is in any
+    file and ``archived_before`` is the latest of all files.
+
+    Args:
+        sessions: One session per database file to search
+    """
+    if len(sessions) == 1:
+        return search_responses(sessions[0], query, webinar_id, participant_id, limit, offset)
+    limit, offset = _clamp(limit, offset)
+    pages = [
+        _search_responses(session, query, webinar_id, participant_id, offset + limit, 0)
+        for session in sessions
+    ]
+    if sessions and sessions[0].bind.dialect.name == "postgresql":
+        key = lambda row: (-row["rank"], row["id"])
+    else:
+        key = lambda row: (row["rank"], row["id"])
+    results = list(heapq.merge(*[page["results"] for page in pages], key=key))
+    archived = [archive.archived_before(session) for session in sessions]
+    archived = [moment for moment in archived if moment is not None]
+    return {
+        "limit": limit,
+        "offset": offset,
+        "has_more": len(results) > offset + limit or any(page["has_more"] for page in pages),
+        "results": results[offset:offset + limit],
+        "truncated": any(page.get("truncated", False) for page in pages),
+        "archived_before": max(archived).isoformat() if archived else None
+    }
+
+
+def _search_responses(session, query: str, webinar_id: Optional[int], participant_id: Optional[int],
+                      limit: int, offset: int) -> Dict[str, Any]:
+    params = {"limit": limit + 1, "offset": offset}
+    filters = ""
+    if webinar_id is not None:
+        filters += " AND p.webinar_id = :webinar_id"
+        params["webinar_id"] = webinar_id
+    if participant_id is not None:
+        filters += " AND r.participant_id = :participant_id"
+        params["participant_id"] = participant_id
+    join = "JOIN participants p ON p.id = r.participant_id" if webinar_id is not None else ""
+    # Scoring every match of a common word costs ~1.5µs per match, so a plain
+    # search only ranks the newest RANK_WINDOW matches; filtered searches
+    # score everything the filters leave
+    windowed = not filters and RANK_WINDOW > 0
+    params["window"] = RANK_WINDOW
+
+    if session.bind.dialect.name == "postgresql":
+        params.update(query=_tsquery(query), config=SEARCH_CONFIG)
+        if not params["query"]:
+            return _page([], limit, offset)
+        source = "responses r"
+        if windowed:
+            source = """(SELECT * FROM responses
+                         WHERE search_vector @@ to_tsquery(CAST(:config AS regconfig), :query)
+                         ORDER BY id DESC LIMIT :window) AS r"""
+        window_matches = """SELECT count(*) FROM (
+            SELECT 1 FROM responses WHERE search_vector @@ to_tsquery(CAST(:config AS regconfig), :query)
+            LIMIT :over) AS w"""
+        statement = f"""
+            WITH q AS (SELECT to_tsquery(CAST(:config AS regconfig), :query) AS tsquery),
+            page AS (
+                SELECT r.id, r.participant_id, r.day_id, r.question_id, r.response_timestamp,
+                       r.response_text, ts_rank_cd(r.search_vector, q.tsquery) AS rank
+                FROM {source} {join}, q
+                WHERE r.search_vector @@ q.tsquery {filters}
+                ORDER BY rank DESC, r.id
+                LIMIT :limit OFFSET :offset
+            )
+            SELECT page.id, page.participant_id, page.day_id, page.question_id,
+                   page.response_timestamp, page.rank,
+                   ts_headline(CAST(:config AS regconfig), coalesce(page.response_text, ''), q.tsquery,
+                               'StartSel=[, StopSel=], MaxWords=25, MinWords=8') AS snippet
+            FROM page, q
+            ORDER BY page.rank DESC, page.id
+        """
+    else:
+        params["query"] = _fts5_query(query)
+        if not params["query"]:
+            return _page([], limit, offset)
+        if windowed:
+            filters = """ AND responses_fts.rowid >= (SELECT min(rowid) FROM (
+                SELECT rowid FROM responses_fts WHERE responses_fts MATCH :query
+                ORDER BY rowid DESC LIMIT :window))"""
+        window_matches = """SELECT count(*) FROM (
+            SELECT 1 FROM responses_fts WHERE responses_fts MATCH :query LIMIT :over)"""
+        statement = f"""
+            SELECT r.id, r.participant_id, r.day_id, r.question_id, r.response_timestamp,
+                   bm25(responses_fts) AS rank,
+                   snippet(responses_fts, 0, '[', ']', '…', 16) AS snippet
+            FROM responses_fts
+            JOIN responses r ON r.id = responses_fts.rowid
+            {join}
+            WHERE responses_fts MATCH :query {filters}
+            ORDER BY rank, r.id
+            LIMIT :limit OFFSET :offset
+        """
+    rows = session.execute(text(statement), params).fetchall()
+    page = _page(rows, limit, offset)
+    if windowed:
+        # Counting stops one past the window, so this stays cheap for common words
+        params["over"] = RANK_WINDOW + 1
+        page["truncated"] = session.execute(text(window_matches), params).scalar() > RANK_WINDOW
+    return page
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Full-text search endpoints for NewDay Platform
+
+Ranked, paginated search over content blocks and participant responses.
+See search.py for how the index is maintained.
+"""
+
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+
+from database import get_read_db
+from n8n_endpoints import verify_n8n_api_key
+from webinar_shards import get_shards
+import search
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+# Responses of sharded webinars live in their own database files (see webinar_shards.py)
+shards = get_shards()
+
+@router.get("/blocks", summary="Search content blocks")
+def search_content_blocks(
+    q: str,
+    active_only: bool = True,
+    limit: int = 20,
+    offset: int = 0,
+    db = Depends(get_read_db)
+):
+    """
+    Search blocks by name, category, description and content text
+
+    Results are ordered by relevance; matches are marked with [ ] in `snippet`.
+    """
+    try:
+        return {"query": q, **search.search_blocks(db, q, active_only=active_only, limit=limit, offset=offset)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching content blocks: {str(e)}")
+
+@router.get("/responses", summary="Search participant responses")
+def search_participant_responses(
+    q: str,
+    webinar_id: Optional[int] = None,
+    participant_id: Optional[int] = None,
+    limit: int = 20,
+    offset: int = 0,
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Search response texts, e.g. which participants mentioned "anxiety"
+
+    Requires the n8n API key. Without a webinar or participant filter the
+    shared database file and all webinar shards are searched and merged by
+    relevance. Archived months are not searched; `archived_before` is the end
+    of the newest archived month (null when nothing is archived). Unfiltered
+    searches rank only the newest SEARCH_RANK_WINDOW matches of each file;
+    `truncated` is true when older matches were left out.
+    """
+    sessions = [factory() for factory in shards.read_sessions(webinar_id, participant_id)]
+    try:
+        return {"query": q, **search.search_responses_in_files(
+            sessions, q, webinar_id=webinar_id, participant_id=participant_id, limit=limit, offset=offset
+        )}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching responses: {str(e)}")
+    finally:
+        for session in sessions:
+            session.close()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Non-blocking structured logging for NewDay Platform
+
+Loggers under ``newday`` (get them with ``get_logger``) write to a bounded
+in-memory queue; a background listener thread formats the records and
+writes them to stdout. A request thread therefore never waits on the
+container's log pipe: if the queue is full (the pipe is stuck), records are
+dropped and counted instead.
+
+Records are JSON lines by default::
+
+    {"ts": "...", "level": "INFO", "logger": "newday.n8n", "message": "...",
+     "request_id": "...", "participant_id": 42}
+
+with the request id of the request being served (see request_context.py)
+and any ``extra`` fields of the call. High-volume success messages are
+logged with ``extra={"sampled": True}``; only a LOG_SAMPLE_RATE share of
+those is kept, and kept records carry ``sample_rate`` so counts can be
+scaled back up. Warnings and errors are never sampled.
+
+Environment variables:
+    LOG_LEVEL: Minimum level (default INFO)
+    LOG_FORMAT: "json" (default) or "text"
+    LOG_SAMPLE_RATE: Share of sampled success messages kept (default 0.1)
+    LOG_QUEUE_SIZE: Records buffered for the writer thread (default 10000)
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+
+from request_context import current_request_id
+
+ROOT_LOGGER = "newday"
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_STANDARD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {
+    "message", "asctime", "request_id", "sampled", "sample_rate"
+}
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {
+        key: value for key, value in record.__dict__.items()
+        if key not in _STANDARD_ATTRIBUTES and not key.startswith("_")
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None:
+            entry["sample_rate"] = sample_rate
+        entry.update(_extra_fields(record))
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not getattr(record, "request_id", None):
+            record.request_id = "-"
+        line = super().format(record)
+        fields = " ".join(f"{key}={value}" for key, value in _extra_fields(record).items())
+        return f"{line} {fields}" if fields else line
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a share of records logged with extra={"sampled": True}"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False) or record.levelno >= logging.WARNING:
+            return True
+        if self.rate >= 1:
+            return True
+        if random.random() >= self.rate:
+            return False
+        record.sample_rate = self.rate
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only the cheap, context-dependent parts happen on the caller's
+        # thread; JSON formatting is left to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.request_id = current_request_id()
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+_handler = None
+_listener = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging():
+    """Attach the queue handler and start the writer thread (once per process)"""
+    global _handler, _listener
+    with _configure_lock:
+        if _handler is not None:
+            return
+        log_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        handler = NonBlockingQueueHandler(log_queue)
+        handler.addFilter(SamplingFilter(SAMPLE_RATE))
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+        listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+        listener.start()
+        # Flush what is still queued on interpreter exit
+        atexit.register(listener.stop)
+
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.setLevel(LOG_LEVEL)
+        logger.addHandler(handler)
+        logger.propagate = False
+        _handler, _listener = handler, listener
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger below ``newday``, configuring logging on first use"""
+    configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def logging_stats() -> dict:
+    """Queue depth and records dropped because the queue was full"""
+    if _handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {"queued": _handler.queue.qsize(), "dropped": _handler.dropped}
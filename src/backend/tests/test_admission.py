@@ -0,0 +1,92 @@
+import asyncio
+
+from admission import AdmissionLimiter, AdmissionMiddleware, match_group
+
+ROUTES = [("POST", "/api/n8n/webhook", "ingest")]
+
+
+def _scope(path="/api/n8n/webhook", method="POST"):
+    return {"type": "http", "method": method, "path": path, "headers": []}
+
+
+async def _call(middleware, scope):
+    """Run one request through the middleware, returning (status, headers)"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    start = messages[0]
+    return start["status"], {key.decode(): value.decode() for key, value in start["headers"]}
+
+
+def _blocking_app(release: asyncio.Event):
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+def test_match_group_by_method_and_path_prefix():
+    assert match_group("POST", "/api/n8n/webhook", ROUTES) == "ingest"
+    assert match_group("POST", "/api/n8n/webhook/jobs", ROUTES) == "ingest"
+    assert match_group("GET", "/api/n8n/webhook", ROUTES) is None
+    assert match_group("POST", "/api/n8n/webhooks", ROUTES) is None
+
+
+def test_requests_beyond_the_queue_get_429_with_retry_after():
+    async def scenario():
+        release = asyncio.Event()
+        limiter = AdmissionLimiter("ingest", max_concurrency=1, max_queue=1, queue_timeout=5)
+        middleware = AdmissionMiddleware(_blocking_app(release), {"ingest": limiter}, ROUTES)
+
+        running = asyncio.ensure_future(_call(middleware, _scope()))
+        queued = asyncio.ensure_future(_call(middleware, _scope()))
+        await asyncio.sleep(0)
+        assert (limiter.active, limiter.queued) == (1, 1)
+
+        status, headers = await _call(middleware, _scope())
+        assert status == 429
+        assert int(headers["retry-after"]) >= 1
+
+        # Other paths are not limited
+        release.set()
+        assert (await _call(middleware, _scope("/health", "GET")))[0] == 200
+        assert [(await running)[0], (await queued)[0]] == [200, 200]
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["active"], stats["queued"], stats["admitted"], stats["shed"]) == (0, 0, 2, 1)
+
+
+def test_queued_request_times_out_with_429():
+    async def scenario():
+        release = asyncio.Event()
+        limiter = AdmissionLimiter("ingest", max_concurrency=1, max_queue=4, queue_timeout=0.05)
+        middleware = AdmissionMiddleware(_blocking_app(release), {"ingest": limiter}, ROUTES)
+
+        running = asyncio.ensure_future(_call(middleware, _scope()))
+        await asyncio.sleep(0)
+        status, headers = await _call(middleware, _scope())
+        release.set()
+        await running
+        return status, headers, limiter.stats()
+
+    status, headers, stats = asyncio.run(scenario())
+    assert status == 429 and "retry-after" in headers
+    assert (stats["timed_out"], stats["shed"], stats["queued"]) == (1, 1, 0)
+
+
+def test_retry_after_grows_with_backlog_and_service_time():
+    limiter = AdmissionLimiter("ingest", max_concurrency=2, max_queue=0, queue_timeout=1)
+    assert limiter.retry_after() == 1
+    limiter.active = 1
+    limiter.release(3.0)
+    limiter.active = 2
+    # 3 seconds per request, two running plus this one, two at a time
+    assert limiter.retry_after() == 5
@@ -0,0 +1,24 @@
+import numpy as np
+
+import answer_scoring
+
+OPTIONS = ["Red", "Green", "Blue"]
+
+
+def test_match_options_by_text_and_number():
+    answers = np.array(["green ", " BLUE", "1", "3", "nope"])
+    assert answer_scoring.match_options(answers, OPTIONS).tolist() == [1, 2, 0, 2, -1]
+
+
+def test_match_options_out_of_range_numbers_are_invalid():
+    answers = np.array(["0", "4", "004", "99999999999999999999999", "²"])
+    assert answer_scoring.match_options(answers, OPTIONS).tolist() == [-1, -1, -1, -1, -1]
+
+
+def test_question_respondents_with_shard_ids():
+    shard_base = 5 << 32
+    participant_ids = np.array([shard_base + 1, shard_base + 1, shard_base + 2, 1, shard_base + 2], dtype=np.int64)
+    question_ids = np.array([0, 0, 0, 1, -1], dtype=np.int64)
+    respondents, per_question = answer_scoring._question_respondents(participant_ids, question_ids)
+    assert respondents == 3
+    assert per_question == {"0": 2, "1": 1}
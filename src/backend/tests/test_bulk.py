@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+import bulk
+from models import Base, DispatchCursor, Webinar
+
+
+@pytest.fixture
+def connection(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/bulk.db")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        yield connection
+    engine.dispose()
+
+
+def _cursor(shard, last_participant_id):
+    now = datetime.utcnow()
+    return {"job": "reminders", "run_key": "2026-01-01", "shard": shard, "shard_count": 2,
+            "last_participant_id": last_participant_id, "created_at": now, "updated_at": now}
+
+
+KEY = ["job", "run_key", "shard", "shard_count"]
+
+
+def _stored(connection):
+    table = DispatchCursor.__table__
+    return sorted(tuple(row) for row in connection.execute(
+        table.select().with_only_columns(table.c.shard, table.c.last_participant_id)
+    ))
+
+
+def test_copy_rows_chunks(connection):
+    rows = [{"title": f"w{i}", "duration_days": i} for i in range(7)]
+    assert bulk.copy_rows(connection, Webinar, rows, chunk_size=3) == 7
+    assert bulk.copy_rows(connection, Webinar, []) == 0
+    assert connection.execute(select(func.count()).select_from(Webinar.__table__)).scalar() == 7
+
+
+@pytest.mark.parametrize("upsert", [bulk.upsert, bulk._upsert_by_lookup], ids=["on_conflict", "lookup"])
+def test_upsert(connection, upsert):
+    upsert(connection, DispatchCursor.__table__, [_cursor(0, 5), _cursor(1, 7)], KEY, [])
+    upsert(connection, DispatchCursor.__table__, [_cursor(0, 9)], KEY, [])
+    assert _stored(connection) == [(0, 5), (1, 7)]
+    upsert(connection, DispatchCursor.__table__, [_cursor(0, 9), _cursor(2, 1)], KEY, ["last_participant_id"])
+    assert _stored(connection) == [(0, 9), (1, 7), (2, 1)]
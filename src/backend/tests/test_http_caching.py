@@ -0,0 +1,97 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route
+
+from http_caching import CompressionMiddleware, etag_matches, make_etag, not_modified
+
+ETAG = make_etag("test", 1)
+
+
+def _large(request):
+    return PlainTextResponse("x" * 4096, headers={"ETag": ETAG})
+
+
+def _small(request):
+    return PlainTextResponse("small", headers={"ETag": ETAG})
+
+
+def _conditional(request):
+    if etag_matches(request.headers.get("if-none-match"), ETAG):
+        return not_modified(ETAG)
+    return _large(request)
+
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[Route("/large", _large), Route("/small", _small), Route("/conditional", _conditional)])
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def test_make_etag_depends_on_every_part():
+    assert make_etag("reminders", (3, "2026-01-01", 7)) == make_etag("reminders", (3, "2026-01-01", 7))
+    assert make_etag("reminders", (3, "2026-01-01", 7)) != make_etag("reminders", (4, "2026-01-01", 7))
+    assert ETAG.startswith('"') and ETAG.endswith('"')
+
+
+def test_etag_matches_uses_weak_comparison():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches(f"W/{ETAG}", ETAG)
+    assert etag_matches(f'"other", W/{ETAG}', ETAG)
+    assert etag_matches("*", ETAG)
+    assert not etag_matches('"other"', ETAG)
+    assert not etag_matches(None, ETAG)
+
+
+def test_compressed_response_gets_weak_etag(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == f"W/{ETAG}"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.text == "x" * 4096
+
+
+def test_identity_and_small_responses_keep_strong_etag(client):
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == ETAG
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == ETAG
+
+
+def test_weak_etag_revalidates_to_304(client):
+    etag = client.get("/conditional", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    response = client.get("/conditional", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert "content-encoding" not in response.headers
+
+
+def test_reminders_answer_304_until_data_changes():
+    from main import app
+    from n8n_endpoints import n8n
+    from models import Participant, Webinar
+
+    client = TestClient(app)
+    first = client.get("/api/n8n/reminders")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert client.get("/api/n8n/reminders", headers={"If-None-Match": etag}).status_code == 304
+
+    session = n8n.Session()
+    try:
+        webinar = Webinar(title="ETag", duration_days=3)
+        session.add(webinar)
+        session.flush()
+        session.add(Participant(user_id=1, webinar_id=webinar.id, current_day=1, completion_status="enrolled"))
+        session.commit()
+    finally:
+        session.close()
+
+    changed = client.get("/api/n8n/reminders", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
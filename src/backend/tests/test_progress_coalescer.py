@@ -0,0 +1,170 @@
+import json
+import time
+
+import pytest
+
+from models import Participant, ProgressJournal, WebhookJob, Webinar
+from progress_coalescer import ProgressCoalescer
+from webinar_shards import WebinarShards
+
+
+@pytest.fixture
+def n8n(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path}/coalescer.db")
+    from n8n_integration import N8nIntegration
+    n8n = N8nIntegration(n8n_webhook_url="http://n8n.test/webhook")
+    n8n.shards = WebinarShards(n8n.DATABASE_URL, str(tmp_path / "shards"))
+    return n8n
+
+
+def _webinar(n8n, sharded=False, duration_days=3) -> int:
+    session = n8n.Session()
+    try:
+        webinar = Webinar(title="Coalescer", duration_days=duration_days)
+        session.add(webinar)
+        session.commit()
+        webinar_id = webinar.id
+    finally:
+        session.close()
+    if sharded:
+        n8n.shards.create_shard(webinar_id)
+    return webinar_id
+
+
+def _participants(n8n, webinar_id, count=2):
+    session = n8n.shards.sessions(webinar_id)[0]()
+    try:
+        participants = [
+            Participant(user_id=user_id, webinar_id=webinar_id, current_day=1, completion_status="enrolled")
+            for user_id in range(1, count + 1)
+        ]
+        session.add_all(participants)
+        session.commit()
+        return [participant.id for participant in participants]
+    finally:
+        session.close()
+
+
+def _progress(n8n, webinar_id):
+    session = n8n.shards.sessions(webinar_id)[1]()
+    try:
+        return [tuple(row) for row in session.query(
+            Participant.current_day, Participant.completion_status
+        ).order_by(Participant.id)]
+    finally:
+        session.close()
+
+
+def _events(n8n):
+    session = n8n.ReadSession()
+    try:
+        return [json.loads(payload) for payload, in session.query(WebhookJob.payload).filter(
+            WebhookJob.event == "participants_progress"
+        ).order_by(WebhookJob.id)]
+    finally:
+        session.close()
+
+
+def _journal_size(n8n) -> int:
+    session = n8n.ReadSession()
+    try:
+        return session.query(ProgressJournal).count()
+    finally:
+        session.close()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert condition()
+
+
+def test_flush_applies_the_highest_day_per_participant(n8n):
+    webinar_id = _webinar(n8n)
+    first, second = _participants(n8n, webinar_id)
+    for participant_id, day in [(first, 1), (first, 3), (first, 2), (second, 1)]:
+        assert n8n.journal_progress_update(participant_id, day)
+
+    summary = n8n.flush_progress_journal()
+    assert summary == {"entries": 4, "updated": 2, "completed": [first], "event_queued": True}
+    assert _progress(n8n, webinar_id) == [(3, "completed"), (2, "in_progress")]
+    assert _journal_size(n8n) == 0
+
+    event, = _events(n8n)
+    assert {entry["id"]: entry["current_day"] for entry in event["participants"]} == {first: 3, second: 2}
+    assert event["completed_participant_ids"] == [first]
+
+
+def test_flush_all_drains_the_journal_in_batches(n8n):
+    webinar_id = _webinar(n8n, duration_days=10)
+    participant_ids = _participants(n8n, webinar_id, count=5)
+    for participant_id in participant_ids:
+        n8n.journal_progress_update(participant_id, 1)
+
+    batches = []
+
+    def flush(batch_size):
+        summary = n8n.flush_progress_journal(batch_size)
+        batches.append(summary["entries"])
+        return summary
+
+    assert ProgressCoalescer(flush, window_seconds=1, batch_size=2).flush_all()
+    assert batches == [2, 2, 1]
+    assert _progress(n8n, webinar_id) == [(2, "in_progress")] * 5
+
+
+def test_journal_left_by_a_crash_is_applied_on_start(n8n):
+    webinar_id = _webinar(n8n)
+    participant_ids = _participants(n8n, webinar_id)
+    # Journaled by a process that died before its window elapsed
+    for participant_id in participant_ids:
+        n8n.journal_progress_update(participant_id, 1)
+
+    coalescer = ProgressCoalescer(n8n.flush_progress_journal, window_seconds=0.01)
+    coalescer.start()
+    try:
+        _wait_for(lambda: _journal_size(n8n) == 0)
+    finally:
+        coalescer.stop()
+    assert _progress(n8n, webinar_id) == [(2, "in_progress")] * 2
+    assert len(_events(n8n)) == 1
+
+
+def test_failed_flush_stays_journaled_and_is_retried(n8n):
+    webinar_id = _webinar(n8n)
+    participant_id, = _participants(n8n, webinar_id, count=1)
+    failures = [None]
+
+    def flush(batch_size):
+        if failures:
+            return failures.pop()
+        return n8n.flush_progress_journal(batch_size)
+
+    coalescer = ProgressCoalescer(flush, window_seconds=0.01)
+    coalescer.start()
+    try:
+        n8n.journal_progress_update(participant_id, 1)
+        coalescer.notify()
+        _wait_for(lambda: _journal_size(n8n) == 0)
+    finally:
+        coalescer.stop()
+    assert failures == []
+    assert _progress(n8n, webinar_id) == [(2, "in_progress")]
+
+
+def test_replaying_a_shard_batch_changes_nothing(n8n):
+    webinar_id = _webinar(n8n, sharded=True)
+    behind, last_day = _participants(n8n, webinar_id)
+    updates = [(behind, 1), (last_day, 3)]
+    for participant_id, day in updates:
+        n8n.journal_progress_update(participant_id, day)
+    assert n8n.flush_progress_journal()["updated"] == 2
+
+    # The shard committed but the journal deletion was lost
+    for participant_id, day in updates:
+        n8n.journal_progress_update(participant_id, day)
+    summary = n8n.flush_progress_journal()
+    assert summary == {"entries": 2, "updated": 0, "completed": [], "event_queued": False}
+    assert _progress(n8n, webinar_id) == [(2, "in_progress"), (3, "completed")]
+    assert len(_events(n8n)) == 1
@@ -0,0 +1,94 @@
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+
+import question_catalog
+from models import Base, Participant, Question, Response, Webinar, WebinarDay
+from webinar_shards import WebinarShards
+
+
+@pytest.fixture
+def connection(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/questions.db")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        yield connection
+    engine.dispose()
+
+
+def _add_day(connection, webinar_id, day_number, questions) -> int:
+    return connection.execute(WebinarDay.__table__.insert().values(
+        webinar_id=webinar_id, day_number=day_number, title=f"Day {day_number}",
+        questions=json.dumps(questions) if questions is not None else None
+    )).inserted_primary_key[0]
+
+
+def _questions(connection, day_id):
+    return [tuple(row) for row in connection.execute(
+        select(Question.position, Question.text, Question.is_active).where(
+            Question.day_id == day_id
+        ).order_by(Question.position)
+    )]
+
+
+def test_sync_keeps_positions_and_deactivates_removed_questions(connection):
+    day_id = _add_day(connection, 1, 1, None)
+    questions = ["How are you?", {"text": "Sleep"}, {"question": "Mood"}]
+    assert question_catalog.sync_day_questions(connection, day_id, questions) == 3
+    ids_query = select(Question.id).where(Question.day_id == day_id).order_by(Question.position)
+    ids = connection.execute(ids_query).scalars().all()
+
+    assert question_catalog.sync_day_questions(connection, day_id, ["How do you feel?"]) == 1
+    assert _questions(connection, day_id) == [(0, "How do you feel?", True), (1, "Sleep", False), (2, "Mood", False)]
+    assert connection.execute(ids_query).scalars().all() == ids
+
+
+def test_backfill_only_fills_days_without_rows(connection):
+    synced = _add_day(connection, 1, 1, ["Kept"])
+    question_catalog.sync_day_questions(connection, synced, ["Kept"])
+    new = _add_day(connection, 1, 2, ["One", "Two"])
+    other = _add_day(connection, 2, 1, ["Other"])
+    _add_day(connection, 1, 3, None)
+
+    assert question_catalog.backfill_day_questions(connection, webinar_id=1) == {"days": 1, "questions": 2}
+    assert _questions(connection, new) == [(0, "One", True), (1, "Two", True)]
+    assert _questions(connection, other) == []
+
+    assert question_catalog.backfill_day_questions(connection) == {"days": 1, "questions": 1}
+    assert question_catalog.backfill_day_questions(connection) == {"days": 0, "questions": 0}
+
+
+def test_export_backfills_days_added_after_startup(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path}/export.db")
+    from n8n_integration import N8nIntegration
+    import webinar_endpoints
+    from main import app
+
+    # Tables and startup backfill exist before the day is added
+    n8n = N8nIntegration()
+    monkeypatch.setattr(webinar_endpoints, "shards", WebinarShards(n8n.DATABASE_URL, ""))
+    session = n8n.Session()
+    try:
+        webinar = Webinar(title="Questions", duration_days=2)
+        session.add(webinar)
+        session.flush()
+        day = WebinarDay(webinar_id=webinar.id, day_number=1, title="Day 1", questions=json.dumps(["Mood?", "Sleep?"]))
+        participant = Participant(user_id=1, webinar_id=webinar.id)
+        session.add_all([day, participant])
+        session.flush()
+        session.add(Response(participant_id=participant.id, day_id=day.id, question_id=1, response_text="Fine",
+                             response_timestamp=datetime.utcnow()))
+        session.commit()
+        webinar_id = webinar.id
+    finally:
+        session.close()
+
+    response = TestClient(app).get(f"/api/webinars/{webinar_id}/responses.ndjson")
+    assert response.status_code == 200
+    row, = [json.loads(line) for line in response.text.splitlines()]
+    assert (row["question_id"], row["question_text"]) == (1, "Sleep?")
+    sessions = n8n.shards.sessions(webinar_id)
+    assert question_catalog.ensure_webinar_questions(sessions, webinar_id) == {"days": 0, "questions": 0}
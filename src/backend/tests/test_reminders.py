@@ -0,0 +1,115 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import bulk
+from models import Participant, Webinar
+
+
+@pytest.fixture
+def n8n(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path}/reminders.db")
+    monkeypatch.delenv("N8N_WEBHOOK_URL", raising=False)
+    from n8n_integration import N8nIntegration
+    return N8nIntegration()
+
+
+@pytest.fixture
+def client(n8n, monkeypatch):
+    import n8n_endpoints
+    from main import app
+    monkeypatch.setattr(n8n_endpoints, "n8n", n8n)
+    return TestClient(app)
+
+
+@pytest.fixture
+def reminder_ids(n8n):
+    """Enroll 60 participants two days ago; every tenth has completed"""
+    enrolled = datetime.utcnow() - timedelta(days=2)
+    session = n8n.Session()
+    try:
+        webinar = Webinar(title="Reminders", duration_days=10)
+        session.add(webinar)
+        session.flush()
+        bulk.copy_rows(session.connection(), Participant, [
+            {"user_id": user_id, "webinar_id": webinar.id, "enrollment_date": enrolled,
+             "completion_status": "completed" if user_id % 10 == 0 else "enrolled", "current_day": 1,
+             "created_at": enrolled, "updated_at": enrolled}
+            for user_id in range(1, 61)
+        ])
+        session.commit()
+        return [participant_id for participant_id, in session.query(Participant.id).filter(
+            Participant.completion_status != "completed"
+        ).order_by(Participant.id)]
+    finally:
+        session.close()
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_reminders_stream_in_id_order(n8n, reminder_ids):
+    # Several cursor round trips
+    reminders = list(n8n.iter_daily_reminder_data(batch_size=7))
+    assert [reminder["participant_id"] for reminder in reminders] == reminder_ids
+
+    resumed = list(n8n.iter_daily_reminder_data(after_id=reminder_ids[19], batch_size=7))
+    assert [reminder["participant_id"] for reminder in resumed] == reminder_ids[20:]
+
+
+def test_stream_endpoint_writes_one_reminder_per_line(client, reminder_ids):
+    response = client.get("/api/n8n/reminders/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [reminder["participant_id"] for reminder in _ndjson(response)] == reminder_ids
+
+    resumed = client.get("/api/n8n/reminders/stream", params={"cursor": reminder_ids[-3]})
+    assert [reminder["participant_id"] for reminder in _ndjson(resumed)] == reminder_ids[-2:]
+
+
+def test_shards_partition_the_reminders(n8n, reminder_ids):
+    from dispatch_shards import shard_of
+
+    shards = [
+        [reminder["participant_id"] for reminder in n8n.iter_daily_reminder_data(shard=(shard, 3), batch_size=7)]
+        for shard in range(3)
+    ]
+    assert sorted(sum(shards, [])) == reminder_ids
+    for shard, ids in enumerate(shards):
+        assert ids == sorted(ids)
+        assert all(shard_of(participant_id, 3) == shard for participant_id in ids)
+
+
+def test_shard_pages_resume_after_acknowledged_cursor(client, reminder_ids):
+    from dispatch_shards import shard_of
+
+    expected = [participant_id for participant_id in reminder_ids if shard_of(participant_id, 2) == 0]
+    params = {"shard": 0, "of": 2, "limit": 5, "run": "test-run"}
+
+    page = client.get("/api/n8n/reminders", params=params).json()
+    assert page["cursor"] == 0 and page["has_more"]
+    assert [reminder["participant_id"] for reminder in page["reminders"]] == expected[:5]
+    assert page["next_cursor"] == expected[4]
+
+    # Unacknowledged pages are served again
+    assert client.get("/api/n8n/reminders", params=params).json()["reminders"] == page["reminders"]
+
+    ack = {"shard": 0, "of": 2, "run": "test-run", "cursor": page["next_cursor"]}
+    assert client.post("/api/n8n/reminders/ack", json=ack).json()["cursor"] == expected[4]
+    # A late acknowledgement does not rewind the shard
+    assert client.post("/api/n8n/reminders/ack", json=dict(ack, cursor=expected[1])).json()["cursor"] == expected[4]
+
+    page = client.get("/api/n8n/reminders", params=params).json()
+    assert page["cursor"] == expected[4]
+    assert [reminder["participant_id"] for reminder in page["reminders"]] == expected[5:10]
+
+    streamed = client.get("/api/n8n/reminders/stream", params={"shard": 0, "of": 2, "run": "test-run"})
+    assert [reminder["participant_id"] for reminder in _ndjson(streamed)] == expected[5:]
+
+
+@pytest.mark.parametrize("params", [{"shard": 0}, {"shard": 2, "of": 2}, {"shard": 0, "of": 0}])
+def test_invalid_shard_parameters_are_rejected(client, params):
+    assert client.get("/api/n8n/reminders", params=params).status_code == 400
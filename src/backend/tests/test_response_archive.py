@@ -0,0 +1,148 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import archive
+import bulk
+import response_import
+from models import Participant, Response, ResponseArchive, Webinar, WebinarDay
+from webinar_shards import WebinarShards
+
+NOW = datetime.utcnow().replace(microsecond=0)
+OLD = [NOW - timedelta(days=240), NOW - timedelta(days=180)]
+
+
+def _integration(tmp_path, monkeypatch, name):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path}/{name}.db")
+    monkeypatch.delenv("N8N_WEBHOOK_URL", raising=False)
+    from n8n_integration import N8nIntegration
+    return N8nIntegration()
+
+
+def _create_webinar(n8n) -> int:
+    """One webinar with one day and three participants, ids 1..3"""
+    session = n8n.Session()
+    try:
+        webinar = Webinar(id=1, title="Archive", duration_days=3)
+        session.add(webinar)
+        session.add(WebinarDay(id=1, webinar_id=1, day_number=1, title="Day 1"))
+        for participant_id in (1, 2, 3):
+            session.add(Participant(id=participant_id, user_id=participant_id, webinar_id=1,
+                                    enrollment_date=OLD[0] - timedelta(days=1), current_day=1,
+                                    completion_status="in_progress"))
+        session.commit()
+        return webinar.id
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    """A webinar whose responses were written out of time order, two old months archived"""
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    n8n = _integration(tmp_path, monkeypatch, "source")
+    _create_webinar(n8n)
+    rows = []
+    for i in range(30):
+        # Recent and back-dated answers alternate, so archived and hot ids interleave
+        timestamp = OLD[i % 2] if i % 3 else NOW - timedelta(hours=i)
+        rows.append({"participant_id": i % 3 + 1, "day_id": 1, "question_id": i, "response_text": f"answer {i}",
+                     "response_timestamp": timestamp + timedelta(minutes=i)})
+    rows.append({"participant_id": 1, "day_id": 1, "question_id": 99, "response_text": "newest",
+                 "response_timestamp": NOW})
+    session = n8n.Session()
+    try:
+        bulk.copy_rows(session.connection(), Response, rows)
+        session.commit()
+    finally:
+        session.close()
+
+    n8n.expected = _responses(n8n)
+    write_session, read_session = n8n.Session(), n8n.ReadSession()
+    try:
+        for key in sorted({archive.month_key(moment) for moment in OLD}):
+            assert archive.archive_month(write_session, read_session, key)["row_count"] == 10
+    finally:
+        write_session.close()
+        read_session.close()
+    return n8n
+
+
+def _responses(n8n, **filters):
+    session = n8n.ReadSession()
+    try:
+        return [(row["id"], row["participant_id"], row["question_id"], row["response_text"], row["response_timestamp"])
+                for row in archive.iter_responses(session, **filters)]
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(source, monkeypatch):
+    import webinar_endpoints
+    from main import app
+    monkeypatch.setattr(webinar_endpoints, "shards", WebinarShards(source.DATABASE_URL, ""))
+    return TestClient(app)
+
+
+def _export(client, after_id=0):
+    response = client.get("/api/webinars/1/responses.ndjson", params={"after_id": after_id})
+    assert response.status_code == 200
+    return response.text.splitlines()
+
+
+def test_archived_months_are_read_back_transparently(source):
+    session = source.ReadSession()
+    try:
+        assert session.query(ResponseArchive).count() == 2
+        assert session.query(Response).count() == 11
+    finally:
+        session.close()
+    assert _responses(source) == source.expected
+    assert _responses(source, participant_id=2) == [row for row in source.expected if row[1] == 2]
+    since = NOW - timedelta(days=1)
+    recent = _responses(source, since=since)
+    assert recent == [row for row in source.expected if row[4] >= since]
+    assert len(recent) == 10
+
+
+def test_export_resumes_after_id_across_hot_and_archived_rows(client, source):
+    full = [json.loads(line) for line in _export(client)]
+    ids = [row["response_id"] for row in full]
+    assert ids == sorted(row[0] for row in source.expected)
+    assert full[0]["day_title"] == "Day 1"
+
+    for position in (0, 7, 15, len(ids) - 1):
+        resumed = [json.loads(line)["response_id"] for line in _export(client, after_id=ids[position])]
+        assert resumed == ids[position + 1:]
+
+
+def test_export_imports_into_an_empty_database(client, source, tmp_path, monkeypatch):
+    lines = _export(client)
+    target = _integration(tmp_path, monkeypatch, "target")
+    _create_webinar(target)
+
+    session = target.Session()
+    try:
+        summary = response_import.import_responses(session, response_import.iter_records(lines, "ndjson"))
+        assert (summary["read"], summary["inserted"], summary["invalid"]) == (31, 31, 0)
+        # Importing the same export again adds nothing
+        again = response_import.import_responses(session, response_import.iter_records(lines, "ndjson"))
+        assert (again["inserted"], again["duplicates"]) == (0, 31)
+    finally:
+        session.close()
+
+    imported = [row[1:] for row in _responses(target)]
+    assert imported == [row[1:] for row in source.expected]
+
+
+def test_reimport_into_the_source_skips_archived_rows(client, source):
+    lines = _export(client)
+    session = source.Session()
+    try:
+        summary = response_import.import_responses(session, response_import.iter_records(lines, "ndjson"))
+    finally:
+        session.close()
+    assert (summary["inserted"], summary["duplicates"]) == (0, 31)
@@ -0,0 +1,128 @@
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import webhook_jobs
+from models import Base, WebhookJob
+
+
+@pytest.fixture
+def Session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/jobs.db")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _enqueue(Session, event="enrollment_data", payload=None) -> int:
+    session = Session()
+    try:
+        return webhook_jobs.enqueue(session, event, payload or {"user_id": 1}).id
+    finally:
+        session.close()
+
+
+def _job(Session, job_id):
+    session = Session()
+    try:
+        return webhook_jobs.get_job(session, job_id)
+    finally:
+        session.close()
+
+
+def _make_available(Session):
+    session = Session()
+    try:
+        session.query(WebhookJob).update({WebhookJob.available_at: datetime.utcnow()})
+        session.commit()
+    finally:
+        session.close()
+
+
+def _failing(event, payload):
+    raise ConnectionError("n8n is down")
+
+
+def test_jobs_are_claimed_once_in_order(Session):
+    first, second = _enqueue(Session), _enqueue(Session, payload={"user_id": 2})
+    pool = webhook_jobs.WebhookWorkerPool(Session, lambda event, payload: (True, "ok"), workers=0)
+
+    claimed = pool._claim()
+    assert claimed[:4] == (first, "enrollment_data", {"user_id": 1}, 1)
+    assert _job(Session, first)["status"] == webhook_jobs.RUNNING
+    assert pool._claim()[0] == second
+    assert pool._claim() is None
+
+    pool._process(*claimed)
+    job = _job(Session, first)
+    assert (job["status"], job["result"], job["attempts"]) == (webhook_jobs.SUCCEEDED, "ok", 1)
+    assert job["finished_at"] is not None
+
+
+def test_failed_attempts_are_retried_until_max_attempts(Session):
+    job_id = _enqueue(Session)
+    pool = webhook_jobs.WebhookWorkerPool(Session, _failing, workers=0, max_attempts=2)
+
+    pool._process(*pool._claim())
+    job = _job(Session, job_id)
+    assert (job["status"], job["attempts"]) == (webhook_jobs.QUEUED, 1)
+    assert "n8n is down" in job["result"]
+    # Backed off: not runnable yet
+    assert pool._claim() is None
+
+    _make_available(Session)
+    pool._process(*pool._claim())
+    job = _job(Session, job_id)
+    assert (job["status"], job["attempts"]) == (webhook_jobs.FAILED, 2)
+    assert job["finished_at"] is not None
+
+
+def test_stale_job_is_reclaimed_and_the_old_claim_cannot_finish_it(Session):
+    job_id = _enqueue(Session)
+    pool = webhook_jobs.WebhookWorkerPool(Session, lambda event, payload: (True, "ok"), workers=0, stale_seconds=0)
+
+    lost = pool._claim()
+    reclaimed = pool._claim()
+    assert reclaimed[0] == job_id and reclaimed[3] == 2
+
+    # The first worker finally gives up, after its job was taken over
+    pool._finish(job_id, lost[4], webhook_jobs.FAILED, "gave up", None)
+    assert _job(Session, job_id)["status"] == webhook_jobs.RUNNING
+
+    pool._process(*reclaimed)
+    job = _job(Session, job_id)
+    assert (job["status"], job["result"], job["attempts"]) == (webhook_jobs.SUCCEEDED, "ok", 2)
+
+
+def test_job_reclaimed_too_often_fails(Session):
+    job_id = _enqueue(Session)
+    pool = webhook_jobs.WebhookWorkerPool(Session, lambda event, payload: (True, "ok"), workers=0,
+                                          max_attempts=1, stale_seconds=0)
+    pool._claim()
+    pool._process(*pool._claim())
+    job = _job(Session, job_id)
+    assert (job["status"], job["result"]) == (webhook_jobs.FAILED, "Worker lost while processing the job")
+
+
+def test_workers_drain_the_queue(Session):
+    handled = []
+
+    def handler(event, payload):
+        handled.append(payload["user_id"])
+        return True, "ok"
+
+    pool = webhook_jobs.WebhookWorkerPool(Session, handler, workers=2, poll_seconds=0.05)
+    pool.start()
+    try:
+        job_ids = [_enqueue(Session, payload={"user_id": user_id}) for user_id in range(5)]
+        pool.notify()
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and len(handled) < 5:
+            time.sleep(0.02)
+    finally:
+        pool.stop()
+    assert sorted(handled) == list(range(5))
+    assert {_job(Session, job_id)["status"] for job_id in job_ids} == {webhook_jobs.SUCCEEDED}
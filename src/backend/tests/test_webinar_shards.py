@@ -0,0 +1,145 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import search
+import webinar_shards
+from models import Participant, Question, Response, Webinar, WebinarDay
+from webinar_shards import WebinarShards
+
+
+@pytest.fixture
+def n8n(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path}/shared.db")
+    monkeypatch.delenv("N8N_WEBHOOK_URL", raising=False)
+    from n8n_integration import N8nIntegration
+    n8n = N8nIntegration()
+    n8n.shards = WebinarShards(n8n.DATABASE_URL, str(tmp_path / "shards"))
+    return n8n
+
+
+def _webinar(n8n, title) -> int:
+    """A webinar with one day of two questions in the shared file"""
+    session = n8n.Session()
+    try:
+        webinar = Webinar(title=title, duration_days=3)
+        session.add(webinar)
+        session.flush()
+        day = WebinarDay(webinar_id=webinar.id, day_number=1, title="Day 1", questions=json.dumps(["Mood?", "Sleep?"]))
+        session.add(day)
+        session.flush()
+        session.add_all([Question(day_id=day.id, position=position, text=text)
+                         for position, text in enumerate(["Mood?", "Sleep?"])])
+        session.commit()
+        return webinar.id
+    finally:
+        session.close()
+
+
+def _enroll(n8n, webinar_id, user_id) -> int:
+    assert n8n.receive_enrollment_data({"user_id": user_id, "webinar_id": webinar_id})
+    session = n8n.shards.sessions(webinar_id)[1]()
+    try:
+        return session.query(Participant.id).filter_by(user_id=user_id, webinar_id=webinar_id).scalar()
+    finally:
+        session.close()
+
+
+def _respond(n8n, participant_id, texts):
+    session = n8n.shards.sessions_for_row(participant_id)[0]()
+    try:
+        participant = session.query(Participant).get(participant_id)
+        day_id = session.query(WebinarDay.id).filter_by(webinar_id=participant.webinar_id).scalar()
+        now = datetime.utcnow()
+        session.add_all([
+            Response(participant_id=participant_id, day_id=day_id, question_id=0, response_text=text,
+                     response_timestamp=now - timedelta(minutes=number))
+            for number, text in enumerate(texts)
+        ])
+        session.commit()
+    finally:
+        session.close()
+
+
+def _count(Session, model, **filters) -> int:
+    session = Session()
+    try:
+        return session.query(model).filter_by(**filters).count()
+    finally:
+        session.close()
+
+
+def test_create_shard_moves_days_and_routes_new_rows(n8n):
+    shared_webinar, sharded_webinar = _webinar(n8n, "Shared"), _webinar(n8n, "Sharded")
+    assert n8n.shards.create_shard(sharded_webinar) == {"webinar_id": sharded_webinar, "days": 1, "questions": 2}
+
+    shard = n8n.shards.sessions(sharded_webinar)
+    assert n8n.shards.is_sharded(sharded_webinar) and not n8n.shards.is_sharded(shared_webinar)
+    assert n8n.shards.sessions(shared_webinar) is n8n.shards.shared
+    assert _count(n8n.ReadSession, WebinarDay, webinar_id=sharded_webinar) == 0
+    assert _count(shard[1], WebinarDay, webinar_id=sharded_webinar) == 1
+    assert _count(shard[1], Question) == 2
+
+    shared_participant = _enroll(n8n, shared_webinar, 1)
+    sharded_participant = _enroll(n8n, sharded_webinar, 1)
+    assert shared_participant < webinar_shards.id_base(1)
+    assert sharded_participant > webinar_shards.id_base(sharded_webinar)
+    assert webinar_shards.webinar_of(sharded_participant) == sharded_webinar
+    assert n8n.shards.sessions_for_row(sharded_participant) is shard
+    assert _count(n8n.ReadSession, Participant) == 1
+
+    # Shard files are found again by a new registry (another worker process)
+    reopened = WebinarShards(n8n.DATABASE_URL, n8n.shards.directory)
+    assert reopened.webinar_ids() == [sharded_webinar]
+    assert [webinar_id for webinar_id, _, _ in reopened.all_sessions()] == [0, sharded_webinar]
+
+
+def test_create_shard_refuses_webinars_with_shared_participants(n8n):
+    webinar_id = _webinar(n8n, "Enrolled")
+    _enroll(n8n, webinar_id, 1)
+    with pytest.raises(ValueError):
+        n8n.shards.create_shard(webinar_id)
+    assert not n8n.shards.is_sharded(webinar_id)
+    assert _count(n8n.ReadSession, WebinarDay, webinar_id=webinar_id) == 1
+
+    with pytest.raises(ValueError):
+        n8n.shards.create_shard(webinar_id + 100)
+    with pytest.raises(ValueError):
+        WebinarShards(n8n.DATABASE_URL, "").create_shard(webinar_id)
+
+
+def test_search_merges_results_of_all_files(n8n):
+    shared_webinar, sharded_webinar = _webinar(n8n, "Shared"), _webinar(n8n, "Sharded")
+    n8n.shards.create_shard(sharded_webinar)
+    shared_participant = _enroll(n8n, shared_webinar, 1)
+    sharded_participant = _enroll(n8n, sharded_webinar, 2)
+    _respond(n8n, shared_participant, [f"anxiety at work {number}" for number in range(4)] + ["calm"])
+    _respond(n8n, sharded_participant, [f"anxiety at night {number}" for number in range(5)])
+
+    def search_ids(**filters):
+        limit = filters.pop("limit", 20)
+        offset = filters.pop("offset", 0)
+        sessions = [factory() for factory in n8n.shards.read_sessions(
+            filters.get("webinar_id"), filters.get("participant_id")
+        )]
+        try:
+            page = search.search_responses_in_files(sessions, "anxiety", limit=limit, offset=offset, **filters)
+        finally:
+            for session in sessions:
+                session.close()
+        return [row["id"] for row in page["results"]], page["has_more"]
+
+    everything, has_more = search_ids()
+    assert len(everything) == 9 and not has_more
+    assert {webinar_shards.webinar_of(response_id) for response_id in everything} == {0, sharded_webinar}
+
+    first, has_more = search_ids(limit=4)
+    second, _ = search_ids(limit=4, offset=4)
+    assert has_more and first + second == everything[:8]
+
+    by_webinar, _ = search_ids(webinar_id=sharded_webinar)
+    assert len(by_webinar) == 5
+    assert all(webinar_shards.webinar_of(response_id) == sharded_webinar for response_id in by_webinar)
+    by_participant, _ = search_ids(participant_id=shared_participant)
+    assert len(by_participant) == 4
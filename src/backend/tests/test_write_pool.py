@@ -0,0 +1,104 @@
+import json
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+
+import n8n_integration
+from database import create_engines
+from models import Base, Participant, WebhookJob, Webinar
+
+
+@pytest.fixture
+def n8n(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path}/write_pool.db")
+    from n8n_integration import N8nIntegration
+    return N8nIntegration(n8n_webhook_url="http://n8n.test/webhook")
+
+
+def _webinar(n8n, duration_days=2) -> int:
+    session = n8n.Session()
+    try:
+        webinar = Webinar(title="Pool", duration_days=duration_days)
+        session.add(webinar)
+        session.commit()
+        return webinar.id
+    finally:
+        session.close()
+
+
+def _participant(n8n, webinar_id) -> int:
+    session = n8n.Session()
+    try:
+        participant = Participant(user_id=1, webinar_id=webinar_id, current_day=1, completion_status="enrolled")
+        session.add(participant)
+        session.commit()
+        return participant.id
+    finally:
+        session.close()
+
+
+def _queued_events(n8n):
+    session = n8n.ReadSession()
+    try:
+        return [(event, json.loads(payload)) for event, payload in session.query(
+            WebhookJob.event, WebhookJob.payload
+        ).order_by(WebhookJob.id)]
+    finally:
+        session.close()
+
+
+def test_sqlite_writers_queue_for_one_connection(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_WRITE_QUEUE_TIMEOUT", "1")
+    write_engine, read_engine = create_engines(f"sqlite:///{tmp_path}/engines.db")
+    Base.metadata.create_all(write_engine)
+
+    with write_engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            write_engine.connect()
+        # Readers have their own pool
+        with read_engine.connect() as connection:
+            assert connection.execute(text("SELECT count(*) FROM webinars")).scalar() == 0
+
+    with read_engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("INSERT INTO webinars (title) VALUES ('read only')"))
+
+
+def test_progress_update_queues_events_instead_of_posting(n8n, monkeypatch):
+    def post(*args, **kwargs):
+        raise AssertionError("n8n must not be called on the request path")
+
+    monkeypatch.setattr(n8n_integration.requests, "post", post)
+    participant_id = _participant(n8n, _webinar(n8n))
+
+    assert n8n.update_participant_progress(participant_id, 2)
+    events = dict(_queued_events(n8n))
+    assert sorted(events) == ["participant_progress", "webinar_completion"]
+    assert events["participant_progress"] == {"event": "participant_progress", "participant_id": participant_id}
+    assert n8n.engine.pool.checkedout() == 0
+
+
+def test_enrollment_is_delivered_without_holding_the_write_connection(n8n, monkeypatch):
+    posted = []
+
+    class Accepted:
+        def raise_for_status(self):
+            pass
+
+    def post(url, headers=None, data=None, timeout=None):
+        # A slow n8n must not keep writers waiting
+        assert n8n.engine.pool.checkedout() == 0
+        posted.append(json.loads(data))
+        return Accepted()
+
+    monkeypatch.setattr(n8n_integration.requests, "post", post)
+    webinar_id = _webinar(n8n)
+
+    assert n8n.receive_enrollment_data({"user_id": 7, "webinar_id": webinar_id})
+    assert posted == []
+    (event, payload), = _queued_events(n8n)
+    assert event == "enrollment_confirmation"
+
+    assert n8n.deliver_event(payload)
+    assert posted[0]["event"] == "enrollment_confirmation"
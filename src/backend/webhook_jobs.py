@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Durable job queue for asynchronously processed n8n webhooks
+
+With ``POST /api/n8n/webhook?async=true`` the endpoint only validates the
+payload, stores it as a row of ``webhook_jobs`` and answers ``202 Accepted``
+with the job id; n8n no longer waits for enrollment, progress updates and
+the outbound calls they trigger. A pool of worker threads claims queued
+jobs oldest first, runs them and records the outcome, which
+``GET /api/n8n/jobs/{id}`` reports.
+
+Jobs live in the database, so nothing accepted is lost on restart: a job
+left ``running`` by a process that died is claimed again once it is older
+than WEBHOOK_JOB_STALE_SECONDS. A claim is a conditional UPDATE of the
+job's status, so several processes can run workers on one database. A job
+whose handler raises is retried with a growing delay up to
+WEBHOOK_JOB_MAX_ATTEMPTS times; the N8nIntegration handlers re-raise
+transient database errors (``database.TRANSIENT_ERRORS``, e.g. "database
+is locked") for this. A handler reporting failure (e.g. unknown
+participant) fails the job at once.
+
+The same table is the outbox for events sent to n8n (``OUTBOUND_EVENTS``):
+a writer adds the job in the transaction of the change it reports, and a
+worker posts it, so the event is neither lost on a crash nor sent for a
+rolled-back change.
+
+Environment variables:
+    WEBHOOK_WORKERS: Worker threads per process (default 2, 0 to only enqueue)
+    WEBHOOK_JOB_POLL_SECONDS: Idle poll interval for jobs from other processes (default 1)
+    WEBHOOK_JOB_MAX_ATTEMPTS: Attempts before a raising job is failed (default 3)
+    WEBHOOK_JOB_STALE_SECONDS: Age after which a running job is reclaimed (default 300)
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_
+
+from models import WebhookJob
+from structured_logging import get_logger
+
+logger = get_logger("webhook_jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+WORKERS = int(os.getenv("WEBHOOK_WORKERS", "2"))
+POLL_SECONDS = float(os.getenv("WEBHOOK_JOB_POLL_SECONDS", "1"))
+MAX_ATTEMPTS = int(os.getenv("WEBHOOK_JOB_MAX_ATTEMPTS", "3"))
+STALE_SECONDS = float(os.getenv("WEBHOOK_JOB_STALE_SECONDS", "300"))
+
+# Events posted to n8n by the workers rather than received from it
+OUTBOUND_EVENTS = (
+    "enrollment_confirmation",
+    "participant_progress",
+    "webinar_completion",
+    "participants_progress",
+    "participants_advanced",
+)
+
+# Handler: (event, payload) -> (success, message)
+JobHandler = Callable[[str, Dict[str, Any]], Tuple[bool, str]]
+
+
+def job_to_dict(job: WebhookJob) -> Dict[str, Any]:
+    """Status view of a job, as returned by the jobs endpoint"""
+    return {
+        "id": job.id,
+        "event": job.event,
+        "status": job.status,
+        "attempts": job.attempts,
+        "result": job.result,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+def add_job(session, event: str, payload: Dict[str, Any]) -> WebhookJob:
+    """Add a queued job to the session without committing, e.g. to commit it with other writes"""
+    now = datetime.utcnow()
+    job = WebhookJob(
+        event=event,
+        payload=json.dumps(payload, default=str),
+        status=QUEUED,
+        attempts=0,
+        available_at=now,
+        created_at=now
+    )
+    session.add(job)
+    return job
+
+
+def enqueue(session, event: str, payload: Dict[str, Any]) -> WebhookJob:
+    """
+    Store a validated webhook event as a queued job
+
+    Args:
+        session: Session on the write engine (committed here)
+        event: Webhook event type
+        payload: Event data, JSON serializable
+
+    Returns:
+        WebhookJob: The committed job
+    """
+    job = add_job(session, event, payload)
+    session.commit()
+    return job
+
+
+class WebhookWorkerPool:
+    """Worker threads draining ``webhook_jobs``"""
+
+    def __init__(self, session_factory, handler: JobHandler, workers: int = WORKERS,
+                 poll_seconds: float = POLL_SECONDS, max_attempts: int = MAX_ATTEMPTS,
+                 stale_seconds: float = STALE_SECONDS):
+        self.session_factory = session_factory
+        self.handler = handler
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max(max_attempts, 1)
+        self.stale_seconds = stale_seconds
+        self._threads: List[threading.Thread] = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def start(self):
+        """Start the worker threads (no-op when already running or WEBHOOK_WORKERS=0)"""
+        if self._threads:
+            return
+        self._stopping.clear()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"webhook-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the workers after their current job"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        """Wake idle workers, called after a job was enqueued in this process"""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            # Cleared before looking, so a notify during the claim is not lost
+            self._wakeup.clear()
+            try:
+                claimed = self._claim()
+            except Exception as e:
+                logger.error("Error claiming webhook job: %s", e)
+                claimed = None
+            if claimed is None:
+                self._wakeup.wait(self.poll_seconds)
+                continue
+            self._process(*claimed)
+
+    def _claimable(self, now: datetime):
+        stale = now - timedelta(seconds=self.stale_seconds)
+        return or_(
+            and_(WebhookJob.status == QUEUED, WebhookJob.available_at <= now),
+            and_(WebhookJob.status == RUNNING, WebhookJob.started_at < stale)
+        )
+
+    def _claim(self) -> Optional[Tuple[int, str, Dict[str, Any], int, datetime]]:
+        """Take the oldest runnable job; the session is closed before the job runs
+
+        The returned ``started_at`` identifies this claim, so a worker whose
+        job was reclaimed as stale cannot record its outcome over the new one.
+        """
+        session = self.session_factory()
+        try:
+            while True:
+                now = datetime.utcnow()
+                query = session.query(WebhookJob.id).filter(self._claimable(now)).order_by(WebhookJob.id)
+                if session.get_bind().dialect.name != "sqlite":
+                    query = query.with_for_update(skip_locked=True)
+                job_id = query.limit(1).scalar()
+                if job_id is None:
+                    session.rollback()
+                    return None
+                # Another worker may have taken it since the select
+                claimed = session.query(WebhookJob).filter(
+                    WebhookJob.id == job_id, self._claimable(now)
+                ).update({
+                    WebhookJob.status: RUNNING,
+                    WebhookJob.started_at: now,
+                    WebhookJob.attempts: WebhookJob.attempts + 1
+                }, synchronize_session=False)
+                if claimed:
+                    job = session.query(WebhookJob.event, WebhookJob.payload, WebhookJob.attempts).filter(
+                        WebhookJob.id == job_id
+                    ).one()
+                    session.commit()
+                    return job_id, job.event, json.loads(job.payload), job.attempts, now
+                session.rollback()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _process(self, job_id: int, event: str, payload: Dict[str, Any], attempts: int, claimed_at: datetime):
+        if attempts > self.max_attempts:
+            # Reclaimed after its workers died every time
+            self._finish(job_id, claimed_at, FAILED, "Worker lost while processing the job", None)
+            return
+        try:
+            success, message = self.handler(event, payload)
+            status = SUCCEEDED if success else FAILED
+            retry_at = None
+        except Exception as e:
+            logger.warning("Error processing webhook job: %s", e, extra={"job_id": job_id, "attempt": attempts}, exc_info=True)
+            message = f"Error processing webhook: {str(e)}"
+            if attempts < self.max_attempts:
+                status = QUEUED
+                retry_at = datetime.utcnow() + timedelta(seconds=2 ** attempts)
+            else:
+                status = FAILED
+                retry_at = None
+        self._finish(job_id, claimed_at, status, message, retry_at)
+
+    def _finish(self, job_id: int, claimed_at: datetime, status: str, message: str, retry_at: Optional[datetime]):
+        session = self.session_factory()
+        try:
+            values = {WebhookJob.status: status, WebhookJob.result: message}
+            if retry_at is not None:
+                values[WebhookJob.available_at] = retry_at
+            else:
+                values[WebhookJob.finished_at] = datetime.utcnow()
+            # Only the claim that is still current may record its outcome
+            updated = session.query(WebhookJob).filter(
+                WebhookJob.id == job_id,
+                WebhookJob.status == RUNNING,
+                WebhookJob.started_at == claimed_at
+            ).update(values, synchronize_session=False)
+            session.commit()
+            if not updated:
+                logger.warning("Webhook job claim lost, outcome discarded", extra={"job_id": job_id, "status": status})
+        except Exception as e:
+            session.rollback()
+            logger.error("Error recording outcome of webhook job: %s", e, extra={"job_id": job_id})
+        finally:
+            session.close()
+
+
+def get_job(session, job_id: int) -> Optional[Dict[str, Any]]:
+    """Status of a job, or None if it does not exist"""
+    job = session.query(WebhookJob).filter_by(id=job_id).first()
+    return job_to_dict(job) if job else None
+
+
+def queue_depth(session) -> Dict[str, int]:
+    """Number of jobs per status"""
+    rows = session.query(WebhookJob.status, func.count(WebhookJob.id)).group_by(WebhookJob.status)
+    return {status: count for status, count in rows}
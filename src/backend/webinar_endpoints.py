@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Webinar endpoints for NewDay Platform
+
+Bulk exports of a webinar's responses for analysts. Rows are streamed from a
+server-side cursor (PostgreSQL) or a lazily stepped SQLite cursor in
+response id order, so memory stays constant however many rows there are.
+An interrupted export is resumed by passing the last received
+``response_id`` as ``after_id``.
+
+Per-day answer statistics computed by answer_scoring.py are read back from
+``day_answer_stats``.
+
+Responses of months moved to the cold archive (see archive.py) are merged
+into the stream by response id, so exports cover the full history.
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import Any, Iterator, List, Optional, Sequence
+from operator import itemgetter
+import csv
+import heapq
+import io
+import itertools
+
+from sqlalchemy import and_, select
+
+from models import Participant, Webinar, WebinarDay, Response, Question, DayAnswerStats
+import archive
+from bulk import chunked
+from fast_json import dumps
+from n8n_endpoints import verify_n8n_api_key
+from answer_scoring import stats_dict
+from question_catalog import ensure_webinar_questions
+from webinar_shards import get_shards
+
+router = APIRouter(prefix="/api/webinars", tags=["webinars"])
+
+# Rows fetched per round trip and encoded into one streamed chunk
+EXPORT_BATCH_SIZE = 1000
+
+# Sharded webinars are read from their own database file (see webinar_shards.py)
+shards = get_shards()
+
+EXPORT_COLUMNS = [
+    "response_id",
+    "participant_id",
+    "user_id",
+    "day_id",
+    "day_number",
+    "day_title",
+    "question_id",
+    "question_text",
+    "response_text",
+    "response_timestamp",
+    "enrollment_date",
+    "completion_status",
+]
+
+def _export_statement(webinar_id: int, after_id: int, limit: Optional[int]):
+    statement = select(
+        Response.id,
+        Response.participant_id,
+        Participant.user_id,
+        Response.day_id,
+        WebinarDay.day_number,
+        WebinarDay.title,
+        Response.question_id,
+        Question.text,
+        Response.response_text,
+        Response.response_timestamp,
+        Participant.enrollment_date,
+        Participant.completion_status
+    ).join(
+        Participant, Participant.id == Response.participant_id
+    ).join(
+        WebinarDay, WebinarDay.id == Response.day_id
+    ).outerjoin(
+        Question, and_(Question.day_id == Response.day_id, Question.position == Response.question_id)
+    ).where(
+        Participant.webinar_id == webinar_id,
+        Response.id > after_id
+    ).order_by(Response.id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+def _archived_rows(session, webinar_id: int, after_id: int) -> Iterator[Sequence[Any]]:
+    """Archived responses of the webinar as export rows, in response id order"""
+    participants = {
+        row.id: row for row in session.query(
+            Participant.id, Participant.user_id, Participant.enrollment_date, Participant.completion_status
+        ).filter(Participant.webinar_id == webinar_id)
+    }
+    days = {
+        row.id: row for row in session.query(WebinarDay.id, WebinarDay.day_number, WebinarDay.title).filter(
+            WebinarDay.webinar_id == webinar_id
+        )
+    }
+    questions = {
+        (row.day_id, row.position): row.text for row in session.query(
+            Question.day_id, Question.position, Question.text
+        ).filter(Question.day_id.in_(list(days)))
+    } if days else {}
+    for row in archive.iter_archived_by_id(session, set(participants), after_id):
+        day = days.get(row["day_id"])
+        if day is None:
+            continue
+        participant = participants[row["participant_id"]]
+        yield (
+            row["id"], row["participant_id"], participant.user_id, row["day_id"], day.day_number, day.title,
+            row["question_id"], questions.get((row["day_id"], row["question_id"])), row["response_text"],
+            row["response_timestamp"], participant.enrollment_date, participant.completion_status
+        )
+
+def _iter_batches(webinar_id: int, after_id: int, limit: Optional[int]) -> Iterator[List[Sequence[Any]]]:
+    """Row batches of the export; the session lives as long as the stream"""
+    session = shards.sessions(webinar_id)[1]()
+    try:
+        archived = archive.has_archive(session)
+        result = session.execute(
+            _export_statement(webinar_id, after_id, limit).execution_options(stream_results=True)
+        )
+        if not archived:
+            for batch in result.partitions(EXPORT_BATCH_SIZE):
+                yield batch
+            return
+        hot = itertools.chain.from_iterable(result.partitions(EXPORT_BATCH_SIZE))
+        rows = heapq.merge(hot, _archived_rows(session, webinar_id, after_id), key=itemgetter(0))
+        yield from chunked(itertools.islice(rows, limit), EXPORT_BATCH_SIZE)
+    finally:
+        session.close()
+
+def _ensure_webinar(webinar_id: int):
+    session = shards.shared[1]()
+    try:
+        exists = session.query(Webinar.id).filter(Webinar.id == webinar_id).first()
+    finally:
+        session.close()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Webinar not found")
+
+def _ensure_questions(webinar_id: int):
+    # question_text comes from the questions table; days added since startup may have no rows yet
+    try:
+        ensure_webinar_questions(shards.sessions(webinar_id), webinar_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error preparing questions: {str(e)}")
+
+def _generate_ndjson(webinar_id: int, after_id: int, limit: Optional[int]) -> Iterator[bytes]:
+    for batch in _iter_batches(webinar_id, after_id, limit):
+        yield b"".join(dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in batch)
+
+def _csv_value(value: Any) -> Any:
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+def _generate_csv(webinar_id: int, after_id: int, limit: Optional[int]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if after_id == 0:
+        # A resumed export continues the earlier file, so only the first part has a header
+        writer.writerow(EXPORT_COLUMNS)
+    for batch in _iter_batches(webinar_id, after_id, limit):
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+@router.get("/{webinar_id}/responses.ndjson", summary="Stream a webinar's responses as NDJSON")
+def export_responses_ndjson(
+    webinar_id: int,
+    after_id: int = Query(0, ge=0, description="Resume after this response_id"),
+    limit: Optional[int] = Query(None, ge=1),
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Export responses with participant and day metadata, one JSON object per line, in response_id order
+    """
+    _ensure_webinar(webinar_id)
+    _ensure_questions(webinar_id)
+    return StreamingResponse(
+        _generate_ndjson(webinar_id, after_id, limit),
+        media_type="application/x-ndjson"
+    )
+
+@router.get("/{webinar_id}/responses.csv", summary="Stream a webinar's responses as CSV")
+def export_responses_csv(
+    webinar_id: int,
+    after_id: int = Query(0, ge=0, description="Resume after this response_id"),
+    limit: Optional[int] = Query(None, ge=1),
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Export responses with participant and day metadata as CSV, in response_id order
+    """
+    _ensure_webinar(webinar_id)
+    _ensure_questions(webinar_id)
+    file_name = f"webinar-{webinar_id}-responses.csv"
+    return StreamingResponse(
+        _generate_csv(webinar_id, after_id, limit),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
+
+@router.get("/{webinar_id}/stats", summary="Stored answer statistics of a webinar's days")
+def webinar_stats(
+    webinar_id: int,
+    api_key_verified: bool = Depends(verify_n8n_api_key)
+):
+    """
+    Per-day respondents, visual-test option distribution and correct answers
+    as computed by the last `POST /api/n8n/webinars/{webinar_id}/score`
+    """
+    _ensure_webinar(webinar_id)
+    session = shards.sessions(webinar_id)[1]()
+    try:
+        rows = session.query(DayAnswerStats).join(
+            WebinarDay, WebinarDay.id == DayAnswerStats.day_id
+        ).filter(
+            DayAnswerStats.webinar_id == webinar_id
+        ).order_by(WebinarDay.day_number).all()
+        return {"webinar_id": webinar_id, "days": [stats_dict(row) for row in rows]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading answer statistics: {str(e)}")
+    finally:
+        session.close()
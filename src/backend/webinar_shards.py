@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Per-webinar SQLite shards
+
+SQLite allows one writer per database file, so with every webinar in one
+file, enrollments, answers and progress updates of all webinars queue for
+the same lock. With WEBINAR_SHARD_DIR set, a webinar can be moved into its
+own file (``webinar_<id>.db``) holding its ``webinar_days``, ``questions``,
+``participants`` and ``responses`` with their full-text index and monthly
+archive manifest (``response_archives``); writes of different sharded
+webinars then run in parallel, one writer per file.
+
+Catalog tables (webinars, visual tests, courses, content blocks, job and
+cursor tables, statistics) stay in the shared file. Every shard connection
+ATTACHes the shared file, and SQLite resolves unqualified table names in
+the shard first, so the existing queries (joins of participants with
+webinars, visual tests, ...) run unchanged on a shard session.
+
+Rows created in a shard get ids starting at ``webinar_id << 32``
+(AUTOINCREMENT with a seeded sequence), so ids stay unique across files and
+``webinar_of(participant_id)`` tells which file a participant lives in.
+Ids below 2**32 belong to the shared file.
+
+A webinar is sharded by ``WebinarShards.create_shard`` (POST
+/api/admin/webinars/{id}/shard) before its enrollment opens: its days and
+questions move to the new file, keeping their ids. Webinars that already
+have participants stay in the shared file; an enrollment racing with
+``create_shard`` makes it fail and leaves the webinar in the shared file.
+
+Queries without a webinar or participant filter (response search, the
+response export, archiving) run on every file via ``read_sessions`` and
+``all_sessions`` and merge the results. Archive file names hold the
+largest archived response id, so they stay unique across files.
+
+Environment variables:
+    WEBINAR_SHARD_DIR: Directory of shard files; sharding is off when unset
+        or when DATABASE_URL is not a SQLite file
+"""
+
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, Index, MetaData, Table, UniqueConstraint, create_engine, event, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+from content_snapshot import ContentSnapshot, content_snapshot
+from database import DATABASE_URL, _is_file_sqlite, create_engines, get_engines
+from models import Participant, Question, Response, ResponseArchive, Webinar, WebinarDay, upgrade_schema
+from query_log import install_slow_query_log
+from search import install_search
+from structured_logging import get_logger
+
+logger = get_logger("webinar_shards")
+
+SHARD_DIR = os.getenv("WEBINAR_SHARD_DIR", "")
+
+# Row ids of a shard start at webinar_id << ID_BITS
+ID_BITS = 32
+
+# Schema name of the shared file on shard connections
+CATALOG_SCHEMA = "catalog"
+
+SHARDED_MODELS = (WebinarDay, Question, Participant, Response, ResponseArchive)
+
+_FILE_PATTERN = re.compile(r"^webinar_(\d+)\.db$")
+
+
+def id_base(webinar_id: int) -> int:
+    """Ids of rows created in a webinar's shard are greater than this"""
+    return webinar_id << ID_BITS
+
+
+def webinar_of(row_id: Optional[int]) -> int:
+    """Webinar whose shard holds a participant/response id; 0 for the shared file"""
+    return (row_id or 0) >> ID_BITS
+
+
+def _shard_metadata() -> MetaData:
+    """
+    Shard copies of the sharded tables
+
+    Foreign keys are left out (their targets may live in the shared file,
+    and SQLite does not enforce them here anyway); AUTOINCREMENT makes the
+    seeded id sequence stick.
+    """
+    metadata = MetaData()
+    for model in SHARDED_MODELS:
+        source = model.__table__
+        table = Table(
+            source.name, metadata,
+            *[Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+              for column in source.columns],
+            sqlite_autoincrement=True
+        )
+        for index in source.indexes:
+            Index(index.name, *[table.c[column.name] for column in index.columns], unique=index.unique)
+        for constraint in source.constraints:
+            if isinstance(constraint, UniqueConstraint):
+                table.append_constraint(UniqueConstraint(*[column.name for column in constraint.columns],
+                                                         name=constraint.name))
+    return metadata
+
+
+SHARD_METADATA = _shard_metadata()
+
+
+class WebinarShards:
+    """Session factories of the shared file and of every webinar shard"""
+
+    def __init__(self, url: str, directory: str = SHARD_DIR):
+        self.url = url
+        self.directory = directory
+        self.enabled = bool(directory) and _is_file_sqlite(url)
+        if directory and not self.enabled:
+            logger.warning("WEBINAR_SHARD_DIR is ignored, sharding needs a SQLite file database")
+        write_engine, read_engine = get_engines(url)
+        self.shared: Tuple[sessionmaker, sessionmaker] = (
+            sessionmaker(bind=write_engine), sessionmaker(bind=read_engine)
+        )
+        self._shards: Dict[int, Tuple[sessionmaker, sessionmaker]] = {}
+        self._snapshots: Dict[int, ContentSnapshot] = {}
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+            self.catalog_path = os.path.abspath(make_url(url).database)
+
+    def path(self, webinar_id: int) -> str:
+        return os.path.join(self.directory, f"webinar_{webinar_id}.db")
+
+    def is_sharded(self, webinar_id: Optional[int]) -> bool:
+        if not self.enabled or not webinar_id:
+            return False
+        # Another worker process may have created (or discarded) the shard since
+        return os.path.exists(self.path(webinar_id))
+
+    def webinar_ids(self) -> List[int]:
+        """Ids of sharded webinars, ascending"""
+        if not self.enabled:
+            return []
+        matches = (_FILE_PATTERN.match(name) for name in os.listdir(self.directory))
+        return sorted(int(match.group(1)) for match in matches if match)
+
+    def sessions(self, webinar_id: Optional[int]) -> Tuple[sessionmaker, sessionmaker]:
+        """(write, read) session factories of the file holding a webinar's participants"""
+        if not self.is_sharded(webinar_id):
+            return self.shared
+        if webinar_id not in self._shards:
+            self._open(webinar_id)
+        return self._shards[webinar_id]
+
+    def sessions_for_row(self, row_id: Optional[int]) -> Tuple[sessionmaker, sessionmaker]:
+        """(write, read) session factories of the file holding a participant or response id"""
+        return self.sessions(webinar_of(row_id))
+
+    def all_sessions(self) -> List[Tuple[int, sessionmaker, sessionmaker]]:
+        """(webinar_id, write, read) of the shared file (webinar 0) and every shard, in id order"""
+        stores = [(0,) + self.shared]
+        for webinar_id in self.webinar_ids():
+            stores.append((webinar_id,) + self.sessions(webinar_id))
+        return stores
+
+    def read_sessions(self, webinar_id: Optional[int] = None,
+                      participant_id: Optional[int] = None) -> List[sessionmaker]:
+        """Read session factories of the files a response query with these filters has to cover"""
+        if participant_id is not None:
+            return [self.sessions_for_row(participant_id)[1]]
+        if webinar_id is not None:
+            return [self.sessions(webinar_id)[1]]
+        return [read for _, _, read in self.all_sessions()]
+
+    def snapshot(self, webinar_id: Optional[int]) -> ContentSnapshot:
+        """Content snapshot of the file holding a webinar's days"""
+        if not self.is_sharded(webinar_id):
+            return content_snapshot
+        with self._lock:
+            return self._snapshots.setdefault(webinar_id, ContentSnapshot())
+
+    def _open(self, webinar_id: int):
+        with self._lock:
+            if webinar_id in self._shards:
+                return
+            url = f"sqlite:///{os.path.abspath(self.path(webinar_id))}"
+            self._create_schema(url, webinar_id)
+            write_engine, read_engine = create_engines(url)
+            for engine in {write_engine, read_engine}:
+                self._attach_catalog(engine)
+                install_slow_query_log(engine)
+            self._shards[webinar_id] = (sessionmaker(bind=write_engine), sessionmaker(bind=read_engine))
+
+    def _attach_catalog(self, engine):
+        catalog_path = self.catalog_path
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute(f"ATTACH DATABASE ? AS {CATALOG_SCHEMA}", (catalog_path,))
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _create_schema(url: str, webinar_id: int):
+        # A connection without the catalog attached: table existence checks
+        # would otherwise find the shared file's tables
+        engine = create_engine(url)
+        try:
+            SHARD_METADATA.create_all(engine)
+            upgrade_schema(engine)
+            install_search(engine, indexes=("responses_fts",))
+            with engine.begin() as connection:
+                for table in SHARD_METADATA.sorted_tables:
+                    connection.execute(text(
+                        "INSERT INTO sqlite_sequence (name, seq) SELECT :name, :seq "
+                        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :name)"
+                    ), {"name": table.name, "seq": id_base(webinar_id)})
+        finally:
+            engine.dispose()
+
+    def create_shard(self, webinar_id: int) -> Dict[str, int]:
+        """
+        Move a webinar into its own file
+
+        Its days and questions are copied to the shard (keeping their ids)
+        and removed from the shared file. Safe to re-run after a failure.
+
+        The shard file is created before the participant check, so from then
+        on enrollments go to the shard. An enrollment that picked the shared
+        file just before is caught by a second check, made while the days
+        are deleted from the shared file (holding its write lock); the
+        deletion is then rolled back and the shard discarded.
+
+        Raises:
+            ValueError: If sharding is disabled, the webinar does not exist
+                or it already has participants in the shared file
+        """
+        if not self.enabled:
+            raise ValueError("Webinar sharding is disabled (set WEBINAR_SHARD_DIR)")
+        shared_write, shared_read = self.shared
+        read_session = shared_read()
+        try:
+            if not read_session.query(Webinar.id).filter(Webinar.id == webinar_id).first():
+                raise ValueError("Webinar not found")
+        finally:
+            read_session.close()
+
+        self._open(webinar_id)
+        read_session = shared_read()
+        try:
+            if read_session.query(Participant.id).filter(Participant.webinar_id == webinar_id).first():
+                self._discard(webinar_id)
+                raise ValueError("Webinar already has participants in the shared database")
+            days = [dict(row._mapping) for row in read_session.execute(
+                select(WebinarDay.__table__).where(WebinarDay.webinar_id == webinar_id)
+            )]
+            day_ids = [day["id"] for day in days]
+            questions = [dict(row._mapping) for row in read_session.execute(
+                select(Question.__table__).where(Question.day_id.in_(day_ids))
+            )] if day_ids else []
+        finally:
+            read_session.close()
+
+        session = self._shards[webinar_id][0]()
+        try:
+            connection = session.connection()
+            existing_days = {row[0] for row in connection.execute(select(WebinarDay.id))}
+            existing_questions = {row[0] for row in connection.execute(select(Question.id))}
+            new_days = [day for day in days if day["id"] not in existing_days]
+            new_questions = [question for question in questions if question["id"] not in existing_questions]
+            if new_days:
+                connection.execute(WebinarDay.__table__.insert(), new_days)
+            if new_questions:
+                connection.execute(Question.__table__.insert(), new_questions)
+            session.commit()
+        finally:
+            session.close()
+
+        session = shared_write()
+        try:
+            if day_ids:
+                session.query(Question).filter(Question.day_id.in_(day_ids)).delete(synchronize_session=False)
+                session.query(WebinarDay).filter(WebinarDay.id.in_(day_ids)).delete(synchronize_session=False)
+            if session.query(Participant.id).filter(Participant.webinar_id == webinar_id).first():
+                session.rollback()
+                self._discard(webinar_id)
+                raise ValueError("Participants enrolled in the shared database while the shard was created")
+            session.commit()
+        finally:
+            session.close()
+        content_snapshot.invalidate()
+
+        summary = {"webinar_id": webinar_id, "days": len(days), "questions": len(questions)}
+        logger.info("Created webinar shard", extra=summary)
+        return summary
+
+    def _discard(self, webinar_id: int):
+        """Remove the shard of a failed create_shard, unless participants were enrolled into it"""
+        with self._lock:
+            write_session, read_session = self._shards[webinar_id]
+            session = write_session()
+            try:
+                if session.query(Participant.id).first():
+                    logger.error("Webinar has participants in both its shard and the shared database",
+                                 extra={"webinar_id": webinar_id})
+                    return
+            finally:
+                session.close()
+            del self._shards[webinar_id]
+            self._snapshots.pop(webinar_id, None)
+            for factory in (write_session, read_session):
+                factory.kw["bind"].dispose()
+            os.remove(self.path(webinar_id))
+
+
+_shards: Dict[str, WebinarShards] = {}
+_shards_lock = threading.Lock()
+
+
+def get_shards(url: str = None) -> WebinarShards:
+    """The shard registry of a database URL, created once per process"""
+    url = url or DATABASE_URL
+    with _shards_lock:
+        if url not in _shards:
+            _shards[url] = WebinarShards(url)
+        return _shards[url]